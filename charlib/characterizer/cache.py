@@ -0,0 +1,187 @@
+"""On-disk cache for sharing simulation results between characterization tasks"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from charlib.characterizer import family
+
+
+class ResultCache:
+    """A simple key-value store backed by one JSON file per entry.
+
+    Characterization tasks run in separate worker processes (each worker handles a single task),
+    so results that should be shared between tasks have to go through the filesystem. Entries are
+    grouped by namespace, and keys may be any JSON-serializable value. Writes are atomic, so
+    concurrent readers never see a partially written entry. If cache_dir is None, caching is
+    disabled: nothing is stored, and every lookup misses.
+    """
+
+    def __init__(self, cache_dir, namespace: str):
+        self.path = Path(cache_dir) / namespace if cache_dir is not None else None
+
+    @staticmethod
+    def digest(key) -> str:
+        """Return a stable hash of a JSON-serializable key"""
+        key_str = json.dumps(key, sort_keys=True, default=str)
+        return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+    def get(self, key, default=None):
+        """Return the value stored for key, or default if there is no such entry"""
+        if self.path is None:
+            return default
+        try:
+            with open(self.path / f'{self.digest(key)}.json', 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def values(self) -> list:
+        """Return every value stored in this namespace, in no particular order"""
+        if self.path is None:
+            return []
+        values = []
+        for entry in self.path.glob('*.json'):
+            try:
+                with open(entry, 'r', encoding='utf-8') as file:
+                    values.append(json.load(file))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return values
+
+    def put(self, key, value):
+        """Store a JSON-serializable value for key, replacing any existing entry"""
+        if self.path is None:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        (fd, tmp_path) = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(value, file)
+            os.replace(tmp_path, self.path / f'{self.digest(key)}.json')
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _file_stamp(path):
+    """Return a (path, mtime) pair so cache keys change when an input file is edited"""
+    try:
+        return (str(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        return (str(path), None)
+
+
+def _cell_key(cell, config, settings):
+    """Build the part of a cache key which identifies a cell and its operating conditions"""
+    return {
+        'cell': cell.name,
+        'netlist': _file_stamp(cell.netlist),
+        'models': [[_file_stamp(filename), *libname] for (filename, *libname) in config.models],
+        'supplies': [(node.name, node.voltage) for node in settings.named_nodes],
+        'temperature': settings.temperature,
+    }
+
+
+def _family_key(cell, config, settings):
+    """Build the part of a cache key which identifies a cell's drive-strength family and its
+    operating conditions. Results stored under it are shared by every member of the family."""
+    return {
+        'family': family.family_id(cell, config),
+        'models': [[_file_stamp(filename), *libname] for (filename, *libname) in config.models],
+        'supplies': [(node.name, node.voltage) for node in settings.named_nodes],
+        'temperature': settings.temperature,
+    }
+
+
+def operating_point_key(cell, config, settings, input_states: dict):
+    """Build the cache key for the DC operating point of a cell with static inputs.
+
+    :param input_states: A dict mapping each logic input name to '0' or '1'.
+    """
+    return {**_cell_key(cell, config, settings), 'inputs': sorted(input_states.items())}
+
+
+def settling_time_key(cell, config, settings, path):
+    """Build the cache key for the output settling times measured for a path through a cell"""
+    return {**_cell_key(cell, config, settings), 'path': list(path)}
+
+
+def family_settling_time_key(cell, config, settings, path):
+    """Build the cache key for the output settling times measured for a path through any member of
+    a cell's family"""
+    return {**_family_key(cell, config, settings), 'path': list(path)}
+
+
+def family_constraint_key(cell, config, settings, path, variation: dict, state_map: dict):
+    """Build the cache key for the setup/hold search results of a path through any member of a
+    cell's family, for one variation and state map"""
+    return {**_family_key(cell, config, settings), 'path': list(path),
+            'variation': sorted(variation.items()), 'state': sorted(state_map.items())}
+
+
+def constraint_key(cell, config, settings, path, variation: dict, state_map: dict):
+    """Build the cache key for the setup/hold search results of a path through a cell, for one
+    variation and state map"""
+    return {**_cell_key(cell, config, settings), 'path': list(path),
+            'variation': sorted(variation.items()), 'state': sorted(state_map.items())}
+
+
+def stabilizing_time_key(cell, config, settings, path, **conditions):
+    """Build the cache key for the stabilizing time of a sequential path through a cell.
+
+    :param **conditions: The slews, load and safety factor the stabilizing time was measured with.
+    """
+    return {**_cell_key(cell, config, settings), 'path': list(path), **conditions}
+
+
+def operating_points(settings):
+    """Return the shared cache of DC operating points"""
+    return ResultCache(settings.cache_dir, 'operating_points')
+
+
+def settling_times(settings, arc_key):
+    """Return the shared cache of output settling times for one arc (see settling_time_key and
+    family_settling_time_key). Each slew and load has its own entry, so concurrent tasks never
+    overwrite each other's measurements."""
+    return ResultCache(settings.cache_dir, f'settling_times/{ResultCache.digest(arc_key)}')
+
+
+def stabilizing_times(settings):
+    """Return the shared cache of sequential stabilizing times"""
+    return ResultCache(settings.cache_dir, 'stabilizing_times')
+
+
+def family_results(settings):
+    """Return the shared cache of results used to seed the searches of other members of a family"""
+    return ResultCache(settings.cache_dir, 'family_results')
+
+
+def constraint_results(settings):
+    """Return the shared cache of results used to seed the searches of neighboring slews"""
+    return ResultCache(settings.cache_dir, 'constraint_results')
+
+
+def initial_conditions(cell, config, settings, input_states: dict, output_nodes: dict) -> dict:
+    """Look up a cached DC operating point and return it as .ic node voltages.
+
+    Only nodes inside the device under test and on its outputs are returned; inputs and supplies
+    are driven by sources in each test bench. Returns an empty dict if no operating point has been
+    cached for this state.
+
+    :param input_states: A dict mapping each logic input name to '0' or '1'.
+    :param output_nodes: A dict mapping each output pin name to the node it is connected to in the
+                         test bench.
+    """
+    if settings.dry_run:
+        return {}
+    op = operating_points(settings).get(operating_point_key(cell, config, settings, input_states))
+    if op is None:
+        return {}
+    nodes = {name: v for name, v in op['nodes'].items() if name.startswith('xdut.')}
+    for pin, node in output_nodes.items():
+        if f'v{pin}'.lower() in op['nodes']:
+            nodes[node] = op['nodes'][f'v{pin}'.lower()]
+    return nodes
@@ -0,0 +1,65 @@
+"""Per-cell transient timestep calibration"""
+
+import copy
+
+import numpy as np
+
+
+def representative_task(cell, config, settings):
+    """Return the combinational delay task used to calibrate a cell's timestep, or None.
+
+    The most demanding arc is chosen: the fastest data slew with the smallest load, on the first
+    path through the cell.
+    """
+    tasks = list(settings.simulation.combinational_delay(cell, config, settings))
+    if not tasks:
+        return None
+    return min(tasks, key=lambda task: (task[4]['data_slews'], task[4]['loads']))
+
+
+def delays(cell_group) -> np.ndarray:
+    """Return every lookup table value in a liberty cell group as a flat array"""
+    return np.concatenate([table.values.flatten() for timing_group in cell_group.subgroups_with_name('timing')
+                           for table in timing_group.groups.values()] or [np.empty(0)])
+
+
+def calibrate_timestep(cell, config, settings, max_halvings=6):
+    """Find the largest transient timestep at which a cell's delays have converged.
+
+    Simulates the cell's representative delay arc with a timestep equal to its data slew, then with
+    successively halved timesteps, until the delays at two consecutive timesteps agree within
+    settings.simulation.timestep_tolerance (relative). The larger of those two timesteps is
+    returned. If the delays never converge, the smallest timestep tried is returned.
+
+    :param cell: A Cell object to calibrate.
+    :param config: The cell's CellTestConfig.
+    :param settings: A CharacterizationSettings object.
+    :param max_halvings: The largest number of times the timestep is halved.
+    :return: The calibrated timestep in settings.units.time units, or None if the cell has no
+             combinational delay arcs.
+    """
+    task = representative_task(cell, config, settings)
+    if task is None:
+        return None
+    (procedure, _, _, _, variation, *args) = task
+
+    # Calibration runs at full accuracy, however the cell will be characterized
+    trial_settings = copy.copy(settings)
+    trial_settings.simulation = copy.copy(settings.simulation)
+    trial_settings.simulation.two_pass = False
+
+    timestep = variation['data_slews']
+    previous = None
+    for _ in range(max_halvings + 1):
+        trial_config = copy.copy(config)
+        trial_config.timestep = timestep
+        # Procedures add their results to cell.liberty, so give each trial a fresh cell
+        values = delays(procedure(copy.deepcopy(cell), trial_config, trial_settings, variation, *args))
+        if previous is not None:
+            error = np.max(np.abs(values - previous) / np.maximum(np.abs(values), np.finfo(float).tiny),
+                           initial=0)
+            if error <= settings.simulation.timestep_tolerance:
+                return 2*timestep
+        previous = values
+        timestep /= 2
+    return 2*timestep
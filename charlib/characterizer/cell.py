@@ -315,14 +315,17 @@ class Cell:
 class CellTestConfig:
     """Capture configuration information for testing one or more cells"""
 
-    def __init__(self, models: list, plots=[], timestep=None, **parameters):
+    def __init__(self, models: list, plots=[], timestep=None, family=None, **parameters):
         """Construct a new test configuration.
 
         :param models: Transistor models for the cell under test
         :param plots: A list of plot types to generate from simulation results. Defaults to None.
         :param timestep: The simulation timestep to use for transient simulations, specified in
-                         settings.units.time units. Defaults to 1/8 the minimum data_slew or
-                         clock_slew if not provided.
+                         settings.units.time units. If not provided, each procedure uses a fraction
+                         of the fastest slew in its test bench, or a calibrated timestep (see
+                         charlib.characterizer.calibration).
+        :param family: The name of the drive-strength family this cell belongs to. If not
+                       provided, it is derived from the cell name (see charlib.characterizer.family).
         :param **parameters: Keyword arguments containing lists of test parameters, as described
                              below:
             :param data_slews: A list of input data slew rates to test, specified in
@@ -347,6 +350,10 @@ class CellTestConfig:
             self.models.append((filename, *libname))
 
         self.timestep = timestep
+        self.family = family
+        # Whether this cell shares its results with its family. The Characterizer clears this for
+        # every member but the first (see charlib.characterizer.family.leaders_and_siblings).
+        self.family_leader = True
         self.plots = plots
         supported_parameters = {param for rp in registered_procedures.values() for param in rp['parameters']}
         self.parameters = {k: parameters[k] for k in supported_parameters if k in parameters}
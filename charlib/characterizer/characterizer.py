@@ -1,15 +1,24 @@
 """Dispatches characterization jobs and manages cell data"""
 
+import copy
+import itertools
+import json
+import os
+import tempfile
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 from tqdm import tqdm
 
 import matplotlib.pyplot as plt
+import numpy as np
 
-from charlib.characterizer import utils, plots
+from charlib.characterizer import utils, plots, calibration, family
+from charlib.characterizer.outliers import nonmonotonic_entries, outlier_entries
 from charlib.characterizer.cell import Cell, CellTestConfig
 from charlib.characterizer.units import UnitsSettings
-from charlib.characterizer.procedures import registered_procedures, ProcedureFailedException
+from charlib.characterizer.procedures import registered_procedures, preparation_tasks, ProcedureFailedException
+from charlib.liberty import liberty
 from charlib.liberty.library import Library
 
 import charlib.characterizer.procedures.pin_capacitance.ac_sweep
@@ -23,6 +32,11 @@ import charlib.characterizer.procedures.sequential.constraint.recovery
 import charlib.characterizer.procedures.sequential.constraint.removal
 import charlib.characterizer.procedures.sequential.constraint.min_pulse_width
 
+# The number of tasks a worker runs with the ngspice-pipe backend before it (and its ngspice
+# process) is replaced
+PIPE_TASKS_PER_WORKER = 16
+
+
 class Characterizer:
     """Main object of Charlib. Keeps track of settings and cells, and schedules simulations."""
 
@@ -63,7 +77,8 @@ class Characterizer:
         if cell.is_sequential:
             # Find setup & hold constraints (clock-to-q, en-to-q)
             simulations += self.settings.simulation.metastability_constraint(cell, config, self.settings)
-            # TODO: Find minimum pulse width constraints (set, reset, enable, clock)
+            # Find minimum pulse width constraints (clock)
+            simulations += self.settings.simulation.min_pulse_width_constraint(cell, config, self.settings)
             # Find recovery & removal constraints (clk/en-to-set, clk/en-to-reset)
             simulations += self.settings.simulation.recovery_constraint(cell, config, self.settings)
             simulations += self.settings.simulation.removal_constraint(cell, config, self.settings)
@@ -72,32 +87,78 @@ class Characterizer:
         else:
             # Measure combinational propagation and transient delays
             simulations += self.settings.simulation.combinational_delay(cell, config, self.settings)
-            # Measure static leakage power for all input states
+            # Measure static leakage power for all input states. These are preparation tasks, so
+            # their DC operating points are cached before the delay test benches start.
             simulations += self.settings.simulation.combinational_leakage(cell, config, self.settings)
         return simulations
 
     def characterize(self):
         """Execute scheduled simulation jobs in parallel"""
-        # Setup: Prepare simulation jobs single-threadedly (is that a word?)
-        simulation_tasks = []
+        # Without a cache_dir, cached results are only shared between the tasks of this run
+        if not self.settings.cache or self.settings.cache_dir is not None:
+            return self._characterize()
+        with tempfile.TemporaryDirectory(prefix='charlib-cache-') as cache_dir:
+            self.settings.cache_dir = Path(cache_dir)
+            try:
+                return self._characterize()
+            finally:
+                self.settings.cache_dir = None
+
+    def _characterize(self):
+        """Calibrate timesteps, run every characterization task, and return the library as a
+        liberty string"""
+        # Calibrate transient timesteps for cells which don't specify one
+        if self.settings.simulation.calibrate_timestep and not self.settings.dry_run:
+            self.calibrate_timesteps()
+
+        # Characterize one member of each drive-strength family first, so that its results can seed
+        # the searches for its siblings. Only these leaders share their results with the family.
+        (leaders, siblings) = family.leaders_and_siblings(self.cells)
         for (cell, config) in self.cells:
-            simulation_tasks += self.analyse_cell(cell, config)
+            config.family_leader = (cell, config) in leaders
 
-        # Run all simulation jobs and merge each resulting liberty cell group into the library
-        with tqdm(bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
-                  total=len(simulation_tasks), desc="Characterizing") as progress_bar:
-            with ProcessPoolExecutor(max_workers=self.settings.jobs, max_tasks_per_child=1) as executor:
-                futures = [executor.submit(task, *args) for (task, *args) in simulation_tasks]
-                for future in as_completed(futures):
-                    try:
-                        cell_group = future.result()
-                    except ProcedureFailedException:
-                        if self.settings.omit_on_failure:
-                            continue
-                        else:
-                            raise
-                    self.library.add_group(cell_group)
-                    progress_bar.update(1)
+        simulation_tasks = []
+        for cells in [leaders, siblings]:
+            # Setup: Prepare simulation jobs single-threadedly (is that a word?)
+            tasks = [task for (cell, config) in cells for task in self.analyse_cell(cell, config)]
+            simulation_tasks += tasks
+
+            # Run all simulation jobs and merge each resulting liberty cell group into the library.
+            # Preparation tasks finish first, so that the results other tasks read from the cache
+            # are the same however tasks are scheduled. Procedures may share a preparation task,
+            # which only needs to run once.
+            self.run_tasks(unique_tasks([task for task in tasks if task[0] in preparation_tasks]),
+                           desc='Preparing')
+            self.run_tasks([task for task in tasks if task[0] not in preparation_tasks],
+                           probe_workers=self.settings.simulation.constraint_search_parallelism)
+
+        # Second pass of two-pass characterization: repeat non-monotonic delay table entries
+        if self.settings.simulation.two_pass:
+            full_settings = copy.copy(self.settings)
+            full_settings.simulation = copy.copy(self.settings.simulation)
+            full_settings.simulation.two_pass = False
+            self.resimulate_delay_entries(simulation_tasks, nonmonotonic_entries, full_settings,
+                                          desc='Refining')
+
+        # Quality control: repeat suspicious delay table entries with tighter solver settings
+        if self.settings.simulation.quality_control and not self.settings.dry_run:
+            tight_settings = copy.copy(self.settings)
+            tight_settings.simulation = copy.copy(self.settings.simulation)
+            tight_settings.simulation.two_pass = False
+            tight_settings.simulation.options = self.settings.simulation.options.tight()
+            find_outliers = lambda table: outlier_entries(table, self.settings.simulation.outlier_tolerance)
+            self.resimulate_delay_entries(simulation_tasks, find_outliers, tight_settings,
+                                          timestep_scale=0.5, desc='Re-simulating outliers')
+
+        # Record the timestep used for each cell
+        timesteps = {cell.name: config.timestep for (cell, config) in self.cells if config.timestep}
+        if timesteps:
+            self.library.add_attribute(liberty.Define('simulation_timestep', 'cell', 'float'))
+        for (name, timestep) in timesteps.items():
+            try:
+                self.library.group('cell', name).add_attribute('simulation_timestep', float(timestep))
+            except KeyError:
+                pass # Omitted on failure
 
         # Post-processing: Fetch generated table templates and add them to the library
         lut_templates = []
@@ -123,16 +184,235 @@ class Characterizer:
         return self.library.to_liberty(precision=6)
 
 
+    def run_tasks(self, tasks, merge=None, probe_workers=1, desc='Characterizing'):
+        """Run characterization tasks in parallel, and merge each resulting liberty cell group.
+
+        :param tasks: A list of (callable, *args) tasks.
+        :param merge: A function which takes a resulting cell group. Default self.library.add_group.
+                      Tasks which return None are not merged.
+        :param probe_workers: How many probes each task may run at once (see executor).
+        :param desc: A description for the progress bar.
+        """
+        if not tasks:
+            return
+        merge = merge or self.library.add_group
+        with tqdm(bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
+                  total=len(tasks), desc=desc) as progress_bar:
+            with self.executor(self.tasks_per_worker(), probe_workers) as executor:
+                futures = [executor.submit(task, *args) for (task, *args) in tasks]
+                for future in as_completed(futures):
+                    try:
+                        cell_group = future.result()
+                    except ProcedureFailedException:
+                        if self.settings.omit_on_failure:
+                            continue
+                        else:
+                            raise
+                    if cell_group is not None:
+                        merge(cell_group)
+                    progress_bar.update(1)
+
+    def calibrate_timesteps(self):
+        """Calibrate the transient timestep of each combinational cell which doesn't specify one"""
+        cells = [(cell, config) for (cell, config) in self.cells
+                 if not cell.is_sequential and not config.timestep]
+        with tqdm(bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
+                  total=len(cells), desc="Calibrating") as progress_bar:
+            with self.executor() as executor:
+                futures = {executor.submit(calibration.calibrate_timestep, cell, config, self.settings): config
+                           for (cell, config) in cells}
+                for future in as_completed(futures):
+                    try:
+                        futures[future].timestep = future.result()
+                    except ProcedureFailedException:
+                        if not self.settings.omit_on_failure:
+                            raise
+                    progress_bar.update(1)
+
+    def resimulate_delay_entries(self, simulation_tasks, find_entries, settings, timestep_scale=1,
+                                 desc='Re-simulating'):
+        """Repeat the combinational delay tasks which produced selected table entries, and replace
+        those entries with the results.
+
+        :param simulation_tasks: The tasks which produced the library's delay tables.
+        :param find_entries: A function which takes a LookupTable and returns the index values of
+                             the entries to repeat.
+        :param settings: The CharacterizationSettings to repeat tasks with.
+        :param timestep_scale: A factor applied to each cell's fixed timestep, if it has one.
+        :param desc: A description for the progress bar.
+        """
+        delay_procedures = charlib.characterizer.procedures.combinational.delay
+        delay_procedure = delay_procedures.measure_delays_for_path_with_criterion
+
+        # Find the tasks which produced each selected entry. Reference variations are repeated as
+        # ordinary delay tasks, so that they don't record their settling times again.
+        refine_tasks = []
+        for (task, cell, config, _task_settings, variation, path, *args) in simulation_tasks:
+            if task not in (delay_procedure, delay_procedures.measure_reference_delays):
+                continue
+            [input_pin, _, output_pin, output_transition] = path
+            timing_type = 'combinational_rise' if output_transition == '01' else 'combinational_fall'
+            try:
+                pin_group = self.library.group('cell', cell.name).group('pin', output_pin)
+                timing_group = pin_group.groups[('timing', input_pin, timing_type)]
+            except KeyError:
+                continue # Omitted on failure
+            point = (variation['loads'], variation['data_slews'])
+            if any(np.allclose(point, entry) for table in timing_group.groups.values()
+                   for entry in find_entries(table)):
+                if config.timestep and timestep_scale != 1:
+                    config = copy.copy(config)
+                    config.timestep *= timestep_scale
+                refine_tasks.append((delay_procedure, cell, config, settings, variation, path, *args))
+
+        # Overwrite the existing entries (merging would keep them)
+        def overwrite(cell_group):
+            library_cell = self.library.group('cell', cell_group.identifier)
+            for pin_group in cell_group.subgroups_with_name('pin'):
+                for timing_group in pin_group.subgroups_with_name('timing'):
+                    library_timing = library_cell.group('pin', pin_group.identifier).groups[timing_group.unique_key]
+                    for table in timing_group.groups.values():
+                        library_table = library_timing.groups[table.unique_key]
+                        for index_values in itertools.product(*table.index_values):
+                            library_table[index_values] = table[index_values]
+        self.run_tasks(refine_tasks, merge=overwrite, desc=desc)
+
+
+    def tasks_per_worker(self) -> int:
+        """Return how many tasks each worker process runs before it is replaced.
+
+        Workers are normally replaced after each task, so that no simulator state or module globals
+        carry over between tasks. With the ngspice-pipe backend, each worker instead keeps its
+        ngspice process alive for up to PIPE_TASKS_PER_WORKER tasks, which bounds how much state
+        (such as leaked circuits or memory in ngspice) can build up in one worker.
+        """
+        return PIPE_TASKS_PER_WORKER if self.settings.simulation.backend == 'ngspice-pipe' else 1
+
+    @contextmanager
+    def executor(self, max_tasks_per_child=1, probe_workers=1):
+        """Return a process pool laid out according to the jobs and solver thread settings.
+
+        Each worker gets settings.solver_threads threads for the simulator (and any multithreaded
+        math libraries). If probe_workers is above 1, each worker may also run that many probes at
+        once on its own pool (see init_worker), and gets room for each of them instead. See
+        job_layout for how many workers there are, and how they are pinned to CPUs.
+        """
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+               else list(range(os.cpu_count()))
+        threads = self.settings.solver_threads
+        (jobs, cpu_sets) = job_layout(cpus, threads * probe_workers, self.settings.jobs,
+                                      self.settings.cpu_affinity and hasattr(os, 'sched_setaffinity'))
+
+        # Thread counts are read when libraries load, so they must be in the environment that the
+        # simulators launched by workers start with. Libraries this process has already loaded
+        # (such as numpy's BLAS) ignore them, so workers also limit those in pin_worker.
+        thread_variables = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+        saved_environment = {var: os.environ.get(var) for var in thread_variables}
+        os.environ.update({var: str(threads) for var in thread_variables})
+        try:
+            with tempfile.TemporaryDirectory(prefix='charlib-cpus-') as slot_dir:
+                with ProcessPoolExecutor(max_workers=jobs, max_tasks_per_child=max_tasks_per_child,
+                                         initializer=init_worker,
+                                         initargs=(slot_dir, cpu_sets, threads, probe_workers)) as executor:
+                    yield executor
+        finally:
+            for var, value in saved_environment.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+
+def unique_tasks(tasks) -> list:
+    """Return tasks in order, leaving out repeats of earlier tasks.
+
+    Tasks are repeats if they call the same callable with the same arguments: the same objects
+    (such as cells and settings), or equal values (such as paths and state maps).
+    """
+    seen = set()
+    unique = []
+    for task in tasks:
+        key = json.dumps(list(task), sort_keys=True, default=id)
+        if key not in seen:
+            seen.add(key)
+            unique.append(task)
+    return unique
+
+
+def job_layout(cpus, cpus_per_job, jobs=None, pin=False):
+    """Return the number of parallel jobs and the CPU sets to pin them to.
+
+    If jobs is not set, there are as many jobs as fit on cpus with cpus_per_job each. If pin is set,
+    there is one CPU set of cpus_per_job CPUs for each job that fits, and otherwise none.
+    """
+    jobs = jobs or max(1, len(cpus) // cpus_per_job)
+    cpu_sets = []
+    if pin:
+        cpu_sets = [cpus[i:i+cpus_per_job] for i in range(0, len(cpus) - cpus_per_job + 1, cpus_per_job)][:jobs]
+    return (jobs, cpu_sets)
+
+
+def init_worker(slot_dir, cpu_sets, threads=None, probe_workers=1):
+    """Set up a worker process as it starts: pin it (see pin_worker), and if probe_workers is
+    above 1, start its pool for running that many probes at once (see utils.probe_map).
+
+    The probe pool is started after pinning, so that its processes share the worker's CPU set, and
+    is shut down when the worker exits.
+    """
+    pin_worker(slot_dir, cpu_sets, threads)
+    if probe_workers > 1:
+        utils.start_probe_pool(probe_workers)
+
+
+_cpu_slot = None
+
+def pin_worker(slot_dir, cpu_sets, threads=None):
+    """Pin the current worker process to the first CPU set not claimed by another worker.
+
+    Claims are held as file locks in slot_dir for the lifetime of the worker, so CPU sets are
+    released automatically when workers are replaced. If every set is claimed, the worker is left
+    unpinned. If threads is given and threadpoolctl is installed, the thread pools of native
+    libraries already loaded in the worker (such as numpy's BLAS) are limited to that many threads.
+    """
+    global _cpu_slot
+    if threads is not None:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            pass
+        else:
+            threadpool_limits(limits=threads)
+    if not cpu_sets:
+        return
+    # CPU sets are only given where affinity is supported, which excludes Windows (and fcntl)
+    import fcntl
+    for (i, cpus) in enumerate(cpu_sets):
+        slot = open(Path(slot_dir) / f'{i}.lock', 'w')
+        try:
+            fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot.close()
+            continue
+        _cpu_slot = slot
+        os.sched_setaffinity(0, cpus)
+        return
+
+
 class CharacterizationSettings:
     """Container for characterization settings"""
     def __init__(self, **kwargs):
         """Create a new CharacterizationSettings instance"""
         # Behavioral settings
         self.jobs = None if kwargs.pop('multithreaded', True) else 1
+        self.solver_threads = kwargs.pop('solver_threads', 1)
+        self.cpu_affinity = kwargs.pop('cpu_affinity', False)
         self.results_dir = Path(kwargs.pop('results_dir', 'results'))
         self.plots_dir = self.results_dir / 'plots'
         self.debug = kwargs.pop('debug', False)
         self.debug_dir = Path(kwargs.pop('debug_dir', 'debug'))
+        self.cache = kwargs.pop('cache', True)
+        cache_dir = kwargs.pop('cache_dir', None)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
         self.quiet = kwargs.pop('quiet', False)
         self.dry_run = kwargs.pop('dry_run', False)
         self.omit_on_failure = kwargs.get('omit_on_failure', False)
@@ -188,6 +468,13 @@ class SimulationSettings:
     """Container for simulation backend and procedures"""
     def __init__(self, **kwargs):
         self.backend = kwargs.get('backend', 'ngspice-shared')
+        self.options = SolverOptions(**kwargs.get('options', {}))
+        self.two_pass = kwargs.get('two_pass', False)
+        self.calibrate_timestep = kwargs.get('calibrate_timestep', False)
+        self.quality_control = kwargs.get('quality_control', False)
+        self.outlier_tolerance = kwargs.get('outlier_tolerance', 0.1)
+        self.constraint_search_parallelism = kwargs.get('constraint_search_parallelism', 1)
+        self.timestep_tolerance = kwargs.get('timestep_tolerance', 0.01)
         self.input_capacitance = registered_procedures[
             kwargs.get('input_capacitance_procedure', 'ac_sweep')
         ]['callable']
@@ -213,6 +500,45 @@ class SimulationSettings:
             kwargs.get('min_pulse_width_constraint_procedure', 'min_pulse_width_constraint')
         ]['callable']
 
+class SolverOptions:
+    """Container for simulator solver options, which override each procedure's defaults"""
+    def __init__(self, **kwargs):
+        self.method = kwargs.get('method')
+        self.reltol = kwargs.get('reltol')
+        self.trtol = kwargs.get('trtol')
+        self.timestep_divisor = kwargs.get('timestep_divisor')
+        self.klu = kwargs.get('klu', False)
+
+    def as_dict(self) -> dict:
+        """Return the options that have been set, in the same format as the settings YAML"""
+        options = {'method': self.method, 'reltol': self.reltol, 'trtol': self.trtol,
+                   'timestep_divisor': self.timestep_divisor, 'klu': self.klu}
+        return {key: value for key, value in options.items() if value is not None}
+
+    def apply(self, simulation, *flags, **defaults):
+        """Set options on a PySpice simulation, replacing defaults with any options set here"""
+        overrides = {'method': self.method, 'reltol': self.reltol, 'trtol': self.trtol}
+        options = defaults | {key: value for key, value in overrides.items() if value is not None}
+        simulation.options(*flags, *(['klu'] if self.klu else []), **options)
+
+    def coarse(self):
+        """Return relaxed options for the first pass of two-pass characterization"""
+        return SolverOptions(method=self.method, reltol=max(self.reltol or 0, 1e-2), trtol=7,
+                             timestep_divisor=2, klu=self.klu)
+
+    def tight(self):
+        """Return tightened options for re-simulating suspicious results"""
+        return SolverOptions(method='gear', reltol=min(self.reltol or 1e-3, 1e-4), trtol=1,
+                             timestep_divisor=2*(self.timestep_divisor or 8), klu=self.klu)
+
+    def step_time(self, t_slew, default_divisor, timestep=None):
+        """Return the transient step time for a test bench whose fastest transition is t_slew.
+
+        A fixed timestep (such as a cell's calibrated timestep) takes precedence if given."""
+        if timestep is not None:
+            return timestep
+        return t_slew / (self.timestep_divisor or default_divisor)
+
 class LogicThresholds:
     """Container for logic_thresholds settings"""
     def __init__(self, **kwargs):
@@ -0,0 +1,95 @@
+"""Fast SPICE deck generation for test benches"""
+
+import functools
+import os
+from pathlib import Path
+
+import PySpice
+from PySpice.Unit import as_s, as_V
+
+
+def _str_spice(value) -> str:
+    """Format a value the same way PySpice does when writing element parameters"""
+    return value.str_spice() if hasattr(value, 'str_spice') else str(value)
+
+
+@functools.lru_cache
+def _static_lines(cell_netlist: str, models: tuple, supplies: tuple) -> tuple:
+    """Return the include, lib and supply lines shared by every test bench for a cell.
+
+    Paths are resolved the same way PySpice resolves them, but only once per worker.
+    """
+    includes = [cell_netlist] + [filename for (filename, *libname) in models if not libname]
+    libs = [(filename, *libname) for (filename, *libname) in models if libname]
+    lines = [f'.include {Path(path).resolve()}' for path in includes]
+    lines += [' '.join([f'.lib {Path(filename).resolve()}', *libname]) for (filename, *libname) in libs]
+    lines += [f'V{subscript} {name} 0 {voltage}' for (subscript, name, voltage) in supplies]
+    return tuple(lines)
+
+
+class Deck:
+    """A lightweight replacement for PySpice.Circuit when building test benches.
+
+    Deck supports the subset of the PySpice Circuit API that CharLib procedures use (V, I, R, C,
+    PieceWiseLinearVoltageSource and X), but formats each element directly to text instead of
+    constructing element objects. Static sections shared by every test bench for a cell (includes,
+    libs and supplies) are formatted once per worker and reused.
+
+    Use to_circuit to obtain a PySpice Circuit for simulation. Its netlist is identical to the one
+    PySpice emits when the same elements are added to a circuit built with utils.init_circuit,
+    provided subcircuit instances are added last (as all CharLib test benches do).
+    """
+
+    gnd = 0
+
+    def __init__(self, title, cell_netlist, models, supplies, units):
+        """Create a new deck with the cell netlist, models and supplies already set up.
+
+        Takes the same arguments as utils.init_circuit.
+        """
+        self.title = title
+        supplies = tuple((supply.subscript, supply.name, _str_spice(supply.voltage*units.voltage))
+                         for supply in supplies if supply.name.upper() not in ['GND', '0'])
+        self.lines = list(_static_lines(str(cell_netlist), tuple(tuple(m) for m in models), supplies))
+        self.instances = []
+
+    def _element(self, prefix, name, *fields):
+        self.lines.append(' '.join([f'{prefix}{name}', *[_str_spice(field) for field in fields]]))
+
+    def V(self, name, positive_node, negative_node, value):
+        """Add a DC voltage source"""
+        self._element('V', name, positive_node, negative_node, value)
+
+    def I(self, name, positive_node, negative_node, value):
+        """Add a current source"""
+        self._element('I', name, positive_node, negative_node, value)
+
+    def R(self, name, positive_node, negative_node, value):
+        """Add a resistor"""
+        self._element('R', name, positive_node, negative_node, value)
+
+    def C(self, name, positive_node, negative_node, value):
+        """Add a capacitor"""
+        self._element('C', name, positive_node, negative_node, value)
+
+    def PieceWiseLinearVoltageSource(self, name, positive_node, negative_node, values):
+        """Add a piecewise linear voltage source from a list of (time, voltage) pairs"""
+        points = ' '.join(f'{_str_spice(as_s(t))} {_str_spice(as_V(v))}' for (t, v) in values)
+        self._element('V', name, positive_node, negative_node, f'PWL({points})')
+
+    def X(self, name, subcircuit_name, *nodes):
+        """Add a subcircuit instance"""
+        self.instances.append((name, subcircuit_name, *nodes))
+
+    def __str__(self):
+        lines = [f'.title {self.title}', *self.lines]
+        lines += [' '.join([f'X{name}', *map(str, nodes), subckt]) for (name, subckt, *nodes) in self.instances]
+        return os.linesep.join(lines) + os.linesep
+
+    def to_circuit(self):
+        """Return a PySpice Circuit containing this deck"""
+        circuit = PySpice.Circuit(self.title)
+        circuit.raw_spice = os.linesep.join(self.lines)
+        for instance in self.instances:
+            circuit.X(*instance)
+        return circuit
@@ -0,0 +1,38 @@
+"""Group cells into drive-strength families, such as DFF_X1, DFF_X2 and DFF_X4"""
+
+import re
+
+# Drive strength suffixes, e.g. the '_X2' in 'DFF_X2', 'X4' in 'INVX4' or '_1' in 'dfxtp_1'
+DRIVE_STRENGTH_SUFFIX = re.compile(r'(_X?|X)\d+$', re.IGNORECASE)
+
+
+def family_name(cell, config) -> str:
+    """Return the name of a cell's family: config.family if set, otherwise the cell name without
+    its drive strength suffix"""
+    return config.family or DRIVE_STRENGTH_SUFFIX.sub('', cell.name)
+
+
+def family_id(cell, config) -> tuple:
+    """Return a key identifying a cell's family.
+
+    Cells are in the same family if they share a family name and implement the same functions, so
+    that e.g. NAND2_X1 and a differently-wired NAND2_X2 are never treated as siblings.
+    """
+    functions = sorted((output, function.expression, str(function.state))
+                       for (output, function) in cell.functions.items())
+    return (family_name(cell, config), tuple(functions))
+
+
+def leaders_and_siblings(cells) -> tuple:
+    """Split (cell, config) pairs into the first member of each family (its leader) and the rest.
+
+    The Characterizer characterizes every leader before any of their siblings start, so that the
+    results leaders share with their family are complete before siblings read them.
+    """
+    seen = set()
+    (leaders, siblings) = ([], [])
+    for (cell, config) in cells:
+        key = family_id(cell, config)
+        (siblings if key in seen else leaders).append((cell, config))
+        seen.add(key)
+    return (leaders, siblings)
@@ -0,0 +1,140 @@
+"""Vectorized waveform measurements
+
+Each function takes a time (or other sweep) vector and one or more signals, and measures every
+signal at once. Signals are arrays whose last axis runs over time: a single waveform is a 1-D array,
+and a batch of waveforms (e.g. the same node from several analyses) is a 2-D array with one waveform
+per row. Time may be shared by all signals or given per row. Thresholds and time limits may be
+scalars or arrays with one value per signal.
+
+Crossing times are linearly interpolated between simulation points, as ngspice's .meas does.
+Measurements which cannot be made (e.g. because a signal never crosses a threshold) are NaN.
+"""
+
+import numpy as np
+
+
+def stack(vectors) -> np.ndarray:
+    """Stack 1-D vectors of different lengths into a 2-D array with one vector per row.
+
+    Shorter vectors are padded by repeating their last value. Padding a time vector this way adds
+    zero-length steps, during which no signal crosses any threshold or accumulates any charge, so
+    waveforms from analyses with different timesteps can be measured together in one batch.
+    """
+    vectors = [np.asarray(vector) for vector in vectors]
+    padded = np.empty((len(vectors), max(len(vector) for vector in vectors)),
+                      dtype=np.result_type(*vectors))
+    for row, vector in zip(padded, vectors):
+        row[:len(vector)] = vector
+        row[len(vector):] = vector[-1]
+    return padded
+
+
+def _broadcast(time, values):
+    time, values = np.broadcast_arrays(np.asarray(time, dtype=float), np.asarray(values, dtype=float))
+    return (time, values)
+
+
+def _per_signal(value, shape) -> np.ndarray:
+    """Broadcast a scalar or per-signal value against the time axis of a batch of signals"""
+    return np.broadcast_to(np.asarray(value, dtype=float), shape)[..., np.newaxis]
+
+
+def crossings(time, values, threshold, direction='cross', occurrence=1, after=None) -> np.ndarray:
+    """Return the time at which each signal crosses a threshold.
+
+    :param time: The time vector, shared by all signals or with one row per signal.
+    :param values: The signal or signals to measure.
+    :param threshold: The threshold value for all signals, or one threshold per signal.
+    :param direction: Which crossings to count: 'rise', 'fall' or 'cross' (either direction).
+    :param occurrence: Which crossing to measure, counting from 1. Negative values count back from
+                       the last crossing, so -1 measures the final crossing.
+    :param after: Only count crossings during timesteps which end after this time.
+    :return: The interpolated crossing time of each signal, or NaN where there is no such crossing.
+    """
+    (time, values) = _broadcast(time, values)
+    batch_shape = values.shape[:-1]
+    threshold = _per_signal(threshold, batch_shape)
+    if values.shape[-1] < 2:
+        return np.full(batch_shape, np.nan)[()]
+
+    above = values > threshold
+    rising = ~above[..., :-1] & above[..., 1:]
+    falling = above[..., :-1] & ~above[..., 1:]
+    edges = {'rise': rising, 'fall': falling, 'cross': rising | falling}[direction]
+    if after is not None:
+        edges = edges & (time[..., 1:] > _per_signal(after, batch_shape))
+
+    # Find the timestep containing the requested crossing
+    counts = np.cumsum(edges, axis=-1)
+    total = counts[..., -1]
+    n = np.broadcast_to(occurrence if occurrence > 0 else total + 1 + occurrence, batch_shape)
+    found = (n >= 1) & (n <= total)
+    step = np.where(found, np.argmax(counts >= n[..., np.newaxis], axis=-1), 0)[..., np.newaxis]
+
+    # Interpolate within that timestep
+    (t0, t1) = (np.take_along_axis(time, step, -1), np.take_along_axis(time, step + 1, -1))
+    (v0, v1) = (np.take_along_axis(values, step, -1), np.take_along_axis(values, step + 1, -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = t0 + (threshold - v0) * (t1 - t0) / (v1 - v0)
+    return np.where(found, t[..., 0], np.nan)[()]
+
+
+def delay(time, trig, trig_threshold, targ, targ_threshold, trig_direction='cross',
+          targ_direction='cross', occurrence=1, after=None) -> np.ndarray:
+    """Return the delay from trig crossing its threshold to targ crossing its threshold.
+
+    Equivalent to a ``.meas tran ... trig ... targ ...`` statement. Both crossings are found as
+    described in crossings, using the same occurrence and after for both.
+    """
+    t_trig = crossings(time, trig, trig_threshold, trig_direction, occurrence, after)
+    t_targ = crossings(time, targ, targ_threshold, targ_direction, occurrence, after)
+    return t_targ - t_trig
+
+
+def transition(time, values, start_threshold, end_threshold, occurrence=1, after=None) -> np.ndarray:
+    """Return the time each signal takes to transition from start_threshold to end_threshold.
+
+    The transition is rising if start_threshold is below end_threshold, and falling otherwise. For
+    example, the 20%-80% rise time of a 1 V signal is transition(time, values, 0.2, 0.8).
+    """
+    direction = 'rise' if np.all(np.asarray(start_threshold) < np.asarray(end_threshold)) else 'fall'
+    t_start = crossings(time, values, start_threshold, direction, occurrence, after)
+    t_end = crossings(time, values, end_threshold, direction, occurrence, after)
+    return t_end - t_start
+
+
+def integral(time, values, start=None, end=None) -> np.ndarray:
+    """Return the trapezoidal integral of each signal from start to end.
+
+    Equivalent to a ``.meas tran ... integ ... from=start to=end`` statement. The signal is
+    linearly interpolated at the limits, which default to the first and last time points.
+    Integrating a branch current gives the charge through that branch.
+    """
+    (time, values) = _broadcast(time, values)
+    batch_shape = values.shape[:-1]
+    dt = np.diff(time, axis=-1)
+    cumulative = np.concatenate([np.zeros(batch_shape + (1,)),
+                                 np.cumsum(dt * (values[..., :-1] + values[..., 1:]) / 2, axis=-1)],
+                                axis=-1)
+
+    def integral_to(limit):
+        """Integrate from the first time point to limit"""
+        limit = _per_signal(limit, batch_shape)
+        step = np.clip(np.sum(time <= limit, axis=-1, keepdims=True) - 1, 0, time.shape[-1] - 2)
+        (t0, t1) = (np.take_along_axis(time, step, -1), np.take_along_axis(time, step + 1, -1))
+        (v0, v1) = (np.take_along_axis(values, step, -1), np.take_along_axis(values, step + 1, -1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v_limit = np.where(t1 > t0, v0 + (v1 - v0) * (limit - t0) / (t1 - t0), v0)
+        return (np.take_along_axis(cumulative, step, -1) + (limit - t0) * (v0 + v_limit) / 2)[..., 0]
+
+    q_start = integral_to(time[..., 0] if start is None else start)
+    q_end = integral_to(time[..., -1] if end is None else end)
+    return (q_end - q_start)[()]
+
+
+def slope(x, y) -> np.ndarray:
+    """Return the least-squares slope of each signal y against x"""
+    (x, y) = _broadcast(x, y)
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    return (np.sum(x * y, axis=-1) / np.sum(x * x, axis=-1))[()]
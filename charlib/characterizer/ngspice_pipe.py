@@ -0,0 +1,213 @@
+"""Run simulations in persistent ngspice processes driven over a pipe"""
+
+import atexit
+import os
+import re
+import select
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import PySpice
+
+from charlib.characterizer.rawfile import RawFile
+
+
+class NgSpicePipeError(Exception):
+    """Indicates that ngspice failed to load or simulate a deck, or exited unexpectedly."""
+    pass
+
+
+class PipeAnalysis:
+    """Simulation results in the same shape as a PySpice analysis.
+
+    Provides the attributes CharLib procedures use: measurements, nodes, branches, time or
+    frequency, and node lookup by item (analysis['vout']) or attribute (analysis.vin).
+    """
+
+    def __init__(self, vectors, measurements: dict):
+        self.measurements = measurements
+        self.nodes = {}
+        self.branches = {}
+        self._sweeps = {}
+        for name, values in vectors.items():
+            if name in ('time', 'frequency'):
+                self._sweeps[name] = values
+            elif name.endswith('#branch'):
+                self.branches[name.removesuffix('#branch')] = values
+            else:
+                self.nodes[name] = values
+
+    def __getitem__(self, name):
+        return self.nodes[name.lower()]
+
+    def __getattr__(self, name):
+        for vectors in (self.__dict__.get('_sweeps', {}), self.__dict__.get('nodes', {})):
+            if name.lower() in vectors:
+                return vectors[name.lower()]
+        raise AttributeError(name)
+
+
+def parse_measurements(deck: str, output: list) -> dict:
+    """Return the results of a deck's .meas statements from ngspice's output.
+
+    Results are printed as "name = value ...". Only names measured in the deck are returned, and
+    failed measurements are omitted.
+
+    :param deck: The simulated SPICE deck.
+    :param output: The lines ngspice printed while running it.
+    """
+    names = {name.lower() for name in
+             re.findall(r'^\s*\.meas\w*\s+\w+\s+(\S+)', deck, re.IGNORECASE | re.MULTILINE)}
+    measurements = {}
+    for line in output:
+        if (match := re.match(r'^\s*(\S+)\s*=\s*([-+]?[\d.]+(?:e[-+]?\d+)?)(\s|$)', line, re.IGNORECASE)):
+            if match.group(1).lower() in names:
+                measurements[match.group(1).lower()] = float(match.group(2))
+    return measurements
+
+
+def _tmpfs():
+    """Return a memory-backed directory for scratch files if one is available"""
+    shm = Path('/dev/shm')
+    return shm if shm.is_dir() else None
+
+
+class NgSpiceProcess:
+    """A long-lived interactive ngspice process (``ngspice -p``).
+
+    Decks are written to a private scratch directory (on tmpfs where available), loaded with
+    ``source`` and run. Measurements are parsed from the ngspice output and vectors are memory-mapped
+    from a binary raw file written into the scratch directory. If ngspice exits, stops responding
+    for longer than timeout seconds (e.g. on a convergence stall or an interactive prompt) or a deck
+    fails to simulate, the process is discarded and a fresh one is started for the next deck.
+    """
+
+    COMMAND = 'ngspice'
+    SENTINEL = '__charlib_ngspice_ready__'
+    FATAL_MESSAGES = ('simulation(s) aborted', 'error on line', 'circuit not parsed')
+
+    def __init__(self, timeout=600):
+        self.scratch_dir = Path(tempfile.mkdtemp(prefix='charlib-ngspice-', dir=_tmpfs()))
+        self.timeout = timeout
+        self.process = None
+        self._pending = b''
+        atexit.register(self.close)
+
+    def _start(self):
+        # Line-buffer ngspice's output so that command results arrive as soon as they are printed
+        command = [self.COMMAND, '-p']
+        if shutil.which('stdbuf'):
+            command = ['stdbuf', '-oL', *command]
+        self.process = subprocess.Popen(command, cwd=self.scratch_dir, bufsize=0,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT)
+        self._pending = b''
+        self._command('set filetype=binary', 'set nomoremode')
+
+    def _command(self, *commands) -> list:
+        """Send commands to ngspice and return the output lines they produce.
+
+        Output is read directly from the pipe with select, so that a deadline can be kept: if
+        ngspice does not finish within self.timeout seconds, it is killed.
+        """
+        for command in [*commands, f'echo {self.SENTINEL}']:
+            self.process.stdin.write(f'{command}\n'.encode('utf-8'))
+        self.process.stdin.flush()
+        deadline = time.monotonic() + self.timeout
+        stdout = self.process.stdout.fileno()
+        output = []
+        while True:
+            while b'\n' in self._pending:
+                (line, self._pending) = self._pending.split(b'\n', 1)
+                line = line.decode('utf-8', errors='replace').rstrip()
+                if line.strip() == self.SENTINEL:
+                    return output
+                output.append(line)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([stdout], [], [], remaining)[0]:
+                self.kill()
+                raise NgSpicePipeError(f'ngspice did not respond within {self.timeout} s:\n'
+                                       + '\n'.join(output))
+            chunk = os.read(stdout, 65536)
+            if not chunk:
+                raise NgSpicePipeError('ngspice exited unexpectedly:\n' + '\n'.join(output))
+            self._pending += chunk
+
+    def run(self, deck: str) -> PipeAnalysis:
+        """Simulate a complete SPICE deck and return its results"""
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        deck_path = self.scratch_dir / 'deck.sp'
+        raw_path = self.scratch_dir / 'result.raw'
+        raw_path.unlink(missing_ok=True)
+        deck_path.write_text(deck if deck.rstrip().lower().endswith('.end') else f'{deck}\n.end\n',
+                             encoding='utf-8')
+
+        try:
+            output = self._command(f'source {deck_path}', 'run', f'write {raw_path}')
+            self._command('remcirc', 'destroy all')
+        except (OSError, NgSpicePipeError):
+            self.close(remove_scratch=False)
+            raise
+
+        errors = [line for line in output if any(m in line.lower() for m in self.FATAL_MESSAGES)]
+        if errors or not raw_path.exists():
+            raise NgSpicePipeError('ngspice failed to simulate deck:\n' + '\n'.join(errors or output))
+
+        return PipeAnalysis(RawFile(raw_path).plots[0], parse_measurements(deck, output))
+
+    def kill(self):
+        """Kill the ngspice process without waiting for it to finish its current command"""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            for pipe in [self.process.stdin, self.process.stdout]:
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+            self.process = None
+
+    def close(self, remove_scratch=True):
+        """Stop the ngspice process, and optionally remove the scratch directory"""
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self.kill()
+        if remove_scratch:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+
+_process = None
+
+def ngspice_process() -> NgSpiceProcess:
+    """Return this worker's ngspice process, creating it if necessary"""
+    global _process
+    if _process is None:
+        _process = NgSpiceProcess()
+    return _process
+
+
+class PipeSimulator:
+    """Simulator for the ngspice-pipe backend.
+
+    Simulations are set up exactly as with the ngspice-subprocess backend, but each run is sent
+    to this worker's persistent ngspice process instead of launching a new ngspice binary.
+    """
+
+    def __init__(self):
+        self._simulator = PySpice.Simulator.factory(simulator='ngspice-subprocess')
+
+    def simulation(self, circuit, **kwargs):
+        """Create a simulation for circuit. Takes the same arguments as PySpice simulators."""
+        return self._simulator.simulation(circuit, **kwargs)
+
+    def run(self, simulation) -> PipeAnalysis:
+        """Run a simulation and return the results"""
+        return ngspice_process().run(str(simulation))
@@ -0,0 +1,70 @@
+"""Run simulations in the shared ngspice library without copying their results"""
+
+import numpy as np
+
+import PySpice
+
+from charlib.characterizer.ngspice_pipe import PipeAnalysis, parse_measurements
+from charlib.characterizer.rawfile import vector_name
+
+
+class NgSpiceSharedError(Exception):
+    """Indicates that the shared ngspice library failed to simulate a deck."""
+    pass
+
+
+def vector_view(ngspice, name: str) -> np.ndarray:
+    """Return a read-only numpy view of an ngspice vector, without copying it.
+
+    :param ngspice: A PySpice NgSpiceShared instance.
+    :param name: The vector name, qualified by its plot (e.g. 'tran1.vout').
+    """
+    # Imported here so that other backends don't require the ngspice shared library
+    from PySpice.Spice.NgSpice.Shared import ffi
+
+    info = ngspice._ngspice_shared.ngGet_Vec_Info(name.encode('utf8'))
+    if info == ffi.NULL:
+        raise KeyError(name)
+    if info.v_length == 0:
+        view = np.empty(0)
+    elif info.v_compdata == ffi.NULL:
+        view = np.frombuffer(ffi.buffer(info.v_realdata, info.v_length*8), dtype=np.float64)
+    else:
+        # ngcomplex_t is a pair of doubles, which has the same layout as complex128
+        view = np.frombuffer(ffi.buffer(info.v_compdata, info.v_length*16), dtype=np.complex128)
+    view.flags.writeable = False
+    return view
+
+
+class SharedSimulator:
+    """Simulator for the ngspice-shared backend.
+
+    Simulations are set up exactly as with PySpice's ngspice-shared simulator, and run in the ngspice
+    library loaded into this process. Instead of copying every vector into a PySpice analysis, run
+    returns each vector as a read-only numpy view of ngspice's own memory.
+
+    ngspice frees these vectors when the next simulation starts (in any SharedSimulator, as they all
+    share one library), so views must not be kept past it. Copy any vector that needs to outlive the
+    next simulation.
+    """
+
+    def __init__(self):
+        self._simulator = PySpice.Simulator.factory(simulator='ngspice-shared')
+
+    def simulation(self, circuit, **kwargs):
+        """Create a simulation for circuit. Takes the same arguments as PySpice simulators."""
+        return self._simulator.simulation(circuit, **kwargs)
+
+    def run(self, simulation) -> PipeAnalysis:
+        """Run a simulation and return the results"""
+        ngspice = self._simulator.ngspice
+        deck = str(simulation)
+        ngspice.destroy()
+        ngspice.load_circuit(deck)
+        output = ngspice.exec_command('run', join_lines=False)
+        plot = ngspice.last_plot
+        if plot == 'const':
+            raise NgSpiceSharedError('ngspice failed to simulate deck:\n' + '\n'.join(output))
+        names = ngspice._convert_string_array(ngspice._ngspice_shared.ngSpice_AllVecs(plot.encode('utf8')))
+        vectors = {vector_name(name): vector_view(ngspice, f'{plot}.{name}') for name in names}
+        return PipeAnalysis(vectors, parse_measurements(deck, output))
@@ -0,0 +1,71 @@
+"""Detect suspicious entries in characterized lookup tables"""
+
+import numpy as np
+
+
+def _index_values(table, flagged) -> list:
+    """Return the index values of each flagged table entry"""
+    return [tuple(float(index[i]) for index, i in zip(table.index_values, indices))
+            for indices in np.argwhere(flagged)]
+
+
+def _nonmonotonic(values) -> np.ndarray:
+    """Flag values which are a local minimum or maximum along any axis"""
+    flagged = np.zeros(values.shape, dtype=bool)
+    for axis in range(values.ndim):
+        steps = np.diff(np.moveaxis(values, axis, 0), axis=0)
+        np.moveaxis(flagged, axis, 0)[1:-1] |= steps[:-1] * steps[1:] < 0
+    return flagged
+
+
+def _rough(table, tolerance, invalid) -> np.ndarray:
+    """Flag values which deviate from a smooth quadratic surface fit through the table.
+
+    Each entry is compared against a fit through all the other entries (using leave-one-out
+    residuals), so an outlier on the edge of the table cannot pull the fit towards itself. The fit
+    is repeated without the worst entry until every remaining entry is within tolerance (relative
+    to the largest fitted value). Invalid entries are left out of the fit and are not flagged here.
+    Tables with too few entries to constrain the fit are not checked.
+    """
+    # Quadratic terms in each variable plus their pairwise products, over normalized indices
+    grids = np.meshgrid(*[(index - index.min()) / (np.ptp(index) or 1) for index in table.index_values],
+                        indexing='ij')
+    grids = [grid for (grid, index) in zip(grids, table.index_values) if np.ptp(index)]
+    terms = [np.ones(table.values.shape), *grids, *[grid**2 for grid in grids]]
+    terms += [grids[i] * grids[j] for i in range(len(grids)) for j in range(i + 1, len(grids))]
+    basis = np.stack([term.flatten() for term in terms], axis=-1)
+    values = table.values.flatten()
+
+    flagged = invalid.flatten()
+    while np.count_nonzero(~flagged) > basis.shape[1]:
+        (q, _) = np.linalg.qr(basis[~flagged])
+        fit = q @ (q.T @ values[~flagged])
+        leverage = np.minimum(np.sum(q**2, axis=1), 1 - 1e-9)
+        scale = max(np.max(np.abs(fit)), np.finfo(float).tiny)
+        residuals = np.zeros(len(values))
+        residuals[~flagged] = np.abs(values[~flagged] - fit) / (1 - leverage) / scale
+        worst = np.argmax(residuals)
+        if residuals[worst] <= tolerance:
+            break
+        flagged[worst] = True
+    else:
+        return np.zeros(table.values.shape, dtype=bool)
+    return flagged.reshape(table.values.shape) & ~invalid
+
+
+def nonmonotonic_entries(table) -> list:
+    """Return the index values of each lookup table entry which is a local minimum or maximum
+    along any of the table's variables"""
+    return _index_values(table, _nonmonotonic(table.values))
+
+
+def outlier_entries(table, tolerance=0.1) -> list:
+    """Return the index values of each lookup table entry which looks wrong.
+
+    An entry is an outlier if it is NaN or negative, if it is a local minimum or maximum along any
+    of the table's variables, or if it deviates from a smooth fit through the rest of the table by
+    more than tolerance (relative to the largest value in the fit).
+    """
+    invalid = ~np.isfinite(table.values) | (table.values < 0)
+    flagged = invalid | _nonmonotonic(table.values) | _rough(table, tolerance, invalid)
+    return _index_values(table, flagged)
@@ -25,6 +25,20 @@ def register(*parameters):
         return procedure
     return decorator_with_args
 
+preparation_tasks = set()
+
+def preparation(task):
+    """
+    Decorator to mark a task callable (as yielded by a procedure) as a preparation task.
+
+    The Characterizer runs all preparation tasks for a set of cells, and waits for them to finish,
+    before it starts any other tasks for those cells. Use this for tasks whose results other tasks
+    read from the cache (such as DC operating points), so that every task sees the same cached
+    results no matter how tasks are scheduled.
+    """
+    preparation_tasks.add(task)
+    return task
+
 class ProcedureFailedException(Exception):
     """Indicates that the procedure failed for the reason specified in the message."""
     pass
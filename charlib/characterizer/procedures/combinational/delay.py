@@ -1,28 +1,110 @@
 import PySpice
 import matplotlib.pyplot as plt
+import numpy as np
 from numpy import average
 
-from charlib.characterizer import utils, plots
+from charlib.characterizer import utils, plots, cache, deck, measure
 from charlib.characterizer.cell import Port
-from charlib.characterizer.procedures import register, ProcedureFailedException
+from charlib.characterizer.ngspice_pipe import PipeAnalysis
+from charlib.characterizer.procedures import register, preparation, ProcedureFailedException
 from charlib.liberty import liberty
 from charlib.liberty.library import LookupTable
 
 @register('data_slews', 'loads', 'transient_sim_end_time')
 def combinational_worst_case(cell, config, settings):
     """Measure worst-case combinational transient and propagation delays"""
-    for variation in config.variations('data_slews', 'loads', 'transient_sim_end_time'):
-        for path in cell.paths():
-            yield (measure_delays_for_path_with_criterion, cell, config, settings, variation, path, max)
+    yield from delay_tasks(cell, config, settings, max)
 
 @register('data_slews', 'loads', 'transient_sim_end_time')
 def combinational_average(cell, config, settings):
     """Measure combinational transient and propagation delays using a uniform average"""
-    for variation in config.variations('data_slews', 'loads', 'transient_sim_end_time'):
+    yield from delay_tasks(cell, config, settings, average)
+
+def delay_tasks(cell, config, settings, criterion):
+    """Yield a delay task for each variation and path.
+
+    The variation with the smallest data slew and load is the reference variation. Its tasks are
+    preparation tasks (see measure_reference_delays), so their settling times are recorded before
+    the other variations start.
+    """
+    variations = list(config.variations('data_slews', 'loads', 'transient_sim_end_time'))
+    reference = min(variations, key=lambda variation: (variation['data_slews'], variation['loads']))
+    for variation in variations:
+        task = measure_reference_delays if variation is reference else measure_delays_for_path_with_criterion
         for path in cell.paths():
-            yield (measure_delays_for_path_with_criterion, cell, config, settings, variation, path, average)
+            yield (task, cell, config, settings, variation, path, criterion)
+
+# Transient end time parameters: the settling time assumed for an arc with no history (as a multiple
+# of the data slew), and the margin applied to estimates from history
+INITIAL_SETTLING_SLEWS = 20
+SETTLING_MARGIN = 2
+
+# In two-pass mode, coarse delays within this fraction of the worst case are repeated at full accuracy
+REFINE_MARGIN = 0.05
+
+def estimate_settling_time(history, data_slew, load):
+    """Estimate how long an arc's output takes to settle after its input starts slewing.
+
+    The settling time measured for the arc at the nearest slew and load (by log distance) is scaled
+    linearly by the ratio of the new slew or load to the old one, whichever is larger. Estimates
+    scale down as well as up, and a single slow measurement only affects its neighbors. Returns the
+    estimate in seconds, or None if there is no history.
+
+    :param history: A list of [data_slew, load, settling_time] entries in SI units.
+    """
+    estimates = []
+    for (h_slew, h_load, t_settle) in history:
+        ratios = [value / h_value for (value, h_value) in [(data_slew, h_slew), (load, h_load)]
+                  if value > 0 and h_value > 0]
+        distance = sum(abs(np.log(ratio)) for ratio in ratios)
+        estimates.append((distance, t_settle * max(ratios, default=1)))
+    return min(estimates, default=(None, None))[1]
+
+def measure_waveform(waveform, measurements):
+    """Measure every delay for one condition's waveforms.
+
+    :param waveform: A dict mapping 'time' and each measured node to its vector.
+    :param measurements: A dict mapping each measurement name to its (trig_node, trig_threshold,
+                         trig_direction, targ_node, targ_threshold, targ_direction).
+    :return: A dict mapping each measurement name to its delay in seconds. Failed measurements are
+             NaN.
+    """
+    return {name: float(measure.delay(waveform['time'], waveform[trig], v_trig, waveform[targ], v_targ,
+                                      trig_dir, targ_dir))
+            for name, (trig, v_trig, trig_dir, targ, v_targ, targ_dir) in measurements.items()}
+
+def conditions_near_worst_case(conditions, delays, margin=REFINE_MARGIN):
+    """Return the conditions which may be the worst case for any measurement.
+
+    For each measurement, the condition with the worst (largest) delay is returned, along with every
+    other condition whose delay is within margin of it.
+
+    :param conditions: A list of conditions.
+    :param delays: A dict mapping each measurement name to an array of delays, one per condition.
+    """
+    selected = np.zeros(len(conditions), dtype=bool)
+    for values in delays.values():
+        valid = ~np.isnan(values)
+        if not valid.any():
+            continue
+        worst = values[valid].max()
+        selected |= valid & (np.where(valid, values, -np.inf) >= worst - margin*abs(worst))
+    return [condition for condition, refine in zip(conditions, selected) if refine]
 
-def measure_delays_for_path_with_criterion(cell, config, settings, variation, path, criterion=max):
+@preparation
+def measure_reference_delays(cell, config, settings, variation, path, criterion=max):
+    """Measure delays for the reference variation of a path, and record how long its output took to
+    settle.
+
+    This is a preparation task, so every other variation of the path estimates its transient end
+    time from the same recorded settling time, however tasks are scheduled. Takes the same
+    arguments as measure_delays_for_path_with_criterion.
+    """
+    return measure_delays_for_path_with_criterion(cell, config, settings, variation, path, criterion,
+                                                  reference=True)
+
+def measure_delays_for_path_with_criterion(cell, config, settings, variation, path, criterion=max,
+                                           reference=False):
     """Given a particular path through the cell, find delays according to a selection criterion.
 
     This method tests all nonmasking conditions for the path through the cell from target_input to
@@ -35,6 +117,18 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
     at the time of writing this function, CharLib has no mechanism for accepting prior transition
     likelihood information.
 
+    The transient end time is estimated from the settling time recorded for this path by its
+    reference variation (see measure_reference_delays and estimate_settling_time). Conditions whose
+    output has not settled by then are simulated again with a doubled settling time, up to the
+    longest end time allowed by variation['transient_sim_end_time'] or 1000 times the data slew. If a cached DC operating point
+    is applied as the initial condition, the input slews after one timestep instead of waiting for
+    the circuit to settle.
+
+    If settings.simulation.two_pass is set and criterion is max, every condition is first simulated
+    with coarse solver options. The worst-case conditions, and any others whose coarse delays are
+    close to them (see conditions_near_worst_case), are then repeated at full accuracy, and only
+    these full-accuracy results are used in the tables.
+
     :param cell: A Cell object to test.
     :param config: A CellTestConfig object containing cell-specific test configuration details.
     :param settings: A CharacterizationSettings object containing library-wide configuration
@@ -45,27 +139,65 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
                  output_transtition] describing the path under test in the cell.
     :param criterion: A function which returns a single value given a list of numeric values.
                       Default max.
+    :param reference: Whether this is the reference variation, which records the settling time
+                      measured for the path. Default False.
     """
     # Set up key parameters
     [input_pin, _, output_pin, output_transition] = path
     data_slew = variation['data_slews'] * settings.units.time
     load = variation['loads'] * settings.units.capacitance
-    t_sim_end = max(variation['transient_sim_end_time'] * settings.units.time, 1000*data_slew)
     vdd = settings.primary_power.voltage * settings.units.voltage
     vss = settings.primary_ground.voltage * settings.units.voltage
 
-    # Measure delays for all nonmasking conditions
+    # Pick how long to simulate after the input slews from the settling time recorded by this arc's
+    # reference variation (or by the same arc of the family leader), bounded by the longest end time
+    # allowed. The reference variation itself only finds settling times for this arc recorded by
+    # earlier runs with the same cache_dir, as the one recorded in this run is still being measured.
+    t_full_slew = data_slew / (settings.logic_thresholds.high - settings.logic_thresholds.low)
+    t_sim_max = max(variation['transient_sim_end_time'] * settings.units.time, 1000*data_slew)
+    settling_times = cache.settling_times(settings, cache.settling_time_key(cell, config, settings, path))
+    family_settling_times = cache.settling_times(
+        settings, cache.family_settling_time_key(cell, config, settings, path))
+    # If this arc has no settling time (e.g. in the reference variation), fall back on the same arc
+    # of the family leader, which was characterized before any of its siblings started
+    t_settle = estimate_settling_time(settling_times.values() or family_settling_times.values(),
+                                      float(data_slew), float(load))
+    t_settle = INITIAL_SETTLING_SLEWS*data_slew if t_settle is None else SETTLING_MARGIN*t_settle @ PySpice.Unit.u_s
+
+    # Measure delays for all nonmasking conditions. Conditions whose output has not settled by the
+    # end of the transient are appended again with a longer settling time.
     analyses = {}
-    measurement_names = set()
-    for state_map in cell.nonmasking_conditions_for_path(*path):
+    results = {}
+    measurements_for_path = {}
+    t_settled = 0
+    windows = {}
+    refined = set()
+    two_pass = settings.simulation.two_pass and criterion is max and not settings.dry_run
+    conditions = [(state_map, t_settle, two_pass) for state_map in cell.nonmasking_conditions_for_path(*path)]
+    coarse_pending = len(conditions) if two_pass else 0
+    for (state_map, t_window, coarse) in conditions:
+        options = settings.simulation.options.coarse() if coarse else settings.simulation.options
+        pin_map = utils.PinStateMap(cell.inputs, cell.outputs, state_map)
+
+        # Start from the cached DC operating point for the initial input state, if available. The
+        # circuit is then settled from the start, so the input only waits one timestep to slew.
+        # Operating points are measured by leakage tasks, which run as preparation, so whether one
+        # is found does not depend on how tasks are scheduled.
+        input_states = {**pin_map.stable_inputs,
+                        **{name: state[0] for name, state in pin_map.target_inputs.items()}}
+        initial_conditions = cache.initial_conditions(
+            cell, config, settings, input_states,
+            {name: f'v{name}' for name in pin_map.target_outputs})
+        step_time = options.step_time(data_slew, 8, None if coarse else utils.cell_timestep(config, settings))
+        t_input = step_time if initial_conditions else 3*data_slew
+        t_sim_end = min(t_input + t_full_slew + t_window, t_sim_max)
+
         # Build the test circuit
-        circuit = utils.init_circuit('comb_delay', cell.netlist, config.models,
-                                     settings.named_nodes, settings.units)
+        circuit = deck.Deck('comb_delay', cell.netlist, config.models,
+                            settings.named_nodes, settings.units)
 
         # Initialize device under test and wire up pins
-        pin_map = utils.PinStateMap(cell.inputs, cell.outputs, state_map)
         connections = []
-        measurements = []
         for pin in cell.pins_in_netlist_order():
             match pin.role:
                 case Port.Role.LOGIC: # Digital logic inputs or outputs
@@ -75,7 +207,7 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
                         circuit.PieceWiseLinearVoltageSource(
                             pin.name,
                             f'v{pin.name}', circuit.gnd,
-                            values=utils.slew_pwl(v_0, v_1, data_slew, 3*data_slew,
+                            values=utils.slew_pwl(v_0, v_1, data_slew, t_input,
                                                   settings.logic_thresholds.low,
                                                   settings.logic_thresholds.high))
                     elif pin.name in pin_map.target_outputs:
@@ -99,17 +231,13 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
                                 threshold_tran_0 = settings.logic_thresholds.high
                                 threshold_tran_1 = settings.logic_thresholds.low
                             prop_name = f'cell_{out_direction}__{in_pin}_to_{pin.name}'.lower()
-                            measurement_names.add(prop_name)
-                            measurements.append((
-                                'tran', prop_name,
-                                f'trig v(v{in_pin}) val={float(vdd*threshold_prop_0)} {in_direction}=1',
-                                f'targ v(v{pin.name}) val={float(vdd*threshold_prop_1)} {out_direction}=1'))
+                            measurements_for_path[prop_name] = (
+                                f'v{in_pin}', float(vdd*threshold_prop_0), in_direction,
+                                f'v{pin.name}', float(vdd*threshold_prop_1), out_direction)
                             tran_name = f'{out_direction}_transition__{in_pin}_to_{pin.name}'.lower()
-                            measurement_names.add(tran_name)
-                            measurements.append((
-                                'tran', tran_name,
-                                f'trig v(v{pin.name}) val={float(vdd*threshold_tran_0)} {out_direction}=1',
-                                f'targ v(v{pin.name}) val={float(vdd*threshold_tran_1)} {out_direction}=1'))
+                            measurements_for_path[tran_name] = (
+                                f'v{pin.name}', float(vdd*threshold_tran_0), out_direction,
+                                f'v{pin.name}', float(vdd*threshold_tran_1), out_direction)
                     elif pin.name in pin_map.stable_inputs:
                         if pin_map.stable_inputs[pin.name] == '0':
                             connections.append(settings.primary_ground.name)
@@ -132,16 +260,17 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
         circuit.X('dut', cell.name, *connections)
 
         # Build the simulation
-        simulator = PySpice.Simulator.factory(simulator=settings.simulation.backend)
+        simulator = utils.get_simulator(settings.simulation.backend)
         simulation = simulator.simulation(
-            circuit,
+            circuit.to_circuit(),
             temperature=settings.temperature,
             nominal_temperature=settings.temperature
         )
-        simulation.options('autostop', trtol=1)
-        for measure in measurements:
-            simulation.measure(*measure, run=False)
-        simulation.transient(step_time=data_slew/8, end_time=t_sim_end, run=False)
+        options.apply(simulation, trtol=1)
+
+        if initial_conditions:
+            simulation.initial_condition(**initial_conditions)
+        simulation.transient(step_time=step_time, end_time=t_sim_end, run=False)
 
         stable_pins_map_str = ', '.join(['='.join([pin, state]) for pin, state in pin_map.stable_inputs.items()])
 
@@ -156,21 +285,68 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
             # TODO: Display a message if not settings.quiet
             continue
 
-        # Run the simulation, taking all measurements
+        # Run the simulation
         try:
-            analyses[stable_pins_map_str] = simulator.run(simulation)
+            analysis = simulator.run(simulation)
         except Exception as e:
             msg = f'Procedure measure_worst_case_delay_for_path failed for cell {cell.name} ' \
                   f'with variation {variation}, pin states {state_map}'
             raise ProcedureFailedException(msg) from e
 
+        # Measure every delay from the waveforms, and keep only the results
+        nodes = {node for (trig, _, _, targ, _, _) in measurements_for_path.values() for node in (trig, targ)}
+        waveform = {'time': np.asarray(analysis.time),
+                    **{node: np.asarray(analysis.nodes[node.lower()]) for node in nodes}}
+        results[stable_pins_map_str] = measure_waveform(waveform, measurements_for_path)
+
+        # Only keep the waveforms around if they are plotted. They are copied, as the
+        # ngspice-shared backend frees them on the next run.
+        if 'io' in config.plots:
+            analyses[stable_pins_map_str] = PipeAnalysis(
+                {name.lower(): np.array(values) for (name, values) in waveform.items()}, {})
+
+        # Check that every threshold was crossed before the transient ended
+        t_crossings = [measure.crossings(waveform['time'], waveform[node], threshold, direction)
+                       for (trig, v_trig, trig_dir, targ, v_targ, targ_dir) in measurements_for_path.values()
+                       for (node, threshold, direction) in [(trig, v_trig, trig_dir), (targ, v_targ, targ_dir)]]
+        windows[stable_pins_map_str] = (state_map, t_window)
+        if two_pass and not coarse:
+            refined.add(stable_pins_map_str)
+        if not np.isnan(t_crossings).any():
+            t_settled = max(t_settled, max(t_crossings) - float(t_input))
+        elif t_sim_end < t_sim_max:
+            conditions.append((state_map, 2*t_window, coarse))
+            coarse_pending += coarse
+
+        # Once every coarse simulation is done, repeat the worst cases at full accuracy
+        if coarse:
+            coarse_pending -= 1
+            if not coarse_pending:
+                keys = list(results)
+                refine = conditions_near_worst_case(
+                    keys, {name: np.array([results[key][name] for key in keys]) for name in measurements_for_path})
+                conditions += [(*windows[key], False) for key in refine]
+
+    # Record how long this arc took to settle for its other variations (and, if this cell leads its
+    # family, its siblings) to use
+    if reference and t_settled > 0:
+        for times in [settling_times] + ([family_settling_times] if config.family_leader else []):
+            times.put([float(data_slew), float(load)], [float(data_slew), float(load), t_settled])
+
+    # Collect the delays for all nonmasking conditions. In two-pass mode, coarse results only
+    # select the conditions to refine, so they are left out.
+    if two_pass:
+        results = {key: delays for (key, delays) in results.items() if key in refined}
+    measured = {name: [delays[name] for delays in results.values() if not np.isnan(delays[name])]
+                for name in measurements_for_path}
+
     # Select the worst-case delays and add to LUTs
     result = cell.liberty
     timing_group = liberty.Group('timing')
     timing_group.add_attribute('related_pin', input_pin)
     timing_type = 'combinational_rise' if output_transition == '01' else 'combinational_fall'
     timing_group.add_attribute('timing_type', timing_type)
-    for name in measurement_names:
+    for name in measurements_for_path:
         # Get the worst delay & plot io
         if 'io' in config.plots:
             fig = plots.plot_io_voltages(analyses.values(), list(pin_map.target_inputs.keys()),
@@ -185,9 +361,8 @@ def measure_delays_for_path_with_criterion(cell, config, settings, variation, pa
             plt.close(fig)
 
         # Build LUT
-        delay_measurements = [analysis.measurements[name] for analysis in analyses.values() if name in analysis.measurements]
         try:
-            delay = criterion(delay_measurements) @ PySpice.Unit.u_s
+            delay = criterion(measured[name]) @ PySpice.Unit.u_s
         except ValueError as e:
             if settings.dry_run:
                 delay = -1 @ PySpice.Unit.u_s
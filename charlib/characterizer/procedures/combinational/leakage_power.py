@@ -1,9 +1,9 @@
 import itertools
 import PySpice
 
-from charlib.characterizer import utils
+from charlib.characterizer import utils, cache, deck
 from charlib.characterizer.cell import Port
-from charlib.characterizer.procedures import register, ProcedureFailedException
+from charlib.characterizer.procedures import register, preparation, ProcedureFailedException
 from charlib.liberty import liberty
 
 
@@ -25,6 +25,7 @@ def build_when_str(state_map):
     return ' & '.join(parts)
 
 
+@preparation
 def measure_leakage_for_state(cell, config, settings, state_map):
     """Run one DC operating point and write one leakage_power group to cell.liberty.
 
@@ -32,8 +33,15 @@ def measure_leakage_for_state(cell, config, settings, state_map):
     :param config: CellTestConfig with model paths and cell-specific config.
     :param settings: CharacterizationSettings with library-wide config.
     :param state_map: dict mapping each logic input name to '0' or '1'.
+
+    The operating point is stored in the shared operating point cache so that other test benches
+    can start from it. If it is already cached, no simulation is run. This is a preparation task,
+    so it finishes before any delay or capacitance task for the cell starts.
     """
-    circuit = utils.init_circuit(
+    op_cache = cache.operating_points(settings)
+    op_key = cache.operating_point_key(cell, config, settings, state_map)
+
+    circuit = deck.Deck(
         'leakage', cell.netlist, config.models, settings.named_nodes, settings.units
     )
 
@@ -58,9 +66,9 @@ def measure_leakage_for_state(cell, config, settings, state_map):
                 raise ValueError(f'Unable to connect unrecognized pin {pin.name} in cell {cell.name}')
     circuit.X('dut', cell.name, *connections)
 
-    simulator = PySpice.Simulator.factory(simulator=settings.simulation.backend)
+    simulator = utils.get_simulator(settings.simulation.backend)
     simulation = simulator.simulation(
-        circuit,
+        circuit.to_circuit(),
         temperature=settings.temperature,
         nominal_temperature=settings.temperature
     )
@@ -76,15 +84,22 @@ def measure_leakage_for_state(cell, config, settings, state_map):
         # TODO: Display a message if not settings.quiet
         power_value = -1
     else:
-        try:
-            analysis = simulator.run(simulation)
-        except Exception as e:
-            msg = (f'Procedure measure_leakage_for_state failed for cell {cell.name} '
-                   f'with state {state_map}')
-            raise ProcedureFailedException(msg) from e
+        op = op_cache.get(op_key)
+        if op is None:
+            try:
+                analysis = simulator.run(simulation)
+            except Exception as e:
+                msg = (f'Procedure measure_leakage_for_state failed for cell {cell.name} '
+                       f'with state {state_map}')
+                raise ProcedureFailedException(msg) from e
+            op = {
+                'nodes': {name: float(v[0]) for name, v in analysis.nodes.items()},
+                'branches': {name: float(i[0]) for name, i in analysis.branches.items()},
+            }
+            op_cache.put(op_key, op)
 
         # Branch current: ngspice names it <element_name>#branch, simplified to <element_name> (lower)
-        i_vdd = float(analysis.branches[settings.primary_power.name.lower()][0])
+        i_vdd = op['branches'][settings.primary_power.name.lower()]
         power_W = settings.primary_power.voltage * abs(i_vdd)
         power_value = (power_W @ PySpice.Unit.u_W).convert(
             settings.units.power.prefixed_unit
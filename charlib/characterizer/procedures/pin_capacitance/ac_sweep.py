@@ -2,7 +2,7 @@ import numpy as np
 import PySpice
 from PySpice.Unit import *
 
-from charlib.characterizer import utils
+from charlib.characterizer import utils, cache, deck, measure
 from charlib.characterizer.cell import Port
 from charlib.characterizer.procedures import register
 from charlib.liberty import liberty
@@ -38,8 +38,8 @@ def measure_pin_cap_by_ac_sweep(cell, settings, config, target_pin):
 
     # Initialize circuit
     circuit_name = f'cell-{cell.name}-pin-{target_pin}-cap'
-    circuit = utils.init_circuit(circuit_name, cell.netlist, config.models,
-                                 settings.named_nodes, settings.units)
+    circuit = deck.Deck(circuit_name, cell.netlist, config.models,
+                        settings.named_nodes, settings.units)
     circuit.I('in', circuit.gnd, 'vin', f'DC 0 AC {PySpice.Spice.unit.str_spice(i_in)}')
     circuit.R('in', circuit.gnd, 'vin', r_in)
 
@@ -67,8 +67,15 @@ def measure_pin_cap_by_ac_sweep(cell, settings, config, target_pin):
                     connections.append(f'v{pin.name}')
     circuit.X('dut', cell.name, *connections)
 
-    simulator = PySpice.Simulator.factory(simulator=settings.simulation.backend)
-    simulation = simulator.simulation(circuit, temperature=settings.temperature)
+    simulator = utils.get_simulator(settings.simulation.backend)
+    simulation = simulator.simulation(circuit.to_circuit(), temperature=settings.temperature)
+    # All pins are pulled to ground, so the cell biases at the all-zero operating point. Use it
+    # as a nodeset to speed up the DC solve if it has been cached.
+    initial_conditions = cache.initial_conditions(
+        cell, config, settings, {name: '0' for name in cell.inputs},
+        {name: f'v{name}' for name in cell.outputs})
+    if initial_conditions:
+        simulation.node_set(**initial_conditions)
     simulation.ac('dec', 100, f_start, f_stop, run=False)
 
     if settings.debug:
@@ -83,11 +90,10 @@ def measure_pin_cap_by_ac_sweep(cell, settings, config, target_pin):
         capacitance = -1
     else:
         analysis = simulator.run(simulation)
-        conductance = np.reciprocal(np.abs(analysis.vin)/i_in)
+        conductance = np.reciprocal(np.abs(np.asarray(analysis.vin))/float(i_in))
         # |Y| = 2*pi*f*C in the capacitive region: the slope against frequency
         # in Hz is 2*pi*C, not C
-        [*_, slope] = np.polynomial.polynomial.polyfit(analysis.frequency, conductance, 1)
-        capacitance = slope / (2 * np.pi)
+        capacitance = measure.slope(np.asarray(analysis.frequency).real, conductance) / (2 * np.pi)
 
     # Add to the liberty group
     converted_cap = (capacitance @ u_F).convert(settings.units.capacitance.prefixed_unit).value
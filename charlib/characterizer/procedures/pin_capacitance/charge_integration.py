@@ -1,9 +1,10 @@
 import math
 
+import numpy as np
 import PySpice
 from PySpice.Unit import *
 
-from charlib.characterizer import utils
+from charlib.characterizer import utils, cache, deck, measure
 from charlib.characterizer.cell import Port
 from charlib.characterizer.procedures import register, ProcedureFailedException
 
@@ -41,7 +42,7 @@ def measure_pin_cap_by_charge_integration(cell, settings, config, target_pin):
     r_out  = 10 @ u_GOhm
     c_out  = 1  @ u_pF
 
-    # Convert to SI seconds for the .meas from=/to= strings
+    # Convert to SI seconds for the integration limits
     t_slew_s = float(t_slew.value) * float(t_slew.scale)
     t_wait_s = float(t_wait.value) * float(t_wait.scale)
 
@@ -49,12 +50,13 @@ def measure_pin_cap_by_charge_integration(cell, settings, config, target_pin):
     t_rise_end   = t_wait_s + t_slew_s
     t_fall_start = 2 * t_wait_s + t_slew_s
     t_fall_end   = 2 * t_wait_s + 2 * t_slew_s
-    t_sim_end    = 3 * t_wait + 2 * t_slew
+    # Nothing after the falling edge is integrated, so the transient ends with it
+    t_sim_end    = 2 * t_wait + 2 * t_slew
 
     # Initialize circuit
     circuit_name = f'cell-{cell.name}-pin-{target_pin}-cap'
-    circuit = utils.init_circuit(circuit_name, cell.netlist, config.models,
-                                 settings.named_nodes, settings.units)
+    circuit = deck.Deck(circuit_name, cell.netlist, config.models,
+                        settings.named_nodes, settings.units)
 
     # PWL stimulus: flat at VSS, ramp to VDD, flat at VDD, ramp back to VSS
     circuit.PieceWiseLinearVoltageSource('stim', 'vin', circuit.gnd, values=[
@@ -88,20 +90,24 @@ def measure_pin_cap_by_charge_integration(cell, settings, config, target_pin):
     circuit.X('dut', cell.name, *connections)
 
     # Set up simulation
-    simulator = PySpice.Simulator.factory(simulator=settings.simulation.backend)
+    simulator = utils.get_simulator(settings.simulation.backend)
     simulation = simulator.simulation(
-        circuit,
+        circuit.to_circuit(),
         temperature=settings.temperature,
         nominal_temperature=settings.temperature
     )
-    simulation.options('autostop')
+    settings.simulation.options.apply(simulation)
 
-    # Integrate i(vstim) over each edge; i(vstim) is negative when sourcing current
-    simulation.measure('tran', 'q_rise', 'integ i(vstim)',
-                       f'from={t_rise_start:.6g}', f'to={t_rise_end:.6g}', run=False)
-    simulation.measure('tran', 'q_fall', 'integ i(vstim)',
-                       f'from={t_fall_start:.6g}', f'to={t_fall_end:.6g}', run=False)
-    simulation.transient(step_time=t_slew / 10, end_time=t_sim_end, run=False)
+    # The stimulus starts low and all other pins are pulled to ground, so the cell starts from the
+    # all-zero operating point. Use it as the initial condition if it has been cached.
+    initial_conditions = cache.initial_conditions(
+        cell, config, settings, {name: '0' for name in cell.inputs},
+        {name: f'v{name}' for name in cell.outputs})
+    if initial_conditions:
+        simulation.initial_condition(**initial_conditions)
+
+    simulation.transient(step_time=settings.simulation.options.step_time(t_slew, 10, utils.cell_timestep(config, settings)),
+                         end_time=t_sim_end, run=False)
 
     if settings.debug:
         debug_path = settings.debug_dir / cell.name / __name__.split('.')[-1]
@@ -121,8 +127,12 @@ def measure_pin_cap_by_charge_integration(cell, settings, config, target_pin):
                    f'pin {target_pin}')
             raise ProcedureFailedException(msg) from e
 
-        q_rise = abs(analysis.measurements.get('q_rise', float('nan')))
-        q_fall = abs(analysis.measurements.get('q_fall', float('nan')))
+        # Integrate i(vstim) over both edges at once; i(vstim) is negative when sourcing current
+        i_stim = np.asarray(analysis.branches['vstim'])
+        (q_rise, q_fall) = np.abs(measure.integral(np.asarray(analysis.time),
+                                                   np.broadcast_to(i_stim, (2, len(i_stim))),
+                                                   [t_rise_start, t_fall_start],
+                                                   [t_rise_end, t_fall_end]))
 
     result = cell.liberty
     if math.isnan(q_rise) or math.isnan(q_fall):
@@ -0,0 +1,116 @@
+"""Shared search for recovery and removal constraints on asynchronous set and reset pins.
+
+Both constraints bound when a set or reset pin may be released relative to the clock edge. They are
+measured with the latch test bench used for setup and hold (see c2q_contour.sim_latch), driving the
+control pin in place of the data pin: the control pin starts asserted, so the latch starts in its
+set or reset state, and is released setup_skew before the clock edge (after it, if negative).
+
+- If the release comes early enough, the clock edge captures data and the output switches. The
+  recovery time is the smallest setup_skew for which the clock-to-q delay is at most
+  C2Q_DEGRADATION worse than with the control released long before the clock edge.
+- If the release comes late enough, the clock edge is ignored and the output never switches. The
+  removal time is the smallest time after the clock edge (-setup_skew) for which this holds.
+"""
+
+import functools
+import math
+
+import PySpice
+
+from charlib.characterizer import utils
+from charlib.characterizer.procedures.sequential.constraint.metastability.binary_search import (
+    C2Q_DEGRADATION)
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    constraint_group, get_c2q, get_latch_state, probe_c2q, stabilizing_time)
+
+def _release_paths(cell, control):
+    """Yield (path, state_maps) for each output which the clock edge changes after control is
+    released"""
+    control_transition = '01' if control.is_inverted() else '10'
+    for output_pin in cell.outputs:
+        for output_transition in ['01', '10']:
+            path = [control.name, control_transition, output_pin, output_transition]
+            state_maps = [state_map for state_map in cell.nonmasking_conditions_for_path(*path)
+                          if cell.clock.is_asserted(state_map[cell.clock.name])]
+            if state_maps:
+                yield (path, state_maps)
+
+def control_paths(cell):
+    """Yield (path, state_maps) for the release of each set and reset pin of cell.
+
+    Paths are in the format [control_pin, control_transition, output_pin, output_transition], where
+    control_transition releases the control pin and state_maps are the nonmasking conditions in
+    which the clock edge then changes output_pin. Only the first output with such conditions is
+    used for each control pin, as the constraint belongs to the control pin rather than an output.
+    Cells without a clock, set or reset pin yield nothing.
+    """
+    if cell.clock is None:
+        return
+    for control in [cell.preset, cell.clear]:
+        if control is not None:
+            release = next(_release_paths(cell, control), None)
+            if release is not None:
+                yield release
+
+def probe_removal(skew, **kwargs):
+    """Return 0 if releasing the control pin skew after the clock edge leaves the output unchanged,
+    or NaN if the clock edge still changes the output.
+
+    Bound with functools.partial, this gives removal searches a picklable probe."""
+    c2q = get_c2q(setup_skew=-skew, **kwargs)
+    return 0.0 if math.isnan(c2q) else float('nan')
+
+def find_control_constraint(constraint, cell, config, settings, variation, path, state_maps):
+    """Find the worst-case recovery or removal time for the release of a set or reset pin.
+
+    :param constraint: 'recovery' or 'removal'.
+    :param cell: A Cell object to test.
+    :param config: A CellTestConfig object containing cell-specific test configuration details.
+    :param settings: A CharacterizationSettings object containing library-wide configuration
+                     details.
+    :param variation: A dict containing test parameters for this configuration variation, such
+                      as slew rates and constraint search bounds.
+    :param path: A path from control_paths.
+    :param state_maps: The nonmasking conditions for path.
+    """
+    [control_pin, control_transition, output_pin, output_transition] = path
+    control_slew = variation['data_slews'] * settings.units.time
+    clock_slew = variation['clock_slews'] * settings.units.time
+    load = variation['metastability_constraint_load'] * settings.units.capacitance
+    tolerance = variation['metastability_constraint_search_tolerance'] * settings.units.time
+    step = variation['metastability_constraint_search_timestep'] * settings.units.time
+
+    # Recovery and removal share the stabilizing time for the path
+    t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps)
+
+    worst = None
+    for state_map in state_maps:
+        if settings.dry_run:
+            # TODO: Display a message if not settings.quiet
+            worst = -1 @ PySpice.Unit.u_s
+            break
+
+        latch_state = get_latch_state(cell, config, settings, path, state_map,
+                                      clock_slew_rate=clock_slew, data_slew_rate=control_slew,
+                                      stabilizing_time=t_stabilizing, capacitive_load=load)
+        # The control pin is reasserted well after the clock edge, whenever it was released
+        c2q_kwargs = dict(cell=cell, config=config, settings=settings, path=path,
+                          state_map=state_map, clock_slew_rate=clock_slew,
+                          data_slew_rate=control_slew, hold_skew=2*t_stabilizing,
+                          stabilizing_time=t_stabilizing, capacitive_load=load,
+                          initial_state=latch_state)
+        search_kwargs = dict(start=t_stabilizing, step=step, tolerance=tolerance,
+                             k=settings.simulation.constraint_search_parallelism,
+                             probe_map=utils.probe_map(settings))
+        if constraint == 'recovery':
+            ref_c2q = get_c2q(setup_skew=t_stabilizing, **c2q_kwargs)
+            threshold = ref_c2q * (1 + C2Q_DEGRADATION) if not math.isnan(ref_c2q) else math.inf
+            probe_fn = functools.partial(probe_c2q, 'setup_skew', **c2q_kwargs)
+        else:
+            threshold = None
+            probe_fn = functools.partial(probe_removal, **c2q_kwargs)
+        (value, *_) = utils.find_min_valid(probe_fn, threshold=threshold, **search_kwargs)
+        worst = value if worst is None else max(worst, value)
+
+    return constraint_group(cell, config, settings, constraint, control_pin, control_transition,
+                            clock_slew, control_slew, worst)
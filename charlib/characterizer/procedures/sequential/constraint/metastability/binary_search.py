@@ -1,24 +1,52 @@
+import functools
+import math
+
 import PySpice
 
 from charlib.characterizer import utils
-from charlib.characterizer.procedures import register, ProcedureFailedException
-from charlib.liberty import liberty
-from charlib.liberty.library import LookupTable
+from charlib.characterizer.procedures import register
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    get_c2q, get_latch_state, measure_stabilizing_time, probe_c2q, setup_hold_groups, stabilizing_time)
+
+# A point passes if its clock-to-q delay is at most this much (relative) worse than with relaxed
+# setup and hold times
+C2Q_DEGRADATION = 0.1
 
-@register('data_slews', 'clock_slews', 'metastability_constraint_load')
+@register(
+    'data_slews',
+    'clock_slews',
+    'metastability_constraint_search_tolerance',
+    'metastability_constraint_search_timestep',
+    'metastability_constraint_load'
+)
 def metastability_binary_search_worst_case(cell, config, settings):
     """Find the minimum setup & hold time such that the cell can still register data."""
-    for variation in config.variations('data_slews', 'clock_slews', 'metastability_constraint_load'):
-        for path in cell.paths():
-            yield (worst_case_setup_hold_constraint, cell, config, settings, variation, path)
+    paths = [(path, list(cell.nonmasking_conditions_for_path(*path))) for path in cell.paths()]
+    paths = [(path, state_maps) for (path, state_maps) in paths if state_maps]
+    for (path, state_maps) in paths:
+        yield (measure_stabilizing_time, cell, config, settings, path, state_maps)
+    for variation in config.variations(
+            'data_slews',
+            'clock_slews',
+            'metastability_constraint_search_tolerance',
+            'metastability_constraint_search_timestep',
+            'metastability_constraint_load'):
+        for (path, state_maps) in paths:
+            yield (worst_case_setup_hold_constraint, cell, config, settings, variation, path, state_maps)
 
-def worst_case_setup_hold_constraint(cell, config, settings, variation, path):
+def worst_case_setup_hold_constraint(cell, config, settings, variation, path, state_maps):
     """Given a particular path through the cell, find the worst-case minimum setup & hold time.
 
     This method tests all nonmasking conditions which produce the state transition indicated in
     the `path` tuple with the given slew rate and capacitive load, then returns data for the
     worst-case (i.e. largest) setup & hold times.
 
+    Setup and hold are searched independently: setup with hold held at the stabilizing time, and
+    hold with setup held at the stabilizing time. A point passes if the clock-to-q delay is within
+    C2Q_DEGRADATION of the delay with both held at the stabilizing time. This takes a few dozen
+    simulations per state, rather than the hundreds of measure_setup_hold_from_contour, but ignores
+    the interdependence of setup and hold time.
+
     :param cell: A Cell object to test.
     :param config: A CellTestConfig object containing cell-specific test configuration details.
     :param settings: A CharacterizationSettings object containing library-wide configuration
@@ -27,15 +55,47 @@ def worst_case_setup_hold_constraint(cell, config, settings, variation, path):
                       as slew rates, loads, and constraint search bounds.
     :param path: A list in the format [input_port, input_transition, output_port,
                  output_transtition] describing the path under test in the cell.
+    :param state_maps: The nonmasking conditions for path.
     """
     [input_port, input_transition, output_port, output_transition] = path
     data_slew = variation['data_slews'] * settings.units.time
     clock_slew = variation['clock_slews'] * settings.units.time
     load = variation['metastability_constraint_load'] * settings.units.capacitance
-    vdd = settings.primary_power.voltage * settings.units.voltage
-    vss = settings.primary_ground.voltage * settings.units.voltage
+    tolerance = variation['metastability_constraint_search_tolerance'] * settings.units.time
+    step = variation['metastability_constraint_search_timestep'] * settings.units.time
+
+    t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps)
 
     # Compute minimum setup & hold constraint for all nonmasking conditions
-    # TODO: implement binary search for minimum setup/hold
+    (worst_setup, worst_hold) = (None, None)
+    for state_map in state_maps:
+        if settings.dry_run:
+            # TODO: Display a message if not settings.quiet
+            (worst_setup, worst_hold) = (-1 @ PySpice.Unit.u_s, -1 @ PySpice.Unit.u_s)
+            break
+
+        latch_state = get_latch_state(cell, config, settings, path, state_map,
+                                      clock_slew_rate=clock_slew, data_slew_rate=data_slew,
+                                      stabilizing_time=t_stabilizing, capacitive_load=load)
+        c2q_kwargs = dict(cell=cell, config=config, settings=settings, path=path,
+                          state_map=state_map, clock_slew_rate=clock_slew,
+                          data_slew_rate=data_slew, stabilizing_time=t_stabilizing,
+                          capacitive_load=load, initial_state=latch_state)
+        ref_c2q = get_c2q(setup_skew=t_stabilizing, hold_skew=t_stabilizing, **c2q_kwargs)
+        threshold = ref_c2q * (1 + C2Q_DEGRADATION) if not math.isnan(ref_c2q) else math.inf
+        search_kwargs = dict(start=t_stabilizing, step=step, tolerance=tolerance,
+                             threshold=threshold,
+                             k=settings.simulation.constraint_search_parallelism,
+                             probe_map=utils.probe_map(settings))
+
+        (setup, *_) = utils.find_min_valid(
+            functools.partial(probe_c2q, 'setup_skew', hold_skew=t_stabilizing, **c2q_kwargs),
+            **search_kwargs)
+        (hold, *_) = utils.find_min_valid(
+            functools.partial(probe_c2q, 'hold_skew', setup_skew=t_stabilizing, **c2q_kwargs),
+            **search_kwargs)
+        worst_setup = setup if worst_setup is None else max(worst_setup, setup)
+        worst_hold = hold if worst_hold is None else max(worst_hold, hold)
 
-    return cell.liberty # TODO
+    return setup_hold_groups(cell, config, settings, input_port, input_transition, clock_slew,
+                             data_slew, worst_setup, worst_hold)
@@ -1,9 +1,10 @@
+import functools
 import PySpice
 import numpy as np
 import math
 
-from charlib.characterizer.procedures import register, ProcedureFailedException
-from charlib.characterizer import utils, plots
+from charlib.characterizer.procedures import register, preparation, ProcedureFailedException
+from charlib.characterizer import utils, plots, deck, measure, cache
 from charlib.liberty import liberty
 from charlib.liberty.library import LookupTable
 
@@ -16,7 +17,20 @@ from charlib.liberty.library import LookupTable
     'metastability_constraint_sweep_samples'
 )
 def measure_setup_hold_from_contour(cell, config, settings):
-    """find setup and hold time using the approach described in https://ieeexplore.ieee.org/document/4167994"""
+    """find setup and hold time using the approach described in https://ieeexplore.ieee.org/document/4167994
+
+    Each variation of each path is searched in a separate task. Tasks for neighboring slews are
+    queued one after another, so that each variation's searches can usually start from the results
+    of a neighbor (see neighboring_slews). The stabilizing time of each path is measured first, in
+    a preparation task (see measure_stabilizing_time)."""
+    # cell.nonmasking_conditions_for_path filter out the impossible paths
+    # ex. non-inverting FF with D, Q, and CLK. it'll never have D_01 -> Q_10
+    paths = [(path, list(cell.nonmasking_conditions_for_path(*path))) for path in cell.paths()]
+    paths = [(path, state_maps) for (path, state_maps) in paths if state_maps]
+    for (path, state_maps) in paths:
+        yield (measure_stabilizing_time, cell, config, settings, path, state_maps)
+
+    slew_groups = {}
     for variation in config.variations(
             'data_slews',
             'clock_slews',
@@ -24,13 +38,31 @@ def measure_setup_hold_from_contour(cell, config, settings):
             'metastability_constraint_search_timestep',
             'metastability_constraint_load',
             'metastability_constraint_sweep_samples'):
-        for path in cell.paths():
-            # cell.nonmasking_conditions_for_path filter out the impossible paths
-            # ex. non-inverting FF with D, Q, and CLK. it'll never have D_01 -> Q_10
-            state_maps = list(cell.nonmasking_conditions_for_path(*path))
-            if not state_maps:
-                continue
-            yield (find_setup_hold_for_path, cell, config, settings, variation, path, state_maps)
+        key = tuple(value for (name, value) in variation.items() if name not in ['data_slews', 'clock_slews'])
+        slew_groups.setdefault(key, []).append(variation)
+    for variations in slew_groups.values():
+        for (path, state_maps) in paths:
+            for variation in slew_order(variations):
+                yield (find_setup_hold_for_path, cell, config, settings, variation, path, state_maps)
+
+def slew_order(variations):
+    """Order variations so that consecutive variations have neighboring slews.
+
+    Variations are sorted by clock slew, then by data slew in alternating directions, so that each
+    step changes only one slew by one table index."""
+    clock_slews = sorted({variation['clock_slews'] for variation in variations})
+    return sorted(variations, key=lambda v: (
+        clock_slews.index(v['clock_slews']),
+        v['data_slews'] * (-1 if clock_slews.index(v['clock_slews']) % 2 else 1)))
+
+def neighboring_slews(config, variation):
+    """Return the variations one table index away from variation in a single slew"""
+    neighbors = []
+    for name in ['data_slews', 'clock_slews']:
+        slews = sorted(config.parameters[name])
+        index = slews.index(variation[name])
+        neighbors += [{**variation, name: slews[i]} for i in [index - 1, index + 1] if 0 <= i < len(slews)]
+    return neighbors
 
 def make_log_header(cell_name, ds, cs, path_str, constants):
     """Return a metadata header block common to all log files."""
@@ -75,12 +107,18 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
       3. Find hold time with setup held at 'infinite'. Binary search finds absolute minimum hold where FF latches at all.
       4. Fix hold = result of step 3, then find setup time. Binary search finds absolute maximum setup where FF latches at all.
       ---- at this point we have absolute max setup and absolute min hold ----
-      5. with the boundaries we obtained, simulate every (setup, hold) combination; use a c2q threshold (20% worse
-         than c2q at the relaxed corner) to identify the valid-c2q contour within the full latching space
+      5. with the boundaries we obtained, walk along the edge of the valid-c2q region on a (setup, hold) grid; use a
+         c2q threshold (20% worse than c2q at the relaxed corner) to identify the valid-c2q contour within the full
+         latching space
       6. pick the knee point on the valid-c2q contour as the final setup and hold result for the current variation
 
     Note: both setup time and hold time may be negative (data can arrive after the
     clock edge / change before the clock edge and the cell still latches).
+
+    Searches 1–4 for each state map start near the results of the family leader for the same
+    variation, if this cell is not the leader (leaders are characterized before their siblings
+    start). Otherwise, they start near the cached results for this cell at a neighboring slew, if
+    any. This call's results are cached for the neighbors, and for the family if this cell leads it.
     """
     TOLERANCE = variation['metastability_constraint_search_tolerance'] * settings.units.time
     STEP = variation['metastability_constraint_search_timestep'] * settings.units.time
@@ -99,6 +137,10 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
 
     result_per_state = {}
 
+    # Step -1: find the stabilizing time for this path (measured once, then reused)
+    t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps,
+                                     debug_dir=(variation_debug_path / path_str) if settings.debug else None)
+
     # there could be multiple state maps for a given path
     # ex. in a scan dff with pins D, Q, CLK, SE (scan enable) and SD (scan data)
     # for path D, 01 -> Q, 01, SD can be either 0 or 1, that will affect setup / hold time
@@ -110,22 +152,24 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
             path_debug_folder = variation_debug_path / path_str
             state_debug_path = path_debug_folder / state_folder
 
-        # Step -1: measure stabilizing time to minimize total runtime
-        k = 2 # FIXME: safety factor k should be configurable
-        t_stabilizing = get_t_stabilizing(cell, config, settings, path, state_map, k=k,
-                                          clock_slew_rate=cs,
-                                          data_slew_rate=ds, capacitive_load=C_LOAD,
-                                          debug_dir=state_debug_path)
-
-        step_c2q = lambda t_s, t_h, debug_dir: get_c2q(cell, config, settings, path, state_map,
-                                                       clock_slew_rate=cs, data_slew_rate=ds,
-                                                       setup_skew=t_s, hold_skew=t_h,
-                                                       stabilizing_time=t_stabilizing,
-                                                       capacitive_load=C_LOAD, debug_dir=debug_dir)
+        # Capture the post-lockdown state once so that every probe below only simulates the
+        # clock activation edge
+        latch_state = get_latch_state(cell, config, settings, path, state_map,
+                                      clock_slew_rate=cs, data_slew_rate=ds,
+                                      stabilizing_time=t_stabilizing, capacitive_load=C_LOAD)
+
+        c2q_kwargs = dict(cell=cell, config=config, settings=settings, path=path, state_map=state_map,
+                          clock_slew_rate=cs, data_slew_rate=ds, stabilizing_time=t_stabilizing,
+                          capacitive_load=C_LOAD, initial_state=latch_state)
+        step_c2q = lambda t_s, t_h, debug_dir: get_c2q(setup_skew=t_s, hold_skew=t_h,
+                                                       debug_dir=debug_dir, **c2q_kwargs)
+        # Searches 1–4 probe through probe_map, which may run them in other processes
+        search_c2q = lambda skew_name, debug_dir, **fixed: functools.partial(
+            probe_c2q, skew_name, debug_dir=debug_dir, **fixed, **c2q_kwargs)
 
         # Step 0: measure reference c2q at (t_stabilizing, t_stabilizing) — relaxed point.
-        # Used to gate binary search steps 1–4: points with c2q > ref * 1.2 are treated
-        # as invalid (metastable / degenerate operating region).
+        # Used to gate searches 1–4: points with c2q > ref * 1.2 are treated as invalid
+        # (metastable / degenerate operating region), and c2q guides the search towards that limit.
         step0_path = (state_debug_path / 'step0') if settings.debug else None
         ref_c2q_steps = step_c2q(t_stabilizing, t_stabilizing, step0_path)
         step_threshold = ref_c2q_steps * 1.2 if not math.isnan(ref_c2q_steps) else math.inf
@@ -141,14 +185,29 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
             ]
         )
 
-        # Return c2q if within threshold, else NaN (so find_min_valid treats it as invalid).
-        _valid_c2q = lambda c2q: c2q if (not math.isnan(c2q) and c2q < step_threshold) else float('nan')
+        search_kwargs = dict(start=t_stabilizing, step=STEP, tolerance=TOLERANCE,
+                             threshold=step_threshold,
+                             k=settings.simulation.constraint_search_parallelism,
+                             probe_map=utils.probe_map(settings), margin=STEP)
+        # Start the searches near the family leader's results for the same variation, or failing
+        # that near the results for a neighboring slew
+        family_results = cache.family_results(settings)
+        family_key = cache.family_constraint_key(cell, config, settings, path, variation, state_map)
+        constraint_results = cache.constraint_results(settings)
+        constraint_key = cache.constraint_key(cell, config, settings, path, variation, state_map)
+        seed = {}
+        if not settings.dry_run:
+            cached = ([] if config.family_leader else [family_results.get(family_key)]) + \
+                     [constraint_results.get(cache.constraint_key(cell, config, settings, path, neighbor, state_map))
+                      for neighbor in neighboring_slews(config, variation)]
+            seed = next(({step: (t @ PySpice.Unit.u_s).convert(t_unit) for (step, t) in results.items()}
+                         for results in cached if results), {})
 
         # Step 1: setup time with hold fixed at t_stabilizing, this gives min setup
         step1_path = (state_debug_path / 'step1') if settings.debug else None
         step1_setup_result, step1_phase1_candidates, step1_phase2_candidates = utils.find_min_valid(
-            lambda s: _valid_c2q(step_c2q(s, t_stabilizing, step1_path)),
-            start=t_stabilizing, step=STEP, tolerance=TOLERANCE)
+            search_c2q('setup_skew', step1_path, hold_skew=t_stabilizing),
+            seed=seed.get('step1'), **search_kwargs)
         write_step_log(step1_path, 'step1', cell.name, ds, cs, path_str, state_str, constants,
                         f"step1 : find setup given hold= {t_stabilizing}",
                         step1_setup_result, step1_phase1_candidates, step1_phase2_candidates)
@@ -156,8 +215,8 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
         # Step 2: hold time with setup fixed at min_setup, this gives max hold
         step2_path = (state_debug_path / 'step2') if settings.debug else None
         step2_hold_result, step2_phase1_candidates, step2_phase2_candidates = utils.find_min_valid(
-            lambda h: _valid_c2q(step_c2q(step1_setup_result, h, step2_path)),
-            start=t_stabilizing, step=STEP, tolerance=TOLERANCE)
+            search_c2q('hold_skew', step2_path, setup_skew=step1_setup_result),
+            seed=seed.get('step2'), **search_kwargs)
         write_step_log(step2_path, 'step2', cell.name, ds, cs, path_str, state_str, constants,
                         f"step2 : find hold given setup= {step1_setup_result}",
                         step2_hold_result, step2_phase1_candidates, step2_phase2_candidates)
@@ -165,8 +224,8 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
         # Step 3: hold time with setup fixed t_stabilizing, this gives min hold
         step3_path = (state_debug_path / 'step3') if settings.debug else None
         step3_hold_result, step3_phase1_candidates, step3_phase2_candidates = utils.find_min_valid(
-            lambda h: _valid_c2q(step_c2q(t_stabilizing, h, step3_path)),
-            start=t_stabilizing, step=STEP, tolerance=TOLERANCE)
+            search_c2q('hold_skew', step3_path, setup_skew=t_stabilizing),
+            seed=seed.get('step3'), **search_kwargs)
         write_step_log(step3_path, 'step3', cell.name, ds, cs, path_str, state_str, constants,
                         f"step3 : find hold given setup= {t_stabilizing}",
                         step3_hold_result, step3_phase1_candidates, step3_phase2_candidates)
@@ -174,13 +233,21 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
         # Step 4: find setup time with hold fixed at min hold, this gives max setup
         step4_path = (state_debug_path / 'step4') if settings.debug else None
         step4_setup_result, step4_phase1_candidates, step4_phase2_candidates = utils.find_min_valid(
-            lambda s: _valid_c2q(step_c2q(s, step3_hold_result, step4_path)),
-            start=t_stabilizing, step=STEP, tolerance=TOLERANCE)
+            search_c2q('setup_skew', step4_path, hold_skew=step3_hold_result),
+            seed=seed.get('step4'), **search_kwargs)
         write_step_log(step4_path, 'step4', cell.name, ds, cs, path_str, state_str, constants,
                         f"step4 : find setup given hold= {step3_hold_result}",
                         step4_setup_result, step4_phase1_candidates, step4_phase2_candidates)
 
-        # Step 5: sweep the setup×hold boundary and plot the latched contour
+        results = {'step1': step1_setup_result, 'step2': step2_hold_result,
+                   'step3': step3_hold_result, 'step4': step4_setup_result}
+        if not settings.dry_run:
+            cached = {step: float(t) for (step, t) in results.items()}
+            if config.family_leader:
+                family_results.put(family_key, cached)
+            constraint_results.put(constraint_key, cached)
+
+        # Step 5: trace the setup×hold boundary and plot the latched contour
         step5_debug_path = (state_debug_path / 'step5') if settings.debug else None
         ref_c2q = step_c2q(step4_setup_result, step2_hold_result, step5_debug_path)
         c2q_threshold = ref_c2q * 1.2 if not math.isnan(ref_c2q) else math.inf
@@ -190,7 +257,7 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
         # simulated_a : 2D numpy array, indexed by hold(first index) and setup(second index), stores a boolean that indicates whether such setup & hold combination has been simulated
         (latched_a, c2q_a, simulated_a,
          latched_b, c2q_b, simulated_b,
-         setup_vals_s, hold_vals_s) = sweep_2d_space_for_contour(
+         setup_vals_s, hold_vals_s) = trace_2d_contour(
             lambda s, h: step_c2q(s * settings.units.time, h * settings.units.time, step5_debug_path),
             setup_min=to_t(step1_setup_result), setup_max=to_t(step4_setup_result),
             hold_min=to_t(step3_hold_result),   hold_max=to_t(step2_hold_result),
@@ -296,32 +363,39 @@ def find_setup_hold_for_path(cell, config, settings, variation, path, state_maps
             ]
         )
 
-    # Build liberty output
+    return setup_hold_groups(cell, config, settings, data_pin, data_transition, cs, ds,
+                             worst_setup, worst_hold)
+
+
+def setup_hold_groups(cell, config, settings, data_pin, data_transition, clock_slew, data_slew,
+                      setup, hold):
+    """Add setup and hold timing groups with a single LUT entry each to the data pin of cell.liberty,
+    and return cell.liberty"""
+    for (constraint, value) in [('setup', setup), ('hold', hold)]:
+        constraint_group(cell, config, settings, constraint, data_pin, data_transition, clock_slew,
+                         data_slew, value)
+    return cell.liberty
+
+
+def constraint_group(cell, config, settings, constraint, pin, transition, clock_slew, pin_slew,
+                     value):
+    """Add a timing group for constraint (e.g. 'setup' or 'recovery') relative to the clock, with a
+    single LUT entry, to the constrained pin of cell.liberty, and return cell.liberty"""
     result = cell.liberty
     lut_size = f'{len(config.parameters["clock_slews"])}x{len(config.parameters["data_slews"])}'
-    constraint_name = 'rise_constraint' if data_transition == '01' else 'fall_constraint'
-
-    # Setup timing group
-    stg = liberty.Group('timing')
-    stg.add_attribute('related_pin', cell.clock.name)
-    stg.add_attribute('timing_type', 'setup_falling' if cell.clock.is_inverted() else 'setup_rising')
-    setup_lut = LookupTable(constraint_name, f'setup_template_{lut_size}',
-                            related_pin_transition=[cs.convert(settings.units.time.prefixed_unit).value],
-                            constrained_pin_transition=[ds.convert(settings.units.time.prefixed_unit).value])
-    setup_lut.values[0, 0] = worst_setup.convert(settings.units.time.prefixed_unit).value
-    stg.add_group(setup_lut)
-    result.group('pin', data_pin).add_group(stg)
-
-    # Hold timing group
-    htg = liberty.Group('timing')
-    htg.add_attribute('related_pin', cell.clock.name)
-    htg.add_attribute('timing_type', 'hold_falling' if cell.clock.is_inverted() else 'hold_rising')
-    hold_lut = LookupTable(constraint_name, f'hold_template_{lut_size}',
-                           related_pin_transition=[cs.convert(settings.units.time.prefixed_unit).value],
-                           constrained_pin_transition=[ds.convert(settings.units.time.prefixed_unit).value])
-    hold_lut.values[0, 0] = worst_hold.convert(settings.units.time.prefixed_unit).value
-    htg.add_group(hold_lut)
-    result.group('pin', data_pin).add_group(htg)
+    constraint_name = 'rise_constraint' if transition == '01' else 'fall_constraint'
+    t_unit = settings.units.time.prefixed_unit
+
+    timing_group = liberty.Group('timing')
+    timing_group.add_attribute('related_pin', cell.clock.name)
+    timing_group.add_attribute('timing_type', f'{constraint}_falling' if cell.clock.is_inverted()
+                                              else f'{constraint}_rising')
+    lut = LookupTable(constraint_name, f'{constraint}_template_{lut_size}',
+                      related_pin_transition=[clock_slew.convert(t_unit).value],
+                      constrained_pin_transition=[pin_slew.convert(t_unit).value])
+    lut.values[0, 0] = value.convert(t_unit).value
+    timing_group.add_group(lut)
+    result.group('pin', pin).add_group(timing_group)
 
     return result
 
@@ -403,6 +477,63 @@ def sweep_2d_space_for_contour(probe_fn, setup_min, setup_max, hold_min, hold_ma
             latched_b, c2q_b, simulated_b,
             setup_vals, hold_vals)
 
+def trace_2d_contour(probe_fn, setup_min, setup_max, hold_min, hold_max, c2q_threshold=math.inf, n_samples=40):
+    """Walk along the latch boundary of the setup×hold grid instead of sweeping every row and column.
+
+    The cell latches more easily with more setup or more hold time, so the first latching setup
+    column can only move right as hold decreases. The walk starts at maximum hold and minimum
+    setup, steps right past each failed point and down after each latched one, and so visits at
+    most 2*n_samples - 1 grid points, all next to the boundary.
+
+    Takes the same arguments and returns the same values as sweep_2d_space_for_contour, so
+    extract_2d_contour gives the same boundary points. Grid points beyond the boundary which the
+    sweeps would have simulated are inferred instead, and their c2q is NaN. The c2q and simulated
+    grids are shared by both "sweeps".
+    """
+    # Safety: ensure lo ≤ hi on both axes
+    if setup_min > setup_max:
+        setup_min, setup_max = setup_max, setup_min
+    if hold_min > hold_max:
+        hold_min, hold_max = hold_max, hold_min
+
+    setup_vals = np.linspace(setup_min, setup_max, n_samples)
+    hold_vals  = np.linspace(hold_min,  hold_max,  n_samples)
+
+    n_setup = len(setup_vals)
+    n_hold  = len(hold_vals)
+
+    c2q_grid  = np.full((n_hold, n_setup), np.nan)
+    simulated = np.zeros((n_hold, n_setup), dtype=bool)
+    row_first = np.full(n_hold, n_setup) # First latching setup column per hold row (n_setup: none)
+
+    # Walk from (max hold, min setup): right while failing, down while latching
+    (hi, si) = (n_hold - 1, 0)
+    while hi >= 0 and si < n_setup:
+        c2q = probe_fn(setup_vals[si], hold_vals[hi])
+        c2q_grid[hi, si]  = c2q
+        simulated[hi, si] = True
+        if not math.isnan(c2q) and c2q < c2q_threshold:
+            row_first[hi] = si
+            hi -= 1
+        else:
+            si += 1
+
+    # Sweep A: the first latching point in each hold row
+    latched_a = np.zeros((n_hold, n_setup), dtype=bool)
+    for hi in np.flatnonzero(row_first < n_setup):
+        latched_a[hi, row_first[hi]] = True
+
+    # Sweep B: the first latching point in each setup column, i.e. the lowest row latching there
+    latched_b = np.zeros((n_hold, n_setup), dtype=bool)
+    for si in range(n_setup):
+        rows = np.flatnonzero(row_first <= si)
+        if len(rows):
+            latched_b[rows.min(), si] = True
+
+    return (latched_a, c2q_grid, simulated,
+            latched_b, c2q_grid, simulated,
+            setup_vals, hold_vals)
+
 def extract_2d_contour(latched_a, latched_b, setup_vals, hold_vals):
     """Extract the latch boundary as a list of (setup, hold) float pairs.
     The result is the 2D concaved contour we're using to pick the final setup / hold pair
@@ -436,9 +567,23 @@ def extract_2d_contour(latched_a, latched_b, setup_vals, hold_vals):
 
 def sim_latch(cell, config, settings, path, state_map, capacitive_load=None,
               clock_slew_rate=None, data_slew_rate=None, setup_skew=None, hold_skew=None,
-              stabilizing_time=None, circuit_title='sim_latch', debug_dir=None
+              stabilizing_time=None, circuit_title='sim_latch', debug_dir=None, measure_c2q=False,
+              lockdown_only=False, initial_state=None, active_width=None, inactive_width=None
     ):
-    """Build a SPICE test bench and run transient simulation. Return an analysis object."""
+    """Build a SPICE test bench and run transient simulation. Return an analysis object.
+
+    If measure_c2q is set, a `c2q` .meas is added from the final clock edge to the first output
+    transition after it, and autostop is enabled so the transient ends as soon as it is taken.
+
+    If lockdown_only is set, only the lockdown pulse and the following stabilizing time are
+    simulated, with data held at its initial value. If initial_state (a dict of node voltages, as
+    returned by get_latch_state) is given, the lockdown phase is skipped: the stored state is
+    applied with .ic and only the clock activation edge is simulated.
+
+    If active_width is given, the clock returns to its inactive level active_width after the
+    activation edge. If inactive_width is given (without initial_state), the clock is inactive for
+    only inactive_width between the lockdown pulse and the activation edge. Widths are measured from
+    the start of one clock edge to the start of the next."""
 
     # Set up parameters, using reasonable defaults where possible
     data_pin, data_transition, output_pin, output_transition = path
@@ -463,22 +608,38 @@ def sim_latch(cell, config, settings, path, state_map, capacitive_load=None,
 
     if t_setup + t_hold <= 0:
         raise ValueError(f'setup_skew ({t_setup}) + hold_skew ({t_hold}) < 0!')
+    t_clk_full_slew = t_clk_slew / (th_high - th_low)
+    for width in [active_width, inactive_width]:
+        if width is not None and width < t_clk_full_slew:
+            raise ValueError(f'Clock pulse width ({width}) is shorter than the clock slew!')
 
     # Build clock waveform (lockdown pulse, stabilizing, clock activation)
     clk_is_rising = state_map[cell.clock.name] == '1'
     (v0, v1) = (vss, vdd) if clk_is_rising else (vdd, vss)
-    clk_pwl = utils.slew_pwl(v0, v1, t_clk_slew, t_stabilizing, th_low, th_high)
-    clk_pwl += utils.slew_pwl(v1, v0, t_clk_slew, t_stabilizing, th_low, th_high, t_start=clk_pwl[-1][0])[1:]
-    clk_pwl += utils.slew_pwl(v0, v1, t_clk_slew, 2*t_stabilizing, th_low, th_high, t_start=clk_pwl[-1][0])[1:]
+    t_data_full_slew = t_data_slew / (th_high - th_low)
+    if initial_state:
+        # The lockdown state is applied with .ic, so we only need to wait long enough for the data
+        # pulse to start before the clock activates
+        t_wait = max(t_setup, 0*t_setup) + t_data_full_slew + t_clk_full_slew
+        clk_pwl = utils.slew_pwl(v0, v1, t_clk_slew, t_wait, th_low, th_high)
+    else:
+        clk_pwl = utils.slew_pwl(v0, v1, t_clk_slew, t_stabilizing, th_low, th_high)
+        clk_pwl += utils.slew_pwl(v1, v0, t_clk_slew, t_stabilizing, th_low, th_high, t_start=clk_pwl[-1][0])[1:]
+        if not lockdown_only:
+            t_inactive = inactive_width - t_clk_full_slew if inactive_width else 2*t_stabilizing
+            clk_pwl += utils.slew_pwl(v0, v1, t_clk_slew, t_inactive, th_low, th_high, t_start=clk_pwl[-1][0])[1:]
 
     # Find the precise time that the clock activation (rise/fall) threshold is reached
     th_clk_active = th_rise if clk_is_rising else th_fall
     t_clk_active = clk_pwl[-2][0] + (clk_pwl[-1][0] - clk_pwl[-2][0])*th_clk_active
+    t_final_edge = clk_pwl[-2][0]
+    if active_width and not lockdown_only:
+        clk_pwl += utils.slew_pwl(v1, v0, t_clk_slew, active_width - t_clk_full_slew, th_low, th_high,
+                                  t_start=clk_pwl[-1][0])[1:]
 
     # Based on the time that the clock activates, find the time we want the data to start slewing
     # Data should activate t_setup before the clock activates, plus a bit more to account for
     # the time data takes to slew.
-    t_data_full_slew = t_data_slew / (th_high - th_low)
     data_is_rising = data_transition == '01'
     *_, data_port = cell.filter_pins(name=data_pin)
     if data_port.trigger: # edge triggered
@@ -490,11 +651,16 @@ def sim_latch(cell, config, settings, path, state_map, capacitive_load=None,
     # Find the pulse width of the data signal, then build the data waveform
     data_pulse_width = (1-th_data_start)*t_data_slew + t_setup + t_hold + (1-th_data_end)*t_data_slew
     (v0, v1) = (vss, vdd) if data_is_rising else (vdd, vss)
-    data_pwl = utils.slew_pwl(v0, v1, t_data_slew, t_data_start, th_low, th_high)
-    data_pwl += utils.slew_pwl(v1, v0, t_data_slew, data_pulse_width, th_low, th_high, data_pwl[-1][0])[1:]
+    if lockdown_only:
+        t_sim_end = clk_pwl[-1][0] + t_stabilizing
+        data_pwl = [(0*t_sim_end, v0), (t_sim_end, v0)]
+    else:
+        t_sim_end = t_data_start + data_pulse_width + t_stabilizing
+        data_pwl = utils.slew_pwl(v0, v1, t_data_slew, t_data_start, th_low, th_high)
+        data_pwl += utils.slew_pwl(v1, v0, t_data_slew, data_pulse_width, th_low, th_high, data_pwl[-1][0])[1:]
 
     # Initialize circuit
-    circuit = utils.init_circuit(circuit_title, cell.netlist, config.models, settings.named_nodes, settings.units)
+    circuit = deck.Deck(circuit_title, cell.netlist, config.models, settings.named_nodes, settings.units)
     circuit.V('o_cap', 'vout', 'wout', 0) # 0 volt source in series with c_load is a trick to measure current through the load capacitor.
     circuit.C('c_load', 'wout', circuit.gnd, c_load)
     circuit.PieceWiseLinearVoltageSource('clk', 'vclk', circuit.gnd, values=clk_pwl)
@@ -520,16 +686,31 @@ def sim_latch(cell, config, settings, path, state_map, capacitive_load=None,
     circuit.X('dut', cell.name, *connections)
 
     # Build the simulation
-    simulator = PySpice.Simulator.factory(simulator=settings.simulation.backend)
+    simulator = utils.get_simulator(settings.simulation.backend)
     simulation = simulator.simulation(
-        circuit,
+        circuit.to_circuit(),
         temperature=settings.temperature,
         nominal_temperature=settings.temperature
     )
-    simulation.options('nopage', 'nomod', rshunt=1e9, trtol=1)
+    settings.simulation.options.apply(simulation, 'nopage', 'nomod', rshunt=1e9, trtol=1)
+    if initial_state:
+        simulation.initial_condition(**initial_state)
+    if measure_c2q:
+        # Only look at crossings after the activation edge starts slewing; this skips the lockdown
+        # edges and any output activity they cause
+        output_is_rising = output_transition == '01'
+        v_q_active = vdd * (th_rise if output_is_rising else th_fall)
+        simulation.options('autostop')
+        simulation.measure(
+            'tran', 'c2q',
+            f'trig v(vclk) val={float(vdd*th_clk_active)} {"rise" if clk_is_rising else "fall"}=1 td={float(t_final_edge)}',
+            f'targ v(vout) val={float(v_q_active)} {"rise" if output_is_rising else "fall"}=1 td={float(t_final_edge)}',
+            run=False
+        )
     simulation.transient(
-        step_time=min(t_data_slew, t_clk_slew)/4,
-        end_time=t_data_start + data_pulse_width + t_stabilizing,
+        step_time=settings.simulation.options.step_time(min(t_data_slew, t_clk_slew), 4,
+                                                        utils.cell_timestep(config, settings)),
+        end_time=t_sim_end,
         run=False
     )
 
@@ -541,6 +722,32 @@ def sim_latch(cell, config, settings, path, state_map, capacitive_load=None,
     return (simulator, simulation)
 
 
+def get_latch_state(cell, config, settings, path, state_map, **sim_kwargs):
+    """Simulate the lockdown phase once and return the settled node voltages.
+
+    The returned dict maps node names to voltages. Pass it to sim_latch as initial_state so that
+    each subsequent simulation for the same path, state map and slews can skip the lockdown pulse
+    and stabilizing time. Returns an empty dict on dry runs, which makes sim_latch fall back to
+    simulating the full lockdown sequence."""
+    simulator, simulation = sim_latch(cell, config, settings, path, state_map,
+                                      circuit_title='get_latch_state', lockdown_only=True,
+                                      **sim_kwargs)
+
+    if settings.dry_run:
+        # TODO: Display a message if not settings.quiet
+        return {}
+
+    try:
+        analysis = simulator.run(simulation)
+    except Exception as e:
+        raise ProcedureFailedException(f'get_latch_state failed for cell {cell.name}') from e
+
+    # Keep nodes driven by the cell; the stimulus and supply nodes are set by their sources
+    driven_nodes = {'vclk', 'vdata'} | {node.name.lower() for node in settings.named_nodes}
+    return {name: float(voltage[-1]) for name, voltage in analysis.nodes.items()
+            if name.lower() not in driven_nodes and '#' not in name}
+
+
 def get_t_stabilizing(cell, config, settings, path, state_map, k=2, th_low=0.03, th_high=0.99, **sim_kwargs):
     """Find a reasonable estimate of the stabilizing time for the current configuration.
 
@@ -564,29 +771,76 @@ def get_t_stabilizing(cell, config, settings, path, state_map, k=2, th_low=0.03,
     *_, output_transition = path
     output_is_rising = output_transition == '01'
     vdd = settings.primary_power.voltage * settings.units.voltage
-    v_start = vdd * (th_low if output_is_rising else th_high)
-    v_end = vdd - v_start
-    time = np.array(analysis.time)
-    vout = np.array(analysis['vout'])
-
-    # Measure transient time
-    start_crossings = np.where(np.diff(((np.sign(vout - v_start)) > 0) if output_is_rising else \
-                                       ((np.sign(vout - v_start)) < 0)))
-    end_crossings = np.where(np.diff(((np.sign(vout - v_end)) > 0) if output_is_rising else \
-                                     ((np.sign(vout - v_end)) < 0)))
-    transient_time = abs(time[end_crossings[-1]][0] - time[start_crossings[-1]][0])
+    v_start = float(vdd * (th_low if output_is_rising else th_high))
+    v_end = float(vdd) - v_start
+    time = np.asarray(analysis.time)
+    vout = np.asarray(analysis.nodes['vout'])
+
+    # Measure the final transient of the output
+    transient_time = abs(float(measure.transition(time, vout, v_start, v_end,
+                                                  occurrence=-1)))
+    if math.isnan(transient_time):
+        raise ProcedureFailedException(f'get_t_stabilizing failed for cell {cell.name}: output never transitions')
     return (k*transient_time @ PySpice.Unit.u_s).convert(settings.units.time.prefixed_unit)
 
 
+def stabilizing_time(cell, config, settings, path, state_maps, k=2, debug_dir=None):
+    """Return the stabilizing time for a path, measuring it only if it has not been cached.
+
+    Stabilizing time barely changes with slew or state, so it is measured with get_t_stabilizing
+    once per path and set of state maps: at the slowest clock and data slews and the largest
+    constraint load, for each state map, keeping the longest. The result is reused for every
+    variation, state map and search step of the path, and cached alongside other per-cell results
+    so that later tasks and runs skip the measurement. Procedures measure it in a preparation task
+    (see measure_stabilizing_time), so their other tasks always find it cached."""
+    loads = config.parameters['metastability_constraint_load']
+    conditions = {
+        'clock_slew': max(config.parameters['clock_slews']),
+        'data_slew': max(config.parameters['data_slews']),
+        'load': max(loads if isinstance(loads, list) else [loads]),
+        'k': k,
+    }
+    stabilizing_times = cache.stabilizing_times(settings)
+    key = cache.stabilizing_time_key(cell, config, settings, path, state_maps=state_maps, **conditions)
+    t_cached = stabilizing_times.get(key)
+    if t_cached is not None and not settings.dry_run:
+        return (t_cached @ PySpice.Unit.u_s).convert(settings.units.time.prefixed_unit)
+
+    t_stabilizing = max(get_t_stabilizing(cell, config, settings, path, state_map, k=k,
+                                          clock_slew_rate=conditions['clock_slew'] * settings.units.time,
+                                          data_slew_rate=conditions['data_slew'] * settings.units.time,
+                                          capacitive_load=conditions['load'] * settings.units.capacitance,
+                                          debug_dir=debug_dir)
+                        for state_map in state_maps)
+    if not settings.dry_run:
+        stabilizing_times.put(key, float(t_stabilizing))
+    return t_stabilizing
+
+
+@preparation
+def measure_stabilizing_time(cell, config, settings, path, state_maps):
+    """Measure the stabilizing time for a path and cache it (see stabilizing_time).
+
+    Sequential procedures yield this as a preparation task for each path they test, so that the
+    stabilizing time is measured once before any of their other tasks start. Otherwise, each task
+    started before the first one finished would measure it again. Procedures which test the same
+    path with the same state maps yield the same task, which only runs once."""
+    debug_dir = settings.debug_dir / cell.name / 'stabilizing_time' if settings.debug else None
+    stabilizing_time(cell, config, settings, path, state_maps, debug_dir=debug_dir)
+
+
 def get_c2q(cell, config, settings, path, state_map, debug_dir=None, **sim_kwargs):
     """Build a SPICE testbench and run a transient simulation to get the clock-to-q delay
-    for a given setup skew / hold skew, load capacitance, and stabilizing time."""
+    for a given setup skew / hold skew, load capacitance, and stabilizing time.
+
+    The delay is taken by an ngspice .meas on the final clock edge, so the transient stops as soon
+    as Q latches. Returns NaN if Q never latches (i.e. the measurement fails)."""
 
     # Build latch simulation
     try:
         simulator, simulation = sim_latch(cell, config, settings, path, state_map,
                                           circuit_title='get_c2q', debug_dir=debug_dir,
-                                          **sim_kwargs)
+                                          measure_c2q=True, **sim_kwargs)
     except ValueError:
         # If t_setup + t_hold < 0 fail immediately
         return float('nan')
@@ -603,41 +857,12 @@ def get_c2q(cell, config, settings, path, state_map, debug_dir=None, **sim_kwarg
         msg = f'Procedure get_c2q failed for cell {cell.name} with kwargs {kwarg_str}'
         raise ProcedureFailedException(msg) from e
 
-    # Set up post-processing parameters
-    data_pin, data_transition, output_pin, output_transition = path
-    vdd = settings.primary_power.voltage * settings.units.voltage
-    vss = settings.primary_ground.voltage * settings.units.voltage
-    th_low = settings.logic_thresholds.low
-    th_high = settings.logic_thresholds.high
-    th_rise = settings.logic_thresholds.rising
-    th_fall = settings.logic_thresholds.falling
-
-    # Check whether Q latched the D value by looking at vout after the 3rd clock edge
-    time = np.array(analysis.time)
-    vout = np.array(analysis['vout'])
-    vclk = np.array(analysis['vclk'])
+    # A failed measurement (Q never latches; overconstrained setup/hold window) is simply absent
+    return float(analysis.measurements.get('c2q', float('nan')))
 
-    # Find the time where the 3rd clock edge crosses the activation threshold
-    clk_is_rising = state_map[cell.clock.name] == '1'
-    th_clk_active = th_rise if clk_is_rising else th_fall
-    v_clk_active = vdd*th_clk_active
-    clk_crossings = np.where(np.diff(np.sign(vclk - v_clk_active)) > 0)[0] if clk_is_rising else \
-                    np.where(np.diff(np.sign(vclk - v_clk_active)) < 0)[0]
-    if len(clk_crossings) < 2:
-        # TODO: Log why the procedure failed (not enough clock edges; error in clk wave gen)
-        return float('nan')
-    t_clk_edge = np.interp(v_clk_active, [vclk[clk_crossings[-1]], vclk[clk_crossings[-1] + 1]],
-                                         [time[clk_crossings[-1]], time[clk_crossings[-1] + 1]])
 
-    # Find when the output pin activates (i.e. Q latches) relative to the clock edge
-    output_is_rising = output_transition == '01'
-    v_q_active = vdd * (th_rise if output_is_rising else th_fall)
-    q_crossings = np.where(np.diff(np.sign(vout - v_q_active)) > 0)[0] if output_is_rising else \
-                  np.where(np.diff(np.sign(vout - v_q_active)) < 0)[0]
-    if len(q_crossings) < 1:
-        # TODO: Log why the procedure failed (Q never latches; overconstrained setup/hold window)
-        return float('nan')
-    t_q_edge = np.interp(v_q_active, [vout[q_crossings[-1]], vout[q_crossings[-1] + 1]],
-                                     [time[q_crossings[-1]], time[q_crossings[-1] + 1]])
+def probe_c2q(skew_name, skew, **kwargs):
+    """Return get_c2q(**kwargs) with one skew ('setup_skew' or 'hold_skew') set to skew.
 
-    return t_q_edge - t_clk_edge
+    Bound with functools.partial, this gives constraint searches a picklable probe."""
+    return get_c2q(**kwargs, **{skew_name: skew})
@@ -1,11 +1,25 @@
+import functools
+import math
+
 import PySpice
 
-from charlib.characterizer import utils, plots
+from charlib.characterizer import utils
 from charlib.characterizer.cell import Port
-from charlib.characterizer.procedures import register, ProcedureFailedException
+from charlib.characterizer.procedures import register
+from charlib.characterizer.procedures.sequential.constraint.metastability.binary_search import (
+    C2Q_DEGRADATION)
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    get_c2q, get_latch_state, measure_stabilizing_time, stabilizing_time)
 from charlib.liberty import liberty
+from charlib.liberty.library import LookupTable
 
-@register
+@register(
+    'data_slews',
+    'clock_slews',
+    'metastability_constraint_search_tolerance',
+    'metastability_constraint_search_timestep',
+    'metastability_constraint_load'
+)
 def min_pulse_width_constraint(cell, config, settings):
     """Find the minimum pulse width required for the trigger to activate the device.
 
@@ -13,13 +27,121 @@ def min_pulse_width_constraint(cell, config, settings):
 
     For example, for a rising-edge DFF with an asynchronous reset, the minimum pulse width is the
     minimum time the clock signal must be active before the rising edge in order to reset the
-    device state."""
-    for pin in cell.filter_pins(direction='input', trigger=Port.Trigger.EDGE):
-        yield (find_min_pulse_width, cell, config, settings, pin)
+    device state.
+
+    Each (pin, polarity, slew) is searched in an independent task, so they run in parallel. Only
+    clock pins are tested."""
+    paths = list(capture_paths(cell))
+    if not paths:
+        return
+    for (path, state_maps) in paths:
+        yield (measure_stabilizing_time, cell, config, settings, path, state_maps)
+    for variation in config.variations(
+            'clock_slews',
+            'metastability_constraint_search_tolerance',
+            'metastability_constraint_search_timestep',
+            'metastability_constraint_load'):
+        for pin in cell.filter_pins(direction='input', role='clock', trigger=Port.Trigger.EDGE):
+            for polarity in ['high', 'low']:
+                yield (find_min_pulse_width, cell, config, settings, pin, polarity, variation, paths)
+
+def capture_paths(cell):
+    """Yield (path, state_maps) for each path through which a clock edge registers data.
+
+    Only paths to the first output with such conditions are used, as the pulse width constraint
+    belongs to the clock pin rather than an output."""
+    if cell.clock is None:
+        return
+    for output_pin in cell.outputs:
+        paths = []
+        for path in cell.paths():
+            if path[2] != output_pin:
+                continue
+            state_maps = [state_map for state_map in cell.nonmasking_conditions_for_path(*path)
+                          if cell.clock.is_asserted(state_map[cell.clock.name])]
+            if state_maps:
+                paths.append((path, state_maps))
+        if paths:
+            yield from paths
+            return
+
+def probe_pulse_width(width_name, width, **kwargs):
+    """Return get_c2q(**kwargs) with one clock phase ('active_width' or 'inactive_width') set to
+    width.
+
+    When the inactive phase is shortened, data is switched during the preceding active phase, so
+    that the inactive phase must be long enough to register it. Bound with functools.partial, this
+    gives pulse width searches a picklable probe."""
+    if width_name == 'inactive_width':
+        kwargs['setup_skew'] = width + kwargs['stabilizing_time']/2
+    return get_c2q(**kwargs, **{width_name: width})
+
+def find_min_pulse_width(cell, config, settings, input_pin, polarity, variation, paths):
+    """Find the minimum high or low pulse width for input_pin with the given slew.
+
+    A pulse passes if the clock-to-q delay of the following (or, for the inactive phase, enclosing)
+    activation edge is within C2Q_DEGRADATION of the delay with a pulse as long as the stabilizing
+    time. This method tests all nonmasking conditions for each path and returns the worst-case
+    (i.e. largest) pulse width.
+
+    :param cell: A Cell object to test.
+    :param config: A CellTestConfig object containing cell-specific test configuration details.
+    :param settings: A CharacterizationSettings object containing library-wide configuration
+                     details.
+    :param input_pin: The clock Pin under test.
+    :param polarity: 'high' or 'low'.
+    :param variation: A dict containing test parameters for this configuration variation, such
+                      as slew rates and constraint search bounds.
+    :param paths: A list of (path, state_maps) tuples from capture_paths.
+    """
+    clock_slew = variation['clock_slews'] * settings.units.time
+    load = variation['metastability_constraint_load'] * settings.units.capacitance
+    tolerance = variation['metastability_constraint_search_tolerance'] * settings.units.time
+    step = variation['metastability_constraint_search_timestep'] * settings.units.time
+    # A high pulse is the active phase of a rising-edge clock, and the inactive phase otherwise
+    width_name = 'active_width' if (polarity == 'high') != input_pin.is_inverted() else 'inactive_width'
+
+    if settings.dry_run:
+        # TODO: Display a message if not settings.quiet
+        return min_pulse_width_group(cell, config, settings, input_pin, polarity, clock_slew,
+                                     -1 @ PySpice.Unit.u_s)
+
+    worst = None
+    for (path, state_maps) in paths:
+        t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps)
+        for state_map in state_maps:
+            c2q_kwargs = dict(cell=cell, config=config, settings=settings, path=path,
+                              state_map=state_map, clock_slew_rate=clock_slew,
+                              setup_skew=t_stabilizing, hold_skew=2*t_stabilizing,
+                              stabilizing_time=t_stabilizing, capacitive_load=load)
+            if width_name == 'active_width':
+                # The lockdown pulse is not under test, so only simulate it once
+                c2q_kwargs['initial_state'] = get_latch_state(
+                    cell, config, settings, path, state_map, clock_slew_rate=clock_slew,
+                    stabilizing_time=t_stabilizing, capacitive_load=load)
+            probe_fn = functools.partial(probe_pulse_width, width_name, **c2q_kwargs)
+            ref_c2q = probe_fn(t_stabilizing)
+            threshold = ref_c2q * (1 + C2Q_DEGRADATION) if not math.isnan(ref_c2q) else math.inf
+            (width, *_) = utils.find_min_valid(probe_fn, start=t_stabilizing, step=step,
+                                               tolerance=tolerance, threshold=threshold,
+                                               k=settings.simulation.constraint_search_parallelism,
+                                               probe_map=utils.probe_map(settings))
+            worst = width if worst is None else max(worst, width)
+    return min_pulse_width_group(cell, config, settings, input_pin, polarity, clock_slew, worst)
 
-def find_min_pulse_width(cell, config, settings, input_pin):
-    """Find the minimum pulse width for input_pin across all combinations of test parameters.
+def min_pulse_width_group(cell, config, settings, input_pin, polarity, clock_slew, width):
+    """Return a liberty cell group holding the min_pulse_width of input_pin for one polarity and
+    clock slew, as a single-entry LUT which is merged with the other slews"""
+    result = cell.liberty
+    t_unit = settings.units.time.prefixed_unit
+    timing_group = liberty.Group('timing')
+    timing_group.add_attribute('related_pin', input_pin.name)
+    timing_group.add_attribute('timing_type', 'min_pulse_width')
+    lut = LookupTable('rise_constraint' if polarity == 'high' else 'fall_constraint',
+                      f'min_pulse_width_template_{len(config.parameters["clock_slews"])}',
+                      constrained_pin_transition=[clock_slew.convert(t_unit).value])
+    lut.values[0] = width.convert(t_unit).value
+    timing_group.add_group(lut)
+    result.group('pin', input_pin.name).add_group(timing_group)
 
-    This method tests every test configuration variation and nonmasking condition to find the
-    minimum pulse width for the target input_pin."""
-    return cell.liberty # TODO
+    return result
@@ -1,30 +1,43 @@
-import PySpice
+from charlib.characterizer.procedures import register
+from charlib.characterizer.procedures.sequential.constraint.asynchronous import (
+    control_paths, find_control_constraint)
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    measure_stabilizing_time)
 
-from charlib.characterizer import utils, plots
-from charlib.characterizer.cell import Port
-from charlib.characterizer.procedures import register, ProcedureFailedException
-from charlib.liberty import liberty
-
-@register
+@register(
+    'data_slews',
+    'clock_slews',
+    'metastability_constraint_search_tolerance',
+    'metastability_constraint_search_timestep',
+    'metastability_constraint_load'
+)
 def removal_constraint(cell, config, settings):
     """Find the mimimum time a control pin must remain active after the trigger.
 
     This is analagous to hold time for an asynchronous control pin.
 
     For example, for a rising-edge DFF with an asynchronous reset, removal time is the minimum time
-    that the reset signal must remain active after the rising clock edge in order to reset the
-    device state."""
-    for variation in config.variations('clock_slews', 'data_slews'):
-        for path in cell.paths():
-            yield (find_min_removal_time_for_path, cell, config, settings, variation, path)
+    that the reset signal must remain active after the rising clock edge for the clock edge to be
+    ignored. Only set and reset pins are tested (see asynchronous.control_paths)."""
+    paths = list(control_paths(cell))
+    for (path, state_maps) in paths:
+        yield (measure_stabilizing_time, cell, config, settings, path, state_maps)
+    for variation in config.variations(
+            'data_slews',
+            'clock_slews',
+            'metastability_constraint_search_tolerance',
+            'metastability_constraint_search_timestep',
+            'metastability_constraint_load'):
+        for (path, state_maps) in paths:
+            yield (find_min_removal_time_for_path, cell, config, settings, variation, path, state_maps)
 
-def find_min_removal_time_for_path(cell, config, settings, variation, path):
-    """Find the minimum time a control pin must remain active in order to affect device state.
+def find_min_removal_time_for_path(cell, config, settings, variation, path, state_maps):
+    """Find the minimum time a control pin must remain active after the trigger to hold its state.
 
-    This method tests all nonmasking conditions for the path through the cell and finds the minumum
-    removal constraint for each. Nonmasking conditions are annotated in the 'when' and 'sdf_cond'
-    fields of the timing tables on the returned liberty cell groups.
+    This method tests all nonmasking conditions for the path through the cell and returns the
+    worst-case (i.e. largest) removal constraint for this variation. See
+    asynchronous.find_control_constraint for details.
 
     Removal timing tables are indexed by the transition time of a related trigger pin (usually a
     clock) and the transition time of the constrained control pin (usually set or reset)."""
-    return cell.liberty # TODO
+    return find_control_constraint('removal', cell, config, settings, variation, path, state_maps)
@@ -1,15 +1,156 @@
 import PySpice
+import numpy as np
 
-from charlib.characterizer import utils, plots
+from charlib.characterizer import measure
 from charlib.characterizer.procedures import register, ProcedureFailedException
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    get_latch_state, measure_stabilizing_time, sim_latch, stabilizing_time)
 from charlib.liberty import liberty
+from charlib.liberty.library import LookupTable
 
-@register
+# The number of times the transient is lengthened (by doubling the stabilizing time) if the output
+# has not finished transitioning by the end of it
+MAX_EXTENSIONS = 3
+
+@register('clock_slews', 'loads', 'data_slews', 'metastability_constraint_load')
 def sequential_worst_case(cell, config, settings):
-    """Measure worst-case sequential transient and propagation delays"""
-    for variation in config.variations('data_slews', 'loads'):
-        for path in cell.paths():
-            yield (measure_delays_for_path, cell, config, settings, variation, path)
+    """Measure worst-case sequential transient and propagation delays
+
+    Each point on the clock slew × load grid of each output transition is measured in a separate
+    task, so they run in parallel."""
+    # Paths from different data pins to the same output transition share a timing arc from the clock
+    arcs = {}
+    for path in cell.paths():
+        state_maps = list(cell.nonmasking_conditions_for_path(*path))
+        if state_maps:
+            (*_, output_pin, output_transition) = path
+            arcs.setdefault((output_pin, output_transition), []).append((path, state_maps))
+            yield (measure_stabilizing_time, cell, config, settings, path, state_maps)
+    for paths in arcs.values():
+        for variation in config.variations('clock_slews', 'loads'):
+            yield (measure_delays_for_path, cell, config, settings, variation, paths)
+
+def measure_clock_to_q(time, v_clk, v_out, clk_threshold, clk_direction, out_threshold,
+                       transition_thresholds, out_direction):
+    """Measure the clock-to-q delay and output transition time from one activation edge.
+
+    :param time: The time vector.
+    :param v_clk: The clock waveform.
+    :param v_out: The output waveform.
+    :param clk_threshold: The clock voltage at which the edge is considered to occur.
+    :param clk_direction: 'rise' or 'fall'.
+    :param out_threshold: The output voltage at which the output is considered to switch.
+    :param transition_thresholds: The (start, end) output voltages of the transition.
+    :param out_direction: 'rise' or 'fall'.
+    :return: A (delay, transition) tuple in seconds. Either may be NaN if the output never switches.
+    """
+    t_clk = measure.crossings(time, v_clk, clk_threshold, clk_direction)
+    delay = measure.crossings(time, v_out, out_threshold, out_direction, after=t_clk) - t_clk
+    transition = measure.transition(time, v_out, *transition_thresholds, after=t_clk)
+    return (float(delay), float(transition))
+
+def measure_delays_for_path(cell, config, settings, variation, paths, criterion=max):
+    """Measure the clock-to-q delay and output transition time for one output transition at one
+    clock slew and load.
+
+    For each path through the cell to the output transition and each of its nonmasking conditions,
+    the state before the clock edge is established once with get_latch_state. The clock activation
+    edge is then simulated with the latch test bench (see sim_latch), with relaxed setup and hold
+    times so that data is always captured. The delay selected using the passed criterion function
+    is used for the table entry, which is merged with the other points of the grid.
+
+    Clock-to-q tables are indexed by clock slew and load only. The data input switches a
+    stabilizing time before the clock edge, and has settled by the time the edge arrives, so its
+    slew does not change the delay. It is fixed at the smallest of config.parameters['data_slews'],
+    which is why this procedure registers data_slews.
+
+    :param cell: A Cell object to test.
+    :param config: A CellTestConfig object containing cell-specific test configuration details.
+    :param settings: A CharacterizationSettings object containing library-wide configuration
+                     details.
+    :param variation: A dict containing the clock slew and load for this table entry.
+    :param paths: A list of (path, state_maps) tuples, each with a list in the format [input_pin,
+                  input_transition, output_pin, output_transition] and its nonmasking conditions.
+                  Every path must have the same output pin and transition.
+    :param criterion: A function which returns a single value given a list of numeric values.
+                      Default max.
+    """
+    (*_, output_pin, output_transition) = paths[0][0]
+    vdd = settings.primary_power.voltage * settings.units.voltage
+    th = settings.logic_thresholds
+    output_is_rising = output_transition == '01'
+    out_direction = 'rise' if output_is_rising else 'fall'
+    out_threshold = float(vdd * (th.rising if output_is_rising else th.falling))
+    transition_thresholds = tuple(float(vdd * t) for t in ((th.low, th.high) if output_is_rising else (th.high, th.low)))
+    clock_slew = variation['clock_slews']
+    load = variation['loads']
+    data_slew = min(config.parameters['data_slews']) * settings.units.time
+
+    delays = []
+    transitions = []
+    for (path, state_maps) in paths:
+        t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps)
+        for state_map in state_maps:
+            clk_is_rising = state_map[cell.clock.name] == '1'
+            clk_direction = 'rise' if clk_is_rising else 'fall'
+            clk_threshold = float(vdd * (th.rising if clk_is_rising else th.falling))
+
+            # Establish the state before the clock edge once for every simulation of the edge
+            latch_state = get_latch_state(cell, config, settings, path, state_map,
+                                          clock_slew_rate=clock_slew * settings.units.time,
+                                          data_slew_rate=data_slew,
+                                          stabilizing_time=t_stabilizing,
+                                          capacitive_load=load * settings.units.capacitance)
+
+            t_hold = t_stabilizing
+            for _ in range(MAX_EXTENSIONS + 1):
+                (simulator, simulation) = sim_latch(cell, config, settings, path, state_map,
+                                                    capacitive_load=load * settings.units.capacitance,
+                                                    clock_slew_rate=clock_slew * settings.units.time,
+                                                    data_slew_rate=data_slew,
+                                                    setup_skew=t_stabilizing, hold_skew=t_hold,
+                                                    stabilizing_time=t_hold,
+                                                    circuit_title='clock_to_q',
+                                                    initial_state=latch_state)
+                if settings.dry_run:
+                    # TODO: Display a message if not settings.quiet
+                    (delay, transition) = (-1, -1)
+                    break
+                try:
+                    analysis = simulator.run(simulation)
+                except Exception as e:
+                    msg = f'Procedure measure_delays_for_path failed for cell {cell.name} ' \
+                          f'with clock slew {clock_slew}, load {load}, pin states {state_map}'
+                    raise ProcedureFailedException(msg) from e
+                (delay, transition) = measure_clock_to_q(
+                    np.asarray(analysis.time), np.asarray(analysis.nodes['vclk']),
+                    np.asarray(analysis.nodes['vout']), clk_threshold, clk_direction, out_threshold,
+                    transition_thresholds, out_direction)
+                if not np.isnan(transition):
+                    break
+                # The output may not have finished switching before the transient ended
+                t_hold = 2*t_hold
+            if np.isnan(delay) or np.isnan(transition):
+                raise ProcedureFailedException(
+                    f'Procedure measure_delays_for_path failed for cell {cell.name}: output '
+                    f'{output_pin} never switched with clock slew {clock_slew}, load {load}, '
+                    f'pin states {state_map}')
+            delays.append(delay)
+            transitions.append(transition)
+
+    # Select the worst-case delays and build single-entry LUTs, which are merged with the rest of
+    # the grid
+    result = cell.liberty
+    timing_group = liberty.Group('timing')
+    timing_group.add_attribute('related_pin', cell.clock.name)
+    timing_group.add_attribute('timing_type', 'falling_edge' if cell.clock.is_inverted() else 'rising_edge')
+    lut_template_size = f'{len(config.parameters["loads"])}x{len(config.parameters["clock_slews"])}'
+    for (lut_name, measured) in [(f'cell_{out_direction}', delays),
+                                 (f'{out_direction}_transition', transitions)]:
+        lut = LookupTable(lut_name, f'delay_template_{lut_template_size}',
+                          total_output_net_capacitance=[load], input_net_transition=[clock_slew])
+        lut.values[0,0] = (criterion(measured) @ PySpice.Unit.u_s).convert(settings.units.time.prefixed_unit).value
+        timing_group.add_group(lut)
+    result.group('pin', output_pin).add_group(timing_group)
 
-def measure_delays_for_path(cell, config, settings, variation, path, criterion=max):
-    return cell.liberty # TODO
+    return result
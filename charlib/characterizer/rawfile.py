@@ -0,0 +1,97 @@
+"""Memory-mapped reader for binary SPICE raw files"""
+
+import mmap
+import re
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def vector_name(name: str) -> str:
+    """Normalize a raw file variable name to ngspice vector naming, e.g. v(out) -> out"""
+    name = name.lower()
+    if match := re.fullmatch(r'v\((.+)\)', name):
+        return match.group(1)
+    if match := re.fullmatch(r'i\((.+)\)', name):
+        return f'{match.group(1)}#branch'
+    return name
+
+
+class RawPlot(Mapping):
+    """One plot (analysis result) from a binary raw file.
+
+    Maps vector names to read-only numpy views onto the memory-mapped file. Views are created on
+    lookup and only decode data when their values are accessed, so vectors that are never used are
+    never read from disk.
+    """
+
+    def __init__(self, buffer, header: dict, variables: list, data_offset: int):
+        self.title = header.get('Title', '')
+        self.name = header.get('Plotname', '')
+        self.is_complex = 'complex' in header.get('Flags', '')
+        self.n_points = int(header['No. Points'])
+        self.variables = [vector_name(name) for name in variables]
+        self._buffer = buffer
+        self._offset = data_offset
+        self._indices = {name: i for i, name in enumerate(self.variables)}
+
+    @property
+    def size(self) -> int:
+        """The size of this plot's data block in bytes"""
+        return self.n_points * len(self.variables) * (16 if self.is_complex else 8)
+
+    def __getitem__(self, name) -> np.ndarray:
+        index = self._indices[vector_name(name)]
+        dtype = np.dtype('<c16' if self.is_complex else '<f8')
+        # Values are stored point by point, so each vector is a strided view across the points
+        return np.ndarray(shape=(self.n_points,), dtype=dtype, buffer=self._buffer,
+                          offset=self._offset + index*dtype.itemsize,
+                          strides=(len(self.variables)*dtype.itemsize,))
+
+    def __iter__(self):
+        return iter(self.variables)
+
+    def __len__(self):
+        return len(self.variables)
+
+
+class RawFile:
+    """A binary raw file, as written by ngspice or Xyce, containing one or more plots.
+
+    The file is memory-mapped rather than read. The mapping stays valid for as long as any vector
+    view refers to it, even if the file is later deleted or replaced.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.plots = []
+        offset = 0
+        while offset < len(self._buffer):
+            plot = self._read_plot(offset)
+            self.plots.append(plot)
+            offset = plot._offset + plot.size
+
+    def _read_plot(self, offset) -> RawPlot:
+        """Parse the header starting at offset and return the plot that follows it"""
+        header = {}
+        variables = []
+        while True:
+            end = self._buffer.find(b'\n', offset)
+            if end < 0:
+                raise ValueError(f'Unexpected end of raw file header at byte {offset}')
+            line = self._buffer[offset:end].decode('utf-8', errors='replace')
+            offset = end + 1
+            key, _, value = line.partition(':')
+            if key == 'Binary':
+                break
+            elif key == 'Values':
+                raise ValueError('ASCII raw files are not supported. Use "set filetype=binary".')
+            elif key == 'Variables':
+                for _ in range(int(header['No. Variables'])):
+                    end = self._buffer.find(b'\n', offset)
+                    variables.append(self._buffer[offset:end].decode('utf-8').split()[1])
+                    offset = end + 1
+            else:
+                header[key.strip()] = value.strip()
+        return RawPlot(self._buffer, header, variables, offset)
@@ -2,10 +2,16 @@
 
 import csv
 import math
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
 
 import PySpice
 import numpy as np
 
+from charlib.characterizer.ngspice_pipe import PipeSimulator
+from charlib.characterizer.ngspice_shared import SharedSimulator
+
 
 class PinStateMap:
     """Connect ports of a cell to the appropriate waveforms for a test.
@@ -91,52 +97,167 @@ def init_circuit(title, cell_netlist, models, supplies, units):
             circuit.V(supply.subscript, supply.name, circuit.gnd, supply.voltage*units.voltage)
     return circuit
 
-def find_min_valid(probe_fn, start, step, tolerance, max_exp=1000):
+def get_simulator(backend):
+    """Return a simulator for the given backend (from SimulationSettings.backend)
+
+    The ngspice-pipe and ngspice-shared backends are provided by CharLib. All other backends are
+    created by PySpice. Vectors returned by the ngspice-shared backend are only valid until its next
+    run (see SharedSimulator).
+    """
+    if backend == 'ngspice-pipe':
+        return PipeSimulator()
+    if backend == 'ngspice-shared':
+        return SharedSimulator()
+    return PySpice.Simulator.factory(simulator=backend)
+
+def cell_timestep(config, settings):
+    """Return the fixed transient timestep for a cell (from CellTestConfig.timestep), or None"""
+    return config.timestep * settings.units.time if config.timestep else None
+
+def find_min_valid(probe_fn, start, step, tolerance, max_exp=1000, threshold=None, k=1, probe_map=map,
+                   seed=None, margin=None):
     """Find the minimum x such that probe_fn(x) is not NaN.
     When flipflop fails to latch the correct value, get_c2q returns NaN.
 
     Setup and hold times may be negative, so start must be a guaranteed-valid point
     (large enough that the cell always latches). The search expands downward from
-    start to bracket the threshold, then binary searches upward to the minimum.
+    start to bracket the threshold, then searches upward to the minimum.
+
+    If threshold is given, probe_fn should return the measurement itself (e.g. c2q), and x is only
+    valid where it is below threshold. Since c2q rises smoothly towards the threshold before the
+    cell fails to latch, phase 2 then interpolates on (probe_fn(x) - threshold) using the Illinois
+    variant of regula falsi, falling back to bisection whenever an end of the bracket has no
+    measurement (i.e. the cell did not latch).
+
+    If k > 1, each round probes k candidates at once through probe_map: phase 1 tries the next k
+    expansions, and phase 2 splits the bracket into k + 1 equal parts (a k-ary search, without
+    interpolation). This takes more simulations, but fewer rounds if probe_map runs them in parallel.
+
+    If seed (an estimate of the result, such as the result of a similar search) is given, seed +
+    margin is probed first. If it is valid, the expansion starts there with a step of margin
+    instead of from start; otherwise it already brackets the result together with start, and the
+    expansion is skipped entirely.
 
     :param probe_fn:  A callable (float) -> float | NaN.
     :param start:     A guaranteed-valid starting point (probe_fn(start) is not NaN).
     :param step:      Initial step size for downward expansion.
-    :param tolerance: Convergence threshold; binary search stops when hi-lo < tolerance.
+    :param tolerance: Convergence threshold; the search stops when hi-lo < tolerance.
     :param max_exp:   Maximum number of exponential expansions before giving up.
+    :param threshold: Optional upper limit on valid probe_fn results.
+    :param k:         The number of candidates to probe in each round.
+    :param probe_map: A callable like map(probe_fn, candidates), e.g. Executor.map.
+    :param seed:      Optional estimate of the result.
+    :param margin:    Safety margin added to seed. Defaults to step.
     :returns:         Minimum valid x, or float('nan') if no invalid region is found below start.
     """
     phase1_candidates = []
     phase2_candidates = []
 
-    # Phase 1 — expand downward from start to find a lower bound (first failed latch)
+    threshold = None if threshold is None else float(threshold)
+    interpolate = threshold is not None and math.isfinite(threshold)
+    is_valid = lambda value: not math.isnan(value) and (threshold is None or value < threshold)
+    residual = lambda value: value - threshold if interpolate else float('nan')
+    probe_all = lambda candidates: [float(result) for result in probe_map(probe_fn, candidates)]
+
     hi = start
     lo = None
-    for exp in range(max_exp):
-        candidate = start - step * (2 ** exp)
+    (r_hi, r_lo) = (float('nan'), float('nan')) # start is never simulated
+
+    # Phase 0 — start just above the estimated result, if there is one
+    margin = step if margin is None else margin
+    if seed is not None and seed + margin < start:
+        candidate = seed + margin
         phase1_candidates.append(candidate)
-        result = probe_fn(candidate)
-        if math.isnan(result):
-            lo = candidate
-            break
-        hi = candidate
+        result = float(probe_fn(candidate))
+        if is_valid(result):
+            (start, step) = (candidate, margin)
+            (hi, r_hi) = (candidate, residual(result))
+        else:
+            (lo, r_lo) = (candidate, residual(result))
+
+    # Phase 1 — expand downward from start to find a lower bound (first failed latch)
+    exp = 0
+    while lo is None and exp < max_exp:
+        candidates = [start - step * (2 ** e) for e in range(exp, min(exp + k, max_exp))]
+        exp += len(candidates)
+        phase1_candidates += candidates
+        for (candidate, result) in zip(candidates, probe_all(candidates)):
+            if not is_valid(result):
+                (lo, r_lo) = (candidate, residual(result))
+                break
+            (hi, r_hi) = (candidate, residual(result))
 
     if lo is None:
         return hi, phase1_candidates, phase2_candidates
 
-    # Phase 2 — binary search between lo (NaN) and hi (valid)
+    # Phase 2 — search between lo (invalid) and hi (valid)
+    retained = None # Which end of the bracket was kept by the last step
     while (hi - lo) > tolerance:
-        mid = (lo + hi) / 2
+        if k > 1:
+            # Split the bracket evenly, then keep the valid candidates down from hi
+            mids = [hi + (lo - hi) * (i / (k + 1)) for i in range(1, k + 1)]
+            phase2_candidates += [(lo, mid, hi) for mid in mids]
+            for (mid, result) in zip(mids, probe_all(mids)):
+                if not is_valid(result):
+                    lo = mid
+                    break
+                hi = mid
+            continue
+
+        if math.isnan(r_lo) or math.isnan(r_hi):
+            mid = (lo + hi) / 2
+        else:
+            # Regula falsi, kept at least tolerance/2 inside the bracket so that a step which
+            # lands next to the boundary also closes the bracket from the other side
+            clamp = float(tolerance / 2 / (hi - lo))
+            weight = min(max(r_hi / (r_hi - r_lo), clamp), 1 - clamp)
+            mid = hi + (lo - hi) * weight
         phase2_candidates.append((lo, mid, hi))
-        if math.isnan(probe_fn(mid)):
-            lo = mid
+        result = float(probe_fn(mid))
+        if is_valid(result):
+            (hi, r_hi) = (mid, residual(result))
+            if retained == 'lo':
+                r_lo /= 2 # Illinois: lo was kept twice in a row
+            retained = 'lo'
         else:
-            hi = mid
+            (lo, r_lo) = (mid, residual(result))
+            if retained == 'hi':
+                r_hi /= 2 # Illinois: hi was kept twice in a row
+            retained = 'hi'
 
     # return hi because hi is always simulated and deemed valid
     return hi, phase1_candidates, phase2_candidates
 
 
+_probe_pool = None
+
+def start_probe_pool(workers):
+    """Start the pool of processes that probe_map runs probes on, for the lifetime of this process.
+
+    Characterizer workers call this as they start (see characterizer.init_worker). The pool's
+    processes are spawned rather than forked, so that they do not inherit the worker's simulator
+    state, and probes must be picklable. They share the worker's CPU set, which
+    Characterizer.executor sizes to fit them.
+    """
+    global _probe_pool
+    _probe_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    # Worker processes exit without running atexit handlers, but do run multiprocessing finalizers.
+    # Shut the pool down there, so that replaced workers don't leave its processes behind.
+    multiprocessing.util.Finalize(None, _probe_pool.shutdown, exitpriority=10)
+
+def probe_map(settings):
+    """Return a probe_map for find_min_valid which runs probes in parallel worker processes.
+
+    Returns the builtin map (running probes one at a time) unless
+    settings.simulation.constraint_search_parallelism is above 1 and this process has a probe pool
+    (see start_probe_pool). Processes without one, such as the workers of executors that are not
+    sized for probes, run probes one at a time.
+    """
+    if settings.simulation.constraint_search_parallelism <= 1 or _probe_pool is None:
+        return map
+    return _probe_pool.map
+
+
 def find_knee_point(boundary_points, chord_p0, chord_p1, arc_threshold=0.1):
     """Select a balanced (knee) setup/hold point from boundary samples.
 
@@ -4,7 +4,7 @@
 import argparse
 from pathlib import Path
 
-from charlib.cli import run, compare
+from charlib.cli import run, compare, tune
 
 def main():
     """Run CharLib CLI"""
@@ -25,6 +25,9 @@ def main():
     parser_compare = subparser.add_parser(
         'compare',
         help='(experimental) Compare two liberty files')
+    parser_tune = subparser.add_parser(
+        'tune',
+        help='Find the fastest simulator options within an accuracy bound and save them to the configuration')
 
     # Set up charlib run arguments
     parser_characterize.add_argument(
@@ -36,6 +39,9 @@ def main():
     parser_characterize.add_argument(
         '-j', '--jobs', type=int, default=0,
         help='Specify the number of concurrent jobs')
+    parser_characterize.add_argument(
+        '-s', '--solver-threads', type=int, default=0,
+        help='Specify the number of threads each simulation may use')
     parser_characterize.add_argument(
         '-n', '--no-sim', action='store_true',
         help='Perform all tasks except for running simulations')
@@ -44,6 +50,27 @@ def main():
         help='A list of one or more regex strings. charlib will only characterize cells matching one or more of the filters.')
     parser_characterize.set_defaults(func=run.run)
 
+    # Set up charlib tune arguments
+    parser_tune.add_argument(
+        'library', type=str,
+        help='The directory containing the library characterization configuration file, or the full path to the file')
+    parser_tune.add_argument(
+        '-o', '--output', type=str, default='',
+        help='Write the updated configuration to the specified file instead of modifying it in place')
+    parser_tune.add_argument(
+        '-j', '--jobs', type=int, default=0,
+        help='Specify the number of concurrent jobs')
+    parser_tune.add_argument(
+        '-f', '--filters', nargs='*',
+        help='A list of one or more regex strings. Only arcs from cells matching one or more of the filters are used for tuning.')
+    parser_tune.add_argument(
+        '-a', '--arcs', type=int, default=8,
+        help='The number of representative delay arcs to simulate for each option set')
+    parser_tune.add_argument(
+        '-t', '--tolerance', type=float, default=0.01,
+        help='The maximum relative error allowed against the tight-tolerance reference results')
+    parser_tune.set_defaults(func=tune.tune)
+
     # Set up charlib compare arguments
     def compare_helper(args):
         """Helper function for compare subcommand"""
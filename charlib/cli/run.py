@@ -27,6 +27,7 @@ def run(args):
     characterizer.settings.debug = characterizer.settings.debug or args.debug
     characterizer.settings.quiet = characterizer.settings.quiet or args.quiet
     characterizer.settings.jobs = args.jobs if args.jobs else characterizer.settings.jobs
+    characterizer.settings.solver_threads = args.solver_threads if args.solver_threads else characterizer.settings.solver_threads
     characterizer.settings.dry_run = characterizer.settings.dry_run or args.no_sim
 
     # Filter and add cells
@@ -0,0 +1,197 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools, re, time, yaml
+from pathlib import Path
+
+import numpy as np
+from PySpice.Logging import Logging
+
+from charlib.characterizer.characterizer import Characterizer, SolverOptions
+from charlib.characterizer.procedures import ProcedureFailedException
+from charlib.cli import utils
+
+# Tight tolerances used to produce the reference results
+REFERENCE_OPTIONS = {'method': 'gear', 'reltol': 1e-5, 'trtol': 1, 'timestep_divisor': 32, 'klu': False}
+
+# Candidate option sets to evaluate against the reference
+OPTION_GRID = {
+    'method': ['trap', 'gear'],
+    'reltol': [1e-3, 1e-4],
+    'trtol': [1, 7],
+    'timestep_divisor': [2, 4, 8],
+    'klu': [False, True],
+}
+
+
+def timed_task(task, *args):
+    """Run a characterization task. Return its runtime in seconds and its result."""
+    start = time.perf_counter()
+    result = task(*args)
+    return (time.perf_counter() - start, result)
+
+
+def table_values(cell_group) -> dict:
+    """Return a dict of the values of each lookup table in a liberty cell group"""
+    values = {}
+    for pin_group in cell_group.subgroups_with_name('pin'):
+        for timing_group in pin_group.subgroups_with_name('timing'):
+            for table in timing_group.groups.values():
+                key = (cell_group.identifier, pin_group.identifier,
+                       timing_group.attributes['related_pin'].value,
+                       timing_group.attributes['timing_type'].value, table.name,
+                       tuple(tuple(index) for index in table.index_values))
+                values[key] = table.values.flatten()
+    return values
+
+
+def run_tasks(characterizer, tasks, options: dict):
+    """Run tasks with the given solver options. Return total runtime and lookup table values."""
+    characterizer.settings.simulation.options = SolverOptions(**options)
+    runtime = 0
+    values = {}
+    with characterizer.executor() as executor:
+        futures = [executor.submit(timed_task, task, *args) for (task, *args) in tasks]
+        for future in futures:
+            (task_runtime, cell_group) = future.result()
+            runtime += task_runtime
+            values |= table_values(cell_group)
+    return (runtime, values)
+
+
+def max_relative_error(values: dict, reference: dict) -> float:
+    """Return the largest relative difference between corresponding values"""
+    errors = [np.max(np.abs(values[key] - ref) / np.maximum(np.abs(ref), np.finfo(float).tiny))
+              if key in values else np.inf for key, ref in reference.items()]
+    return max(errors, default=0.0)
+
+
+def set_yaml_block(text: str, keys: list, value) -> str:
+    """Set the value at a path of keys in a block-style YAML document, leaving the rest of the text
+    (including comments and formatting) untouched.
+
+    The last key's existing block is replaced. Any missing keys are added at the end of their
+    parent mapping. Raises ValueError if a parent key on the path holds an inline value (e.g. a
+    flow-style mapping), which can't be patched this way.
+    """
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    indentation = lambda line: len(line) - len(line.lstrip(' '))
+    is_content = lambda line: line.strip() and not line.lstrip().startswith('#')
+
+    # New blocks are indented like the document's existing nested mappings
+    nested_indents = sorted({indentation(line) for line in lines if is_content(line)} - {0})
+    step = nested_indents[0] if nested_indents else 2
+    dump = lambda value: yaml.safe_dump(value, sort_keys=False, default_flow_style=False, indent=step)
+
+    (start, end, parent_indent) = (0, len(lines), -step)
+    for (depth, key) in enumerate(keys):
+        children = [i for i in range(start, end) if is_content(lines[i])]
+        child_indent = indentation(lines[children[0]]) if children else parent_indent + step
+        match = next((i for i in children if indentation(lines[i]) == child_indent
+                      and re.match(rf'{re.escape(key)}\s*:(\s|$)', lines[i].lstrip(' '))), None)
+        if match is None:
+            # Add the rest of the path after the last line of the parent mapping
+            insert_at = children[-1] + 1 if children else start
+            nested = value
+            for missing_key in reversed(keys[depth:]):
+                nested = {missing_key: nested}
+            block = dump(nested)
+            lines[insert_at:insert_at] = [' '*child_indent + line + '\n' for line in block.splitlines()]
+            return ''.join(lines)
+
+        # The key's block runs until the next line indented no further than the key
+        block_end = next((i for i in range(match + 1, end)
+                          if is_content(lines[i]) and indentation(lines[i]) <= child_indent), end)
+        block_end = max([i + 1 for i in range(match + 1, block_end) if is_content(lines[i])],
+                        default=match + 1)
+        if depth == len(keys) - 1:
+            block = dump({key: value})
+            lines[match:block_end] = [' '*child_indent + line + '\n' for line in block.splitlines()]
+            return ''.join(lines)
+        if lines[match].split(':', 1)[1].split('#', 1)[0].strip():
+            raise ValueError(f'Unable to update {".".join(keys)}: {key} is not a block mapping')
+        (start, end, parent_indent) = (match + 1, block_end, child_indent)
+
+
+def write_options(config_file, options: dict, output=None):
+    """Write solver options into the settings of a config file (or a copy of it at output).
+
+    Only settings.simulation.options is changed; the rest of the file is kept as it was."""
+    config_file = Path(config_file)
+    with open(config_file, 'r') as file:
+        document = yaml.safe_load(file)
+    keys = ['settings', 'simulation', 'options']
+    if isinstance(document.get('settings'), str):
+        # Settings are stored in a separate YAML file: update that file instead
+        [config_file] = utils.find_yaml_files(config_file.parent / document['settings'])
+        keys = ['simulation', 'options']
+    text = set_yaml_block(config_file.read_text(), keys, options)
+    output = Path(output) if output else config_file
+    output.write_text(text)
+    return output
+
+
+def tune(args):
+    """Find the fastest solver options whose results are within tolerance of a tight reference"""
+    (config_file, config) = utils.find_config_file(args.library)
+    settings = config['settings']
+    cells = config['cells']
+    characterizer = Characterizer(**settings)
+    Logging.setup_logging(logging_level='ERROR') # FIXME: logging level should be configurable
+    characterizer.settings.quiet = characterizer.settings.quiet or args.quiet
+    characterizer.settings.jobs = args.jobs if args.jobs else characterizer.settings.jobs
+    characterizer.settings.dry_run = False
+    # Results cached by one option set would shorten the simulations of the next, so every option
+    # set simulates from scratch
+    characterizer.settings.cache = False
+    characterizer.settings.cache_dir = None
+    # Every option set runs the same single pass, so that runtimes and errors only reflect the
+    # options themselves
+    characterizer.settings.simulation.two_pass = False
+    characterizer.settings.simulation.quality_control = False
+    characterizer.settings.simulation.calibrate_timestep = False
+
+    # Pick an evenly spaced subset of combinational delay arcs as representative tasks
+    if args.filters:
+        cells = utils.filter_cells(cells, args.filters)
+    [characterizer.add_cell(n, p) for (n, p) in utils.read_cell_configs(cells)]
+    tasks = []
+    for (cell, config) in characterizer.cells:
+        # A cell's fixed timestep would take precedence over the timestep_divisor being tuned
+        config.timestep = None
+        if not cell.is_sequential:
+            tasks += characterizer.settings.simulation.combinational_delay(cell, config, characterizer.settings)
+    if not tasks:
+        raise RuntimeError('No combinational delay arcs available for tuning!')
+    tasks = tasks[::max(1, len(tasks) // args.arcs)][:args.arcs]
+
+    # Measure the reference, then each candidate in the option grid
+    (reference_runtime, reference) = run_tasks(characterizer, tasks, REFERENCE_OPTIONS)
+    if not characterizer.settings.quiet:
+        print(f'Reference: {reference_runtime:.2f} s for {len(tasks)} arcs')
+    best = None
+    for values in itertools.product(*OPTION_GRID.values()):
+        options = dict(zip(OPTION_GRID.keys(), values))
+        try:
+            (runtime, results) = run_tasks(characterizer, tasks, options)
+        except ProcedureFailedException:
+            if not characterizer.settings.quiet:
+                print(f'{options}: failed')
+            continue
+        error = max_relative_error(results, reference)
+        if not characterizer.settings.quiet:
+            print(f'{options}: {runtime:.2f} s, max error {100*error:.3f}%')
+        if error <= args.tolerance and (best is None or runtime < best[0]):
+            best = (runtime, options)
+
+    # Save the fastest options which meet the accuracy bound
+    if best is None:
+        raise RuntimeError(f'No option set is within {100*args.tolerance:g}% of the reference '
+                           f'results! The configuration was not changed.')
+    (runtime, options) = best
+    written_file = write_options(config_file, options, args.output)
+    if not characterizer.settings.quiet:
+        print(f'Selected {options} ({runtime:.2f} s, {reference_runtime/runtime:.1f}x faster than reference)')
+        print(f'Options written to {str(written_file.resolve())}')
@@ -30,6 +30,12 @@ def resolve_subkey(value, base_dir):
 
 def find_config(config_path, quiet=True):
     """Find an appropriately-formatted YAML file in `config_path`"""
+    (_, config) = find_config_file(config_path, quiet)
+    return config
+
+
+def find_config_file(config_path, quiet=True):
+    """Find an appropriately-formatted YAML file in `config_path`. Return its path and config."""
 
     if not quiet:
         print(f'Searching for YAML files at {str(config_path)}')
@@ -61,7 +67,7 @@ def find_config(config_path, quiet=True):
             config = None
     if not isinstance(config, dict):
         raise FileNotFoundError(f'No valid configuration found in {config_path}')
-    return config
+    return (file, config)
 
 
 def filter_cells(cells: dict, filters: list) -> dict:
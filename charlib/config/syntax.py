@@ -149,8 +149,10 @@ class ConfigFile:
                 'transient_sim_end_time',
                 description='Optional extended end time for transient simulations, specified in ' \
                             '``settings.units.time`` units. Default 0. This key is not usually ' \
-                            'required except when underdriving cells. When set to 0, the ' \
-                            'default end time of 1000*data_slew is used.'
+                            'required except when underdriving cells. Combinational delay ' \
+                            'simulations estimate their own end time from the output settling ' \
+                            'times measured for each arc, and extend it only when the output has ' \
+                            'not settled, up to the larger of this value and 1000*data_slew.'
             ), default=0
         ): Or(float, int),
         Optional(
@@ -205,6 +207,25 @@ class ConfigFile:
                             'resolution at the cost of more simulations. Defaults to 40.'
             ), default=40
         ) : int,
+        Optional(
+            Literal(
+                'timestep',
+                description='A fixed step time for this cell\'s transient simulations. Unit is ' \
+                            'specified by ``settings.units.time``. If omitted, each procedure ' \
+                            'uses a fraction of the fastest slew in its test bench, unless ' \
+                            '``settings.simulation.calibrate_timestep`` is set.'
+            )
+        ) : Or(float, int),
+        Optional(
+            Literal(
+                'family',
+                description='The name of the drive-strength family this cell belongs to. Of ' \
+                            'the cells with the same family and functions, the first is ' \
+                            'characterized before the others start, and its setup/hold results ' \
+                            'and settling times seed the searches for the others. If omitted, the ' \
+                            'family is the cell name without a drive strength suffix such as ``_X2``.'
+            )
+        ) : str,
         Optional(
             Literal(
                 'plots',
@@ -242,11 +263,117 @@ class ConfigFile:
                     description='Which PySpice simulator backend to use.\n' \
                                 '* ``ngspice-shared``: Runs ngspice simulations as a shared library within the same process.\n' \
                                 '* ``ngspice-subprocess``: Runs ngspice simulations in separate subprocesses.\n' \
+                                '* ``ngspice-pipe``: Runs ngspice simulations in persistent subprocesses ' \
+                                '(one per job, replaced every 16 tasks), driven interactively over a pipe.\n' \
                                 '* ``xyce-serial``: Runs Xyce simulations in serial mode.\n' \
                                 '* ``xyce-parallel``: Runs Xyce simulations in parallel mode.\n' \
                                 '* ``hspice``: (Experimental) Runs HSPICE simulations.'
                 ), default='ngspice-shared'
-            ) : Or('ngspice-shared', 'ngspice-subprocess', 'xyce-serial', 'xyce-parallel', 'hspice'),
+            ) : Or('ngspice-shared', 'ngspice-subprocess', 'ngspice-pipe', 'xyce-serial', 'xyce-parallel', 'hspice'),
+            Optional(
+                Literal(
+                    'options',
+                    description='Solver options for transient simulations. Any option which is ' \
+                                'omitted keeps the default chosen by each procedure. Use ' \
+                                '``charlib tune`` to find the fastest options for a PDK within ' \
+                                'a given accuracy bound.'
+                )
+            ) : {
+                Optional(
+                    Literal(
+                        'method',
+                        description='The numerical integration method: ``trap`` or ``gear``.'
+                    )
+                ) : Or('trap', 'gear'),
+                Optional(
+                    Literal(
+                        'reltol',
+                        description='Relative error tolerance of the solver.'
+                    )
+                ) : Or(float, int),
+                Optional(
+                    Literal(
+                        'trtol',
+                        description='Transient truncation error overestimation factor.'
+                    )
+                ) : Or(float, int),
+                Optional(
+                    Literal(
+                        'timestep_divisor',
+                        description='Sets the transient step time to the fastest slew in each ' \
+                                    'test bench divided by this value.'
+                    )
+                ) : Or(float, int),
+                Optional(
+                    Literal(
+                        'klu',
+                        description='Use the KLU sparse matrix solver (ngspice only).'
+                    ), default=False
+                ) : bool,
+            },
+            Optional(
+                Literal(
+                    'calibrate_timestep',
+                    description='Calibrate a transient timestep for each combinational cell ' \
+                                'without a ``timestep``. One representative delay arc is ' \
+                                'simulated at successively halved timesteps until its delays ' \
+                                'converge within ``timestep_tolerance``. The largest converged ' \
+                                'timestep is then used for all of the cell\'s simulations, and ' \
+                                'is recorded in the cell\'s ``simulation_timestep`` attribute.'
+                ), default=False
+            ) : bool,
+            Optional(
+                Literal(
+                    'timestep_tolerance',
+                    description='The largest relative change in delay between consecutive ' \
+                                'timesteps which is considered converged during timestep ' \
+                                'calibration.'
+                ), default=0.01
+            ) : Or(float, int),
+            Optional(
+                Literal(
+                    'two_pass',
+                    description='Characterize combinational delay tables in two passes. The ' \
+                                'first pass simulates every table entry with a coarse timestep ' \
+                                'and relaxed tolerances. The second pass repeats at full accuracy ' \
+                                'the worst-case nonmasking conditions, any others which are close ' \
+                                'to them, and any table entries which are not monotonic with respect to ' \
+                                'their neighbors. Only applies to worst-case delay procedures.'
+                ), default=False
+            ) : bool,
+            Optional(
+                Literal(
+                    'quality_control',
+                    description='Check each combinational delay table for suspicious entries ' \
+                                'once characterization is done. Entries which are NaN or ' \
+                                'negative, which are not monotonic with respect to their ' \
+                                'neighbors, or which deviate from a smooth fit through the table ' \
+                                'by more than ``outlier_tolerance`` are simulated again with ' \
+                                'tighter solver settings and a halved timestep. This adds a ' \
+                                're-simulation pass, so it is off by default.'
+                ), default=False
+            ) : bool,
+            Optional(
+                Literal(
+                    'outlier_tolerance',
+                    description='The largest deviation from a smooth fit through a delay table ' \
+                                '(relative to the largest value in the fit) which is not ' \
+                                'considered an outlier.'
+                ), default=0.1
+            ) : Or(float, int),
+            Optional(
+                Literal(
+                    'constraint_search_parallelism',
+                    description='The number of candidate skews simulated at once in each round ' \
+                                'of a setup/hold constraint search. Values above 1 turn each ' \
+                                'binary search into a k-ary search run on a pool of that many ' \
+                                'extra processes per job, which trades extra simulations for ' \
+                                'lower latency per sequential cell. Unless the number of jobs is ' \
+                                'set, CPUs are divided between jobs with room for each of these ' \
+                                'processes, so fewer jobs run at once. Each task starts its own ' \
+                                'pool, so this only pays off for long searches.'
+                ), default=1
+            ) : And(int, lambda n: n >= 1),
             Optional(
                 Literal(
                     'input_capacitance_procedure',
@@ -280,7 +407,11 @@ class ConfigFile:
                 Literal(
                     'setup_hold_constraint_procedure',
                     description='The name of a procedure used to find the setup & hold time ' \
-                                'constraints associated with a sequential cell.' # TODO: Refer to docs for procedures
+                                'constraints associated with a sequential cell. Options: ' \
+                                '"measure_setup_hold_from_contour" (default) or ' \
+                                '"metastability_binary_search_worst_case", which searches for ' \
+                                'setup and hold independently. The latter takes far fewer ' \
+                                'simulations, but ignores the interdependence of setup and hold.'
                 ), default='measure_setup_hold_from_contour'
             ) : str,
             Optional(
@@ -455,6 +586,25 @@ class ConfigFile:
                             'Using the ``--jobs`` flag on the command line overrides this value.'
             ), default=True
         ) : bool,
+        Optional(
+            Literal(
+                'solver_threads',
+                description='The number of threads each simulation may use (e.g. for OpenMP ' \
+                            'model evaluation). CharLib runs as many parallel jobs as fit on the ' \
+                            'available CPUs with this many threads each, unless the number of ' \
+                            'jobs is set with ``--jobs``. If ``threadpoolctl`` is installed, ' \
+                            'numpy\'s math libraries are limited to this many threads as well. ' \
+                            'Using the ``--solver-threads`` flag on the command line overrides ' \
+                            'this value.'
+            ), default=1
+        ) : And(int, lambda n: n >= 1),
+        Optional(
+            Literal(
+                'cpu_affinity',
+                description='Pin each parallel job to its own set of ``solver_threads`` CPUs ' \
+                            '(Linux only).'
+            ), default=False
+        ) : bool,
         Optional(
             Literal(
                 'results_dir',
@@ -476,6 +626,23 @@ class ConfigFile:
                             'keyword is set to ``True``'
             ), default='debug'
         ) : str,
+        Optional(
+            Literal(
+                'cache',
+                description='Cache simulation results that are shared between tasks, such as DC ' \
+                            'operating points and settling times. If false, every task ' \
+                            'simulates everything it needs itself.'
+            ), default=True
+        ) : bool,
+        Optional(
+            Literal(
+                'cache_dir',
+                description='A directory where CharLib keeps cached simulation results between ' \
+                            'runs. Cached results are reused by later runs until the cell ' \
+                            'netlist or models change. If omitted, results are cached in a ' \
+                            'temporary directory which is removed at the end of each run.'
+            )
+        ) : str,
         Optional(
             Literal(
                 'dry_run',
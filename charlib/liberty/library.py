@@ -230,9 +230,11 @@ class LookupTable(liberty.Group):
         # Display LUT values
         lut_str += [f'{inner_indent}values ( \\']
         sets = 1 if len(self.index_values) < 3 else len(self.index_values[2])
+        # One-dimensional tables are displayed as a single row
+        table = self.values.reshape(1, -1, 1) if self.values.ndim == 1 else np.atleast_3d(self.values)
         for s in range(sets):
-            for i in range(len(self.index_values[0])):
-                values = [f"{v:.{precision}f}" for v in np.atleast_3d(self.values)[i,:,s]]
+            for i in range(table.shape[0]):
+                values = [f"{v:.{precision}f}" for v in table[i,:,s]]
                 lut_str += [f'{value_indent}"{", ".join(values)}" \\']
         lut_str += [f'{inner_indent}) ;']
         lut_str += [f'{indent}}} /* end {self.name} */']
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import PySpice
+import pytest
+
+from charlib.characterizer.cell import Cell
+from charlib.characterizer.logic.functions import Function
+from charlib.characterizer.port import Pin
+from charlib.characterizer.procedures.sequential.constraint import asynchronous
+from charlib.characterizer.units import UnitsSettings
+from charlib.liberty import liberty
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _make_cell(set_pin=True, reset_pin=True):
+    """Build a DFF with posedge clock and optional active low set & reset"""
+    clock = Pin('CLK', 'input', role='clock', edge_triggered=True)
+    preset = Pin('S', 'input', role='set', inverted=True) if set_pin else None
+    clear = Pin('R', 'input', role='reset', inverted=True) if reset_pin else None
+    pins = [pin for pin in [clock, preset, clear, Pin('D', 'input')] if pin is not None]
+    function = Function(Pin('Q', 'output'), 'D', *pins, state='IQ')
+    cell = SimpleNamespace(name='DFFSR', clock=clock, preset=preset, clear=clear, outputs=['Q'],
+                           functions={'Q': function}, liberty=liberty.Group('cell', 'DFFSR'))
+    cell.nonmasking_conditions_for_path = lambda *path: Cell.nonmasking_conditions_for_path(cell, *path)
+    for pin in pins:
+        cell.liberty.add_group('pin', pin.name)
+    return cell
+
+
+def _fake_c2q(setup_skew, **kwargs):
+    """Model a flop which ignores the clock edge if reset is released 30 ps after it, and is slowed
+    down if reset is released shortly before it"""
+    setup = float(setup_skew) + 0.03e-9
+    if setup <= 0:
+        return float('nan')
+    return 100e-12 + 1e-21 / setup
+
+
+def _variation():
+    return {'data_slews': 0.1, 'clock_slews': 0.1, 'metastability_constraint_load': 0.01,
+            'metastability_constraint_search_tolerance': 0.001,
+            'metastability_constraint_search_timestep': 0.05}
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_control_paths_release_set_and_reset():
+    """Each set and reset pin gets one path, releasing it before a capturing clock edge."""
+    paths = {tuple(path): state_maps for (path, state_maps) in asynchronous.control_paths(_make_cell())}
+    assert set(paths) == {('S', '01', 'Q', '10'), ('R', '01', 'Q', '01')}
+    for state_maps in paths.values():
+        assert all(state_map['CLK'] == '1' for state_map in state_maps)
+
+
+def test_control_paths_without_set_or_reset():
+    """Cells without asynchronous controls have no recovery or removal arcs."""
+    assert list(asynchronous.control_paths(_make_cell(set_pin=False, reset_pin=False))) == []
+
+
+@pytest.mark.parametrize('constraint, expected', [('recovery', 0.065), ('removal', 0.03)])
+def test_control_constraint(monkeypatch, constraint, expected):
+    """Recovery bounds c2q degradation, and removal is the latest release the clock ignores."""
+    monkeypatch.setattr(asynchronous, 'stabilizing_time', lambda *args: 2e-9 @ PySpice.Unit.u_s)
+    monkeypatch.setattr(asynchronous, 'get_latch_state', lambda *args, **kwargs: {})
+    monkeypatch.setattr(asynchronous, 'get_c2q', _fake_c2q)
+    monkeypatch.setattr(asynchronous, 'probe_c2q',
+                        lambda skew_name, skew, **kwargs: _fake_c2q(**{skew_name: skew}, **kwargs))
+    config = SimpleNamespace(parameters={'clock_slews': [0.1], 'data_slews': [0.1]})
+    settings = SimpleNamespace(units=UnitsSettings(), dry_run=False,
+                               simulation=SimpleNamespace(constraint_search_parallelism=1))
+    cell = _make_cell()
+    [(path, state_maps)] = [(path, state_maps) for (path, state_maps) in asynchronous.control_paths(cell)
+                            if path[0] == 'R']
+
+    result = asynchronous.find_control_constraint(constraint, cell, config, settings, _variation(),
+                                                  path, state_maps)
+
+    [timing] = result.group('pin', 'R').subgroups_with_name('timing')
+    assert timing.attributes['timing_type'].value == f'{constraint}_rising'
+    [lut] = timing.subgroups_with_name('rise_constraint')
+    assert lut.values[0, 0] == pytest.approx(expected, abs=0.002)
@@ -0,0 +1,59 @@
+import math
+from types import SimpleNamespace
+
+import PySpice
+import pytest
+
+from charlib.characterizer.procedures.sequential.constraint.metastability import binary_search
+from charlib.characterizer.units import UnitsSettings
+from charlib.liberty import liberty
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _fake_c2q(setup_skew, hold_skew, state_map, **kwargs):
+    """Model c2q degrading as setup or hold approach their limits, which depend on state"""
+    (setup_limit, hold_limit) = (0.05e-9, -0.02e-9) if state_map['S'] == '0' else (0.08e-9, 0.01e-9)
+    (setup, hold) = (float(setup_skew) - setup_limit, float(hold_skew) - hold_limit)
+    if setup <= 0 or hold <= 0:
+        return float('nan')
+    return 100e-12 + 1e-12 * (1e-10 / setup + 1e-10 / hold)
+
+
+def _make_cell():
+    cell = SimpleNamespace(name='DFF', liberty=liberty.Group('cell', 'DFF'),
+                           clock=SimpleNamespace(name='CLK', is_inverted=lambda: False))
+    cell.liberty.add_group('pin', 'D')
+    return cell
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_worst_case_setup_hold(monkeypatch):
+    """Setup and hold are the worst case over all states of the independent searches."""
+    monkeypatch.setattr(binary_search, 'stabilizing_time', lambda *args: 2e-9 @ PySpice.Unit.u_s)
+    monkeypatch.setattr(binary_search, 'get_latch_state', lambda *args, **kwargs: {})
+    monkeypatch.setattr(binary_search, 'get_c2q', _fake_c2q)
+    monkeypatch.setattr(binary_search, 'probe_c2q',
+                        lambda skew_name, skew, **kwargs: _fake_c2q(**{skew_name: skew}, **kwargs))
+    config = SimpleNamespace(parameters={'clock_slews': [0.1], 'data_slews': [0.1]})
+    settings = SimpleNamespace(units=UnitsSettings(), dry_run=False,
+                               simulation=SimpleNamespace(constraint_search_parallelism=1))
+    variation = {'data_slews': 0.1, 'clock_slews': 0.1, 'metastability_constraint_load': 0.01,
+                 'metastability_constraint_search_tolerance': 0.001,
+                 'metastability_constraint_search_timestep': 0.05}
+    state_maps = [{'S': '0'}, {'S': '1'}]
+
+    result = binary_search.worst_case_setup_hold_constraint(
+        _make_cell(), config, settings, variation, ['D', '01', 'Q', '01'], state_maps)
+
+    # c2q at the stabilizing time is ~100.1 ps, which degrades by 10% at 10 ps past each limit
+    timing = {group.attributes['timing_type'].value: next(iter(group.groups.values())).values[0, 0]
+              for group in result.group('pin', 'D').subgroups_with_name('timing')}
+    assert timing['setup_rising'] == pytest.approx(0.08 + 0.01, abs=0.002)
+    assert timing['hold_rising'] == pytest.approx(0.01 + 0.01, abs=0.002)
+    assert not any(math.isnan(value) for value in timing.values())
@@ -0,0 +1,123 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import PySpice
+
+from charlib.characterizer.procedures.sequential.constraint.metastability import c2q_contour
+from charlib.characterizer.procedures.sequential.constraint.metastability.c2q_contour import (
+    extract_2d_contour, neighboring_slews, slew_order, stabilizing_time, sweep_2d_space_for_contour, trace_2d_contour)
+from charlib.characterizer.procedures import preparation_tasks
+from charlib.characterizer.units import UnitsSettings
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _c2q(setup, hold):
+    """Model c2q which rises as setup and hold approach a curved latching boundary"""
+    margin = (setup + 0.2) * (hold + 0.3) - 0.1
+    return 1.0 + 0.02 / margin if margin > 0 and setup + hold > 0 else float('nan')
+
+
+def _counted(probe_fn):
+    """Wrap probe_fn to count how many times it is called"""
+    def probe(*args):
+        probe.calls += 1
+        return probe_fn(*args)
+    probe.calls = 0
+    return probe
+
+
+BOUNDS = dict(setup_min=-0.15, setup_max=0.6, hold_min=-0.25, hold_max=0.5)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_trace_matches_raster_boundary():
+    """Tracing the boundary finds the same contour as sweeping the grid."""
+    sweep = _counted(_c2q)
+    trace = _counted(_c2q)
+    (latched_a, _, _, latched_b, _, _, setup_vals, hold_vals) = sweep_2d_space_for_contour(
+        sweep, **BOUNDS, c2q_threshold=1.2, n_samples=40)
+    expected = extract_2d_contour(latched_a, latched_b, setup_vals, hold_vals)
+    (latched_a, _, _, latched_b, _, _, setup_vals, hold_vals) = trace_2d_contour(
+        trace, **BOUNDS, c2q_threshold=1.2, n_samples=40)
+    assert extract_2d_contour(latched_a, latched_b, setup_vals, hold_vals) == expected
+    assert len(expected) > 20
+    assert trace.calls <= 2*40 - 1 < sweep.calls
+
+
+def test_trace_records_simulated_points():
+    """Every simulated point is recorded, and only simulated points have a c2q."""
+    (latched_a, c2q, simulated, *_) = trace_2d_contour(_c2q, **BOUNDS, n_samples=10)
+    assert np.all(np.isnan(c2q[~simulated]))
+    assert np.all(simulated[latched_a])
+    assert not math.isnan(c2q[latched_a][0])
+
+
+def test_slew_order_changes_one_slew_at_a_time():
+    """Consecutive variations differ by one step in a single slew."""
+    variations = [{'data_slews': d, 'clock_slews': c} for d in [0.1, 0.2, 0.4] for c in [0.05, 0.5]]
+    ordered = [(v['clock_slews'], v['data_slews']) for v in slew_order(variations)]
+    assert ordered == [(0.05, 0.1), (0.05, 0.2), (0.05, 0.4), (0.5, 0.4), (0.5, 0.2), (0.5, 0.1)]
+
+
+def test_neighboring_slews():
+    """Neighbors are one table index away in either slew, and share every other parameter."""
+    config = SimpleNamespace(parameters={'data_slews': [0.4, 0.1, 0.2], 'clock_slews': [0.05, 0.5]})
+    variation = {'data_slews': 0.2, 'clock_slews': 0.05, 'metastability_constraint_load': 0.01}
+    neighbors = [(v['data_slews'], v['clock_slews'], v['metastability_constraint_load'])
+                 for v in neighboring_slews(config, variation)]
+    assert neighbors == [(0.1, 0.05, 0.01), (0.4, 0.05, 0.01), (0.2, 0.5, 0.01)]
+
+
+def test_stabilizing_time_is_measured_once_per_path(tmp_path, monkeypatch):
+    """The longest stabilizing time over all states is measured at the slowest slews, then cached."""
+    measured = []
+    def fake_t_stabilizing(cell, config, settings, path, state_map, k, clock_slew_rate,
+                           data_slew_rate, capacitive_load, debug_dir):
+        measured.append((float(clock_slew_rate), float(data_slew_rate), state_map['D']))
+        return (1e-9 if state_map['D'] == '0' else 2e-9) @ PySpice.Unit.u_s
+    monkeypatch.setattr(c2q_contour, 'get_t_stabilizing', fake_t_stabilizing)
+
+    netlist = tmp_path / 'DFF.sp'
+    netlist.write_text('.subckt DFF CLK D Q VDD VSS\n.ends\n')
+    cell = SimpleNamespace(name='DFF', netlist=netlist)
+    config = SimpleNamespace(models=[], parameters={'clock_slews': [0.1, 0.5], 'data_slews': [0.2, 0.4],
+                                                    'metastability_constraint_load': 0.01})
+    settings = SimpleNamespace(cache_dir=tmp_path / 'cache', dry_run=False, units=UnitsSettings(),
+                               temperature=25, named_nodes=())
+    path = ['D', '01', 'Q', '01']
+    state_maps = [{'D': '0'}, {'D': '1'}]
+
+    for _ in range(2):
+        t_stabilizing = stabilizing_time(cell, config, settings, path, state_maps)
+        assert float(t_stabilizing) == 2e-9
+    assert measured == [(pytest.approx(0.5e-9), pytest.approx(0.4e-9), state) for state in '01']
+
+
+def test_stabilizing_time_is_prepared_per_state_maps(tmp_path, monkeypatch):
+    """Different sets of state maps for a path are measured separately, before other tasks."""
+    measured = []
+    def fake_t_stabilizing(cell, config, settings, path, state_map, **kwargs):
+        measured.append(state_map['D'])
+        return 1e-9 @ PySpice.Unit.u_s
+    monkeypatch.setattr(c2q_contour, 'get_t_stabilizing', fake_t_stabilizing)
+
+    netlist = tmp_path / 'DFF.sp'
+    netlist.write_text('.subckt DFF CLK D Q VDD VSS\n.ends\n')
+    cell = SimpleNamespace(name='DFF', netlist=netlist)
+    config = SimpleNamespace(models=[], parameters={'clock_slews': [0.1], 'data_slews': [0.2],
+                                                    'metastability_constraint_load': 0.01})
+    settings = SimpleNamespace(cache_dir=tmp_path / 'cache', dry_run=False, debug=False,
+                               units=UnitsSettings(), temperature=25, named_nodes=())
+    path = ['D', '01', 'Q', '01']
+    for state_maps in [[{'D': '0'}], [{'D': '0'}, {'D': '1'}], [{'D': '0'}]]:
+        c2q_contour.measure_stabilizing_time(cell, config, settings, path, state_maps)
+    assert measured == ['0', '0', '1']
+    assert c2q_contour.measure_stabilizing_time in preparation_tasks
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+from charlib.characterizer.calibration import calibrate_timestep, representative_task
+from charlib.liberty import liberty
+from charlib.liberty.library import LookupTable
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _fake_delay(cell, config, settings, variation, path):
+    """Return a cell group whose delay has a discretization error proportional to the timestep"""
+    lut = LookupTable('cell_rise', 'delay_template_1x1',
+                      total_output_net_capacitance=[variation['loads']],
+                      input_net_transition=[variation['data_slews']])
+    lut.values[0, 0] = 1.0 + 0.1*config.timestep
+    timing_group = liberty.Group('timing')
+    timing_group.add_attribute('related_pin', path[0])
+    timing_group.add_attribute('timing_type', 'combinational_rise')
+    timing_group.add_group(lut)
+    cell_group = liberty.Group('cell', 'INV')
+    cell_group.add_group('pin', 'Y')
+    cell_group.group('pin', 'Y').add_group(timing_group)
+    return cell_group
+
+
+def _fake_procedure(cell, config, settings):
+    for data_slew in [0.4, 0.1, 0.2]:
+        for load in [0.05, 0.01]:
+            yield (_fake_delay, cell, config, settings, {'data_slews': data_slew, 'loads': load},
+                   ['A', '01', 'Y', '10'])
+
+
+def _make_settings(tolerance):
+    simulation = SimpleNamespace(combinational_delay=_fake_procedure, two_pass=True,
+                                 timestep_tolerance=tolerance)
+    return SimpleNamespace(simulation=simulation)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_representative_task_is_most_demanding():
+    """The fastest slew with the smallest load is used for calibration."""
+    cell = SimpleNamespace(name='INV')
+    config = SimpleNamespace(timestep=None)
+    (*_, variation, path) = representative_task(cell, config, _make_settings(0.01))
+    assert variation == {'data_slews': 0.1, 'loads': 0.01}
+
+
+def test_calibration_returns_largest_converged_timestep():
+    """Timesteps are halved until consecutive delays agree within tolerance."""
+    cell = SimpleNamespace(name='INV')
+    config = SimpleNamespace(timestep=None)
+    settings = _make_settings(0.0012)
+    # Relative change between 0.025 and 0.0125 is 0.00125/1.00125 ~ 0.00125 > 0.0012; the next
+    # halving changes the delay by ~0.000625, so 0.0125 is the largest converged timestep
+    assert calibrate_timestep(cell, config, settings) == 0.0125
+    assert config.timestep is None
+    assert settings.simulation.two_pass
+
+
+def test_calibration_gives_up_after_max_halvings():
+    """If the delays never converge, the smallest timestep tried is used."""
+    cell = SimpleNamespace(name='INV')
+    config = SimpleNamespace(timestep=None)
+    assert calibrate_timestep(cell, config, _make_settings(0), max_halvings=2) == 0.025
@@ -0,0 +1,73 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from charlib.characterizer.procedures import preparation_tasks
+from charlib.characterizer.procedures.combinational.delay import (
+    combinational_worst_case, estimate_settling_time, conditions_near_worst_case, measure_waveform,
+    measure_delays_for_path_with_criterion, measure_reference_delays)
+
+
+def test_no_history_gives_no_estimate():
+    """Arcs without measured settling times have no estimate."""
+    assert estimate_settling_time([], 1e-10, 1e-15) is None
+
+
+def test_estimate_scales_with_slew_and_load():
+    """Settling times scale with the larger of the slew and load ratios."""
+    history = [[1e-10, 1e-15, 2e-10]]
+    assert estimate_settling_time(history, 1e-10, 1e-15) == pytest.approx(2e-10)
+    assert estimate_settling_time(history, 1e-10, 4e-15) == pytest.approx(8e-10)
+    assert estimate_settling_time(history, 3e-10, 2e-15) == pytest.approx(6e-10)
+    assert estimate_settling_time(history, 1e-11, 1e-16) == pytest.approx(2e-11)
+
+
+def test_estimate_uses_nearest_entry():
+    """Only the nearest history entry is used, so a slow outlier doesn't inflate other estimates."""
+    history = [[1e-10, 1e-15, 2e-10], [4e-10, 1e-15, 5e-9]]
+    assert estimate_settling_time(history, 1e-10, 1e-15) == pytest.approx(2e-10)
+    assert estimate_settling_time(history, 3e-10, 1e-15) == pytest.approx(5e-9)
+
+
+def test_clear_worst_case_is_refined():
+    """The worst case is refined even when no other condition is close to it."""
+    delays = {'cell_rise': np.array([1.0e-10, 2.0e-10, 1.5e-10])}
+    assert conditions_near_worst_case(['A=0', 'A=1', 'B=1'], delays) == ['A=1']
+
+
+def test_ambiguous_worst_case_is_refined():
+    """Every condition close to the worst case is refined, for any measurement."""
+    delays = {'cell_rise': np.array([1.0e-10, 2.0e-10, 1.5e-10]),
+              'rise_transition': np.array([3.0e-10, np.nan, 2.9e-10])}
+    assert conditions_near_worst_case(['A=0', 'A=1', 'B=1'], delays) == ['A=0', 'A=1', 'B=1']
+
+
+
+def test_measure_waveform():
+    """Each measurement is a scalar delay, or NaN if a threshold is never crossed."""
+    waveform = {'time': np.array([0.0, 1e-10, 2e-10, 3e-10]),
+                'va': np.array([0.0, 1.0, 1.0, 1.0]),
+                'vy': np.array([1.0, 1.0, 0.0, 0.0])}
+    delays = measure_waveform(waveform, {'cell_fall': ('va', 0.5, 'rise', 'vy', 0.5, 'fall'),
+                                         'cell_rise': ('va', 0.5, 'rise', 'vy', 0.5, 'rise')})
+    assert delays['cell_fall'] == pytest.approx(1e-10)
+    assert np.isnan(delays['cell_rise'])
+
+
+def test_reference_variation_is_prepared_first():
+    """Only the smallest slew and load of each path records settling times, before the rest start."""
+    paths = [['A', '01', 'Y', '10'], ['A', '10', 'Y', '01']]
+    cell = SimpleNamespace(paths=lambda: paths)
+    config = SimpleNamespace(variations=lambda *keys: (
+        {'data_slews': slew, 'loads': load, 'transient_sim_end_time': 0}
+        for (slew, load) in itertools.product([0.1, 0.01, 1.0], [0.5, 0.05])))
+    tasks = list(combinational_worst_case(cell, config, None))
+    assert len(tasks) == 12
+    reference = [(variation, path) for (task, _, _, _, variation, path, _) in tasks
+                 if task is measure_reference_delays]
+    assert reference == [({'data_slews': 0.01, 'loads': 0.05, 'transient_sim_end_time': 0}, path)
+                         for path in paths]
+    assert measure_reference_delays in preparation_tasks
+    assert measure_delays_for_path_with_criterion not in preparation_tasks
@@ -57,6 +57,13 @@ def test_generator_first_element_is_procedure_function():
         assert job[0] is measure_leakage_for_state
 
 
+def test_leakage_is_preparation():
+    """Leakage tasks cache operating points, so they run before other tasks of the cell."""
+    from charlib.characterizer.procedures import preparation_tasks
+    from charlib.characterizer.procedures.combinational.leakage_power import measure_leakage_for_state
+    assert measure_leakage_for_state in preparation_tasks
+
+
 # ---------------------------------------------------------------------------
 # when-string tests
 # ---------------------------------------------------------------------------
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from PySpice.Spice.Netlist import Circuit
+from PySpice.Unit import *
+
+from charlib.characterizer.deck import Deck
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+SUPPLIES = (SimpleNamespace(name='VDD', subscript='DD', voltage=1.8),
+            SimpleNamespace(name='VSS', subscript='SS', voltage=0),
+            SimpleNamespace(name='GND', subscript='GND', voltage=0))
+UNITS = SimpleNamespace(voltage=1 @ u_V)
+
+
+def _pyspice_circuit(title, netlist, models):
+    """Build a circuit the same way utils.init_circuit does."""
+    circuit = Circuit(title)
+    circuit.include(netlist)
+    for model in models:
+        if len(model) > 1:
+            circuit.lib(*model)
+        else:
+            circuit.include(model[0])
+    for supply in SUPPLIES:
+        if supply.name.upper() not in ['GND', '0']:
+            circuit.V(supply.subscript, supply.name, circuit.gnd, supply.voltage*UNITS.voltage)
+    return circuit
+
+
+def _add_test_bench(circuit):
+    """Add one of each element type used by CharLib test benches."""
+    circuit.V('A', 'vA', circuit.gnd, 1.8 @ u_V)
+    circuit.PieceWiseLinearVoltageSource('B', 'vB', circuit.gnd,
+                                         values=[(0 @ u_ns, 0 @ u_V), (1.5 @ u_ns, 0 @ u_V),
+                                                 (2 @ u_ns, 1.8 @ u_V), (3e-9, 1.8)])
+    circuit.C('Y', 'vY', circuit.gnd, 0.01 @ u_pF)
+    circuit.R('in', circuit.gnd, 'vin', 10 @ u_GOhm)
+    circuit.I('in', circuit.gnd, 'vin', 'DC 0 AC 1uA')
+    circuit.X('dut', 'NAND2', 'vA', 'vB', 'vY', 'VDD', 'VSS')
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_deck_matches_pyspice_with_include(tmp_path):
+    """Decks are byte-identical to the equivalent PySpice netlist."""
+    netlist = tmp_path / 'cells.sp'
+    models = [(str(tmp_path / 'models.sp'),)]
+    expected = _pyspice_circuit('comb_delay', netlist, models)
+    _add_test_bench(expected)
+    deck = Deck('comb_delay', netlist, models, SUPPLIES, UNITS)
+    _add_test_bench(deck)
+    assert str(deck) == str(expected)
+
+
+def test_deck_matches_pyspice_with_lib(tmp_path):
+    """Library sections are emitted after all includes, as PySpice does."""
+    netlist = tmp_path / 'cells.sp'
+    models = [(str(tmp_path / 'models.lib'), 'tt'), (str(tmp_path / 'extra.sp'),)]
+    expected = _pyspice_circuit('leakage', netlist, models)
+    _add_test_bench(expected)
+    deck = Deck('leakage', netlist, models, SUPPLIES, UNITS)
+    _add_test_bench(deck)
+    assert str(deck) == str(expected)
+
+
+def test_instances_are_emitted_last(tmp_path):
+    """Subcircuit instances come after all other elements."""
+    deck = Deck('t', tmp_path / 'cells.sp', [], SUPPLIES, UNITS)
+    deck.X('dut', 'INV', 'vA', 'vY', 'VDD', 'VSS')
+    deck.C('Y', 'vY', deck.gnd, 1 @ u_pF)
+    assert str(deck).splitlines()[-1] == 'Xdut vA vY VDD VSS INV'
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from charlib.characterizer.family import family_id, family_name, leaders_and_siblings
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _make_cell(name, expression='Q=D', family=None):
+    """Return a (cell, config) pair implementing a single function"""
+    function = SimpleNamespace(expression=expression, state=None)
+    cell = SimpleNamespace(name=name, functions={expression.split('=')[0]: function})
+    return (cell, SimpleNamespace(family=family))
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_family_name_strips_drive_strength():
+    """Common drive strength suffixes are removed, but other trailing digits are kept."""
+    for (name, expected) in [('DFF_X1', 'DFF'), ('INVX4', 'INV'), ('sky130_fd_sc_hd__dfxtp_2',
+                             'sky130_fd_sc_hd__dfxtp'), ('NAND2', 'NAND2'), ('NAND2_X2', 'NAND2')]:
+        assert family_name(*_make_cell(name)) == expected
+    assert family_name(*_make_cell('DFFHQ', family='DFF')) == 'DFF'
+
+
+def test_family_requires_same_function():
+    """Cells with the same family name but different functions are not siblings."""
+    assert family_id(*_make_cell('DFF_X1')) == family_id(*_make_cell('DFF_X2'))
+    assert family_id(*_make_cell('DFF_X1')) != family_id(*_make_cell('DFF_X2', 'QN=!D'))
+
+
+def test_leaders_and_siblings():
+    """The first member of each family leads it, and every other member is a sibling."""
+    cells = [_make_cell(name) for name in ['DFF_X1', 'DFF_X2', 'INV_X1', 'DFF_X4', 'INV_X2']]
+    (leaders, siblings) = leaders_and_siblings(cells)
+    assert [cell.name for (cell, _) in leaders] == ['DFF_X1', 'INV_X1']
+    assert [cell.name for (cell, _) in siblings] == ['DFF_X2', 'DFF_X4', 'INV_X2']
@@ -0,0 +1,92 @@
+import math
+
+import pytest
+
+from charlib.characterizer.utils import find_min_valid
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+T_FAIL = -0.3137   # Below this skew the cell fails to latch
+TAU = 0.05         # Time constant of the c2q rise near T_FAIL
+C2Q_REF = 1.0      # c2q with a relaxed skew
+THRESHOLD = 1.2 * C2Q_REF
+
+
+def _c2q(skew):
+    """Model c2q rising smoothly towards the point where the cell fails to latch"""
+    return C2Q_REF + TAU / (skew - T_FAIL) if skew > T_FAIL else float('nan')
+
+
+def _counted(probe_fn):
+    """Wrap probe_fn to count how many times it is called"""
+    def probe(x):
+        probe.calls += 1
+        return probe_fn(x)
+    probe.calls = 0
+    return probe
+
+
+# Skew at which c2q reaches THRESHOLD
+BOUNDARY = T_FAIL + TAU / (THRESHOLD - C2Q_REF)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_bisection_finds_boundary():
+    """Without a threshold, valid points are those where probe_fn is not NaN."""
+    probe = lambda x: float('nan') if x < BOUNDARY else _c2q(x)
+    (result, phase1, phase2) = find_min_valid(probe, start=2.0, step=0.1, tolerance=1e-3)
+    assert BOUNDARY <= result <= BOUNDARY + 1e-3
+    assert phase1 == pytest.approx([1.9, 1.8, 1.6, 1.2, 0.4, -1.2])
+
+
+def test_interpolation_matches_bisection_in_fewer_probes():
+    """With a threshold, c2q guides the search to the same result with fewer simulations."""
+    bisect = _counted(lambda x: _c2q(x) if _c2q(x) < THRESHOLD else float('nan'))
+    interpolate = _counted(_c2q)
+    (expected, *_) = find_min_valid(bisect, start=2.0, step=0.1, tolerance=1e-4)
+    (result, *_) = find_min_valid(interpolate, start=2.0, step=0.1, tolerance=1e-4,
+                                  threshold=THRESHOLD)
+    assert BOUNDARY <= result <= BOUNDARY + 1e-4
+    assert result == pytest.approx(expected, abs=1e-4)
+    assert interpolate.calls < bisect.calls
+
+
+def test_infinite_threshold_falls_back_to_bisection():
+    """An infinite threshold gives no residual to interpolate on, so the search bisects."""
+    (result, _, phase2) = find_min_valid(_c2q, start=2.0, step=0.1, tolerance=1e-3,
+                                         threshold=math.inf)
+    assert T_FAIL <= result <= T_FAIL + 1e-3
+    assert all(mid == pytest.approx((lo + hi) / 2) for (lo, mid, hi) in phase2)
+
+
+def test_k_ary_search_takes_fewer_rounds():
+    """Probing several candidates per round finds the same boundary in fewer rounds."""
+    rounds = []
+    def probe_map(probe_fn, candidates):
+        rounds.append(len(candidates))
+        return map(probe_fn, candidates)
+    probe = lambda x: _c2q(x) if _c2q(x) < THRESHOLD else float('nan')
+    (expected, phase1, phase2) = find_min_valid(probe, start=2.0, step=0.1, tolerance=1e-4)
+    (result, *_) = find_min_valid(probe, start=2.0, step=0.1, tolerance=1e-4, k=3,
+                                  probe_map=probe_map)
+    assert BOUNDARY <= result <= BOUNDARY + 1e-4
+    assert set(rounds) == {3}
+    assert len(rounds) < len(phase1) + len(phase2)
+
+
+def test_seed_skips_expansion():
+    """A close estimate of the result replaces most of the expansion phase."""
+    probe = lambda x: _c2q(x) if _c2q(x) < THRESHOLD else float('nan')
+    (expected, phase1, _) = find_min_valid(probe, start=2.0, step=0.1, tolerance=1e-4)
+    for seed in [BOUNDARY - 0.02, BOUNDARY + 0.02]:
+        (result, seeded_phase1, _) = find_min_valid(probe, start=2.0, step=0.1, tolerance=1e-4,
+                                                    seed=seed, margin=0.05)
+        assert result == pytest.approx(expected, abs=1e-4)
+        assert seeded_phase1[0] == pytest.approx(seed + 0.05)
+        assert len(seeded_phase1) < len(phase1)
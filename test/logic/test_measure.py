@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from charlib.characterizer import measure
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _ramp(time, t_start, t_end, v_0, v_1):
+    """Return a piecewise linear ramp from v_0 at t_start to v_1 at t_end"""
+    return np.interp(time, [t_start, t_end], [v_0, v_1])
+
+
+TIME = np.linspace(0, 10e-9, 101)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_crossing_interpolates_between_points():
+    """Crossings between simulation points should be linearly interpolated"""
+    time = np.array([0.0, 1.0, 2.0])
+    values = np.array([0.0, 0.0, 1.0])
+    assert measure.crossings(time, values, 0.25) == pytest.approx(1.25)
+
+
+def test_crossing_direction_and_occurrence():
+    """Only crossings in the requested direction should be counted"""
+    pulse = _ramp(TIME, 1e-9, 2e-9, 0, 1) - _ramp(TIME, 5e-9, 6e-9, 0, 1)
+    assert measure.crossings(TIME, pulse, 0.5, 'rise') == pytest.approx(1.5e-9)
+    assert measure.crossings(TIME, pulse, 0.5, 'fall') == pytest.approx(5.5e-9)
+    assert measure.crossings(TIME, pulse, 0.5, 'cross', occurrence=2) == pytest.approx(5.5e-9)
+    assert measure.crossings(TIME, pulse, 0.5, 'cross', occurrence=-1) == pytest.approx(5.5e-9)
+    assert measure.crossings(TIME, pulse, 0.5, 'rise', after=3e-9) != measure.crossings(TIME, pulse, 0.5, 'rise')
+    assert np.isnan(measure.crossings(TIME, pulse, 0.5, 'rise', after=3e-9))
+    assert np.isnan(measure.crossings(TIME, pulse, 0.5, 'rise', occurrence=2))
+
+
+def test_batched_crossings_match_single_signals():
+    """A batch of signals should be measured the same as each signal on its own"""
+    starts = np.array([1e-9, 2e-9, 3e-9])
+    signals = np.stack([_ramp(TIME, t, t + 1e-9, 0, 1) for t in starts])
+    thresholds = np.array([0.2, 0.5, 0.8])
+    batched = measure.crossings(TIME, signals, thresholds, 'rise')
+    assert batched.shape == (3,)
+    for signal, threshold, t_cross in zip(signals, thresholds, batched):
+        assert measure.crossings(TIME, signal, threshold, 'rise') == pytest.approx(t_cross)
+    assert batched == pytest.approx(starts + thresholds*1e-9)
+
+
+def test_stack_pads_waveforms_without_adding_crossings():
+    """Padded waveforms from different timesteps should measure the same as the originals"""
+    fine = np.linspace(0, 10e-9, 201)
+    coarse = np.linspace(0, 8e-9, 33)
+    waveforms = [_ramp(fine, 2e-9, 3e-9, 1, 0), _ramp(coarse, 2e-9, 3e-9, 1, 0)]
+    time = measure.stack([fine, coarse])
+    values = measure.stack(waveforms)
+    assert time.shape == values.shape == (2, 201)
+    assert measure.crossings(time, values, 0.5, 'cross', occurrence=-1) == pytest.approx([2.5e-9, 2.5e-9])
+    assert measure.integral(time, values) == pytest.approx([measure.integral(fine, waveforms[0]),
+                                                            measure.integral(coarse, waveforms[1])])
+
+
+def test_delay_and_transition():
+    """Delay and transition should match the equivalent .meas trig/targ statements"""
+    vin = _ramp(TIME, 1e-9, 2e-9, 0, 1.8)
+    vout = _ramp(TIME, 1.5e-9, 3.5e-9, 1.8, 0)
+    assert measure.delay(TIME, vin, 0.9, vout, 0.9, 'rise', 'fall') == pytest.approx(1.0e-9)
+    assert measure.transition(TIME, vout, 1.8*0.8, 1.8*0.2) == pytest.approx(1.2e-9)
+    assert measure.transition(TIME, vin, 1.8*0.2, 1.8*0.8) == pytest.approx(0.6e-9)
+
+
+def test_integral_limits_are_interpolated():
+    """Integration limits between simulation points should be handled exactly"""
+    time = np.array([0.0, 1.0, 2.0, 3.0])
+    values = np.array([0.0, 2.0, 2.0, 0.0])
+    assert measure.integral(time, values) == pytest.approx(4.0)
+    assert measure.integral(time, values, 0.5, 2.5) == pytest.approx(0.75 + 2 + 0.75)
+    assert measure.integral(time, np.stack([values, -values]), 0.5, 1.5) == pytest.approx([1.75, -1.75])
+
+
+def test_slope_matches_polyfit():
+    """Least-squares slopes should match numpy's polynomial fit"""
+    rng = np.random.default_rng(0)
+    x = np.logspace(3, 6, 31)
+    y = np.stack([2e-9*x + 1e-6 + rng.normal(0, 1e-7, x.shape) for _ in range(3)])
+    expected = [np.polynomial.polynomial.polyfit(x, row, 1)[-1] for row in y]
+    assert measure.slope(x, y) == pytest.approx(expected)
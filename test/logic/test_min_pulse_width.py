@@ -0,0 +1,124 @@
+import itertools
+from types import SimpleNamespace
+
+import PySpice
+import pytest
+
+from charlib.characterizer.cell import Cell
+from charlib.characterizer.logic.functions import Function
+from charlib.characterizer.port import Pin
+from charlib.characterizer.procedures.sequential.constraint import min_pulse_width
+from charlib.characterizer.units import UnitsSettings
+from charlib.liberty import liberty
+from charlib.liberty.library import LookupTable
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _make_cell():
+    """Build a DFF with posedge clock"""
+    clock = Pin('CLK', 'input', role='clock', edge_triggered=True)
+    function = Function(Pin('Q', 'output'), 'D', clock, Pin('D', 'input'), state='IQ')
+    cell = SimpleNamespace(name='DFF', clock=clock, outputs=['Q'], functions={'Q': function},
+                           liberty=liberty.Group('cell', 'DFF'))
+    cell.paths = lambda: itertools.product(['D'], ['01', '10'], ['Q'], ['01', '10'])
+    cell.nonmasking_conditions_for_path = lambda *path: Cell.nonmasking_conditions_for_path(cell, *path)
+    cell.filter_pins = lambda **attrs: iter([clock])
+    cell.liberty.add_group('pin', 'CLK')
+    return cell
+
+
+def _fake_c2q(path, active_width=None, inactive_width=None, setup_skew=None, **kwargs):
+    """Model c2q degrading as the high (active) or low (inactive) clock phase gets short"""
+    (width, limit) = (active_width, 0.05e-9) if active_width is not None else (inactive_width, 0.08e-9)
+    if inactive_width is not None:
+        # Data must switch before the inactive phase
+        assert float(setup_skew) > float(inactive_width)
+    if path[1] == '10':
+        limit += 0.01e-9 # Registering a 0 is slower
+    if float(width) <= limit:
+        return float('nan')
+    return 100e-12 + 1e-21 / (float(width) - limit)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_capture_paths():
+    """The paths through which the clock registers data are used to test it."""
+    paths = [tuple(path) for (path, _) in min_pulse_width.capture_paths(_make_cell())]
+    assert paths == [('D', '01', 'Q', '01'), ('D', '10', 'Q', '10')]
+
+
+def test_tasks_per_polarity_and_slew():
+    """Each polarity and clock slew is searched in a separate task."""
+    config = SimpleNamespace(variations=lambda *params: [{'clock_slews': 0.1}, {'clock_slews': 0.2}])
+    tasks = list(min_pulse_width.min_pulse_width_constraint(_make_cell(), config, None))
+    # The stabilizing time of each path is prepared first
+    assert [(task[0], tuple(task[4])) for task in tasks[:2]] == \
+           [(min_pulse_width.measure_stabilizing_time, ('D', '01', 'Q', '01')),
+            (min_pulse_width.measure_stabilizing_time, ('D', '10', 'Q', '10'))]
+    assert [(task[5], task[6]['clock_slews']) for task in tasks[2:]] == \
+           [('high', 0.1), ('low', 0.1), ('high', 0.2), ('low', 0.2)]
+
+
+@pytest.mark.parametrize('polarity, expected', [('high', 0.06 + 0.0945), ('low', 0.09 + 0.0945)])
+def test_min_pulse_width(monkeypatch, polarity, expected):
+    """The pulse width is the worst case over all paths, and is added as a 1D table."""
+    monkeypatch.setattr(min_pulse_width, 'stabilizing_time', lambda *args: 2e-9 @ PySpice.Unit.u_s)
+    monkeypatch.setattr(min_pulse_width, 'get_latch_state', lambda *args, **kwargs: {})
+    monkeypatch.setattr(min_pulse_width, 'get_c2q', _fake_c2q)
+    config = SimpleNamespace(parameters={'clock_slews': [0.1, 0.2]})
+    settings = SimpleNamespace(units=UnitsSettings(), dry_run=False,
+                               simulation=SimpleNamespace(constraint_search_parallelism=1))
+    variation = {'clock_slews': 0.1, 'metastability_constraint_load': 0.01,
+                 'metastability_constraint_search_tolerance': 0.001,
+                 'metastability_constraint_search_timestep': 0.05}
+    cell = _make_cell()
+
+    result = min_pulse_width.find_min_pulse_width(cell, config, settings, cell.clock, polarity,
+                                                  variation, list(min_pulse_width.capture_paths(cell)))
+
+    [timing] = result.group('pin', 'CLK').subgroups_with_name('timing')
+    assert timing.attributes['timing_type'].value == 'min_pulse_width'
+    [lut] = timing.subgroups_with_name('rise_constraint' if polarity == 'high' else 'fall_constraint')
+    assert lut.values.shape == (1,)
+    # c2q at the stabilizing time is ~100.5 ps, which degrades by 10% ~0.0945 ns past the limit
+    assert lut.values[0] == pytest.approx(expected, abs=0.003)
+
+
+def test_dry_run_skips_stabilizing_time(monkeypatch):
+    """Dry runs return a placeholder table without measuring anything."""
+    def fail(*args, **kwargs):
+        raise AssertionError('simulated during a dry run')
+    monkeypatch.setattr(min_pulse_width, 'stabilizing_time', fail)
+    monkeypatch.setattr(min_pulse_width, 'get_c2q', fail)
+    config = SimpleNamespace(parameters={'clock_slews': [0.1, 0.2]})
+    settings = SimpleNamespace(units=UnitsSettings(), dry_run=True)
+    variation = {'clock_slews': 0.1, 'metastability_constraint_load': 0.01,
+                 'metastability_constraint_search_tolerance': 0.001,
+                 'metastability_constraint_search_timestep': 0.05}
+    cell = _make_cell()
+
+    result = min_pulse_width.find_min_pulse_width(cell, config, settings, cell.clock, 'high',
+                                                  variation, list(min_pulse_width.capture_paths(cell)))
+
+    [timing] = result.group('pin', 'CLK').subgroups_with_name('timing')
+    [lut] = timing.subgroups_with_name('rise_constraint')
+    assert lut.values[0] == (-1 @ PySpice.Unit.u_s).convert(settings.units.time.prefixed_unit).value
+
+
+def test_slews_merge_into_one_row():
+    """Single-slew results merge into a one-dimensional table, displayed as one row."""
+    tables = []
+    for (slew, width) in [(0.2, 0.25), (0.1, 0.15)]:
+        lut = LookupTable('rise_constraint', 'min_pulse_width_template_2',
+                          constrained_pin_transition=[slew])
+        lut.values[0] = width
+        tables.append(lut)
+    tables[0].merge(tables[1])
+    assert list(tables[0].values) == [0.15, 0.25]
+    assert '"0.15, 0.25"' in tables[0].to_liberty(precision=2)
@@ -0,0 +1,121 @@
+import sys
+
+import numpy as np
+import pytest
+
+from charlib.characterizer.ngspice_pipe import NgSpicePipeError, NgSpiceProcess, PipeAnalysis
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+# Stands in for ``ngspice -p``: echoes, loads decks with source and writes a prepared raw file. What
+# run prints depends on keywords in the deck.
+STUB_NGSPICE = '''
+import os, shutil, sys, time
+deck = ''
+for line in sys.stdin:
+    command = line.strip()
+    if command.startswith('echo '):
+        print(command[5:])
+    elif command.startswith('source '):
+        deck = open(command[7:]).read()
+    elif command == 'run':
+        if 'HANG' in deck:
+            time.sleep(60)
+        if 'EXIT' in deck:
+            sys.exit(1)
+        if 'FAIL' in deck:
+            print('Error on line 2 : m1 vout vin vss vss nfet')
+            continue
+        print('Doing analysis at TEMP = 25.000000 and TNOM = 25.000000')
+        print('c2q                 =  1.500000e-10 targ=  2.500000e-10 trig=  1.000000e-10')
+        print('unrelated = 3')
+    elif command.startswith('write '):
+        shutil.copy(os.environ['STUB_RAW'], command[6:])
+    sys.stdout.flush()
+'''
+
+DECK = 'stub deck\n.meas tran c2q trig v(vclk) val=0.9 rise=1 targ v(vout) val=0.9 rise=1\n'
+
+
+def _raw_plot():
+    """Return the bytes of a binary raw file with one transient plot"""
+    header = ['Title: test', 'Date: Mon Jan  1 00:00:00  2024', 'Plotname: Transient Analysis',
+              'Flags: real', 'No. Variables: 2', 'No. Points: 2', 'Variables:',
+              '\t0\ttime\ttime', '\t1\tv(vout)\tvoltage', 'Binary:']
+    return ('\n'.join(header) + '\n').encode() + np.array([[0.0, 1.8], [1e-9, 0.0]]).tobytes()
+
+
+@pytest.fixture
+def process(tmp_path, monkeypatch):
+    """An NgSpiceProcess driving the stub instead of ngspice"""
+    stub = tmp_path / 'ngspice'
+    stub.write_text(f'#!{sys.executable}\n{STUB_NGSPICE}')
+    stub.chmod(0o755)
+    (tmp_path / 'result.raw').write_bytes(_raw_plot())
+    monkeypatch.setenv('STUB_RAW', str(tmp_path / 'result.raw'))
+    monkeypatch.setattr(NgSpiceProcess, 'COMMAND', str(stub))
+    process = NgSpiceProcess(timeout=5)
+    yield process
+    process.close()
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_pipe_analysis_lookup():
+    """PipeAnalysis exposes vectors the same way PySpice analyses do."""
+    vectors = {'time': np.array([0.0, 1e-9]), 'vout': np.array([1.8, 0.9]),
+               'vdd#branch': np.array([-1e-6, -2e-6])}
+    analysis = PipeAnalysis(vectors, {'cell_fall__a_to_y': 1e-10})
+    assert np.array_equal(analysis.time, [0.0, 1e-9])
+    assert np.array_equal(analysis['VOUT'], [1.8, 0.9])
+    assert np.array_equal(analysis.vout, [1.8, 0.9])
+    assert np.array_equal(analysis.branches['vdd'], [-1e-6, -2e-6])
+    assert analysis.measurements == {'cell_fall__a_to_y': 1e-10}
+
+
+def test_command_output_ends_at_sentinel(process):
+    """Each command returns the lines printed before its sentinel, and nothing after it."""
+    process._start()
+    assert process._command('echo first', 'echo second') == ['first', 'second']
+    assert process._command('echo third') == ['third']
+
+
+def test_run_parses_measurements(process):
+    """Vectors come from the raw file, and only the deck's .meas results are measurements."""
+    analysis = process.run(DECK)
+    assert np.array_equal(analysis.time, [0.0, 1e-9])
+    assert np.array_equal(analysis['vout'], [1.8, 0.0])
+    assert analysis.measurements == {'c2q': 1.5e-10}
+    # The process is reused for the next deck
+    pid = process.process.pid
+    process.run(DECK)
+    assert process.process.pid == pid
+
+
+def test_fatal_messages_fail_the_run(process):
+    """Output matching FATAL_MESSAGES fails the run, even if a raw file was written."""
+    with pytest.raises(NgSpicePipeError, match='Error on line 2'):
+        process.run(f'{DECK}FAIL\n')
+
+
+def test_exit_is_reported_and_restarted(process):
+    """If ngspice exits, the run fails and the next deck starts a new process."""
+    with pytest.raises(NgSpicePipeError, match='exited unexpectedly'):
+        process.run(f'{DECK}EXIT\n')
+    assert process.run(DECK).measurements == {'c2q': 1.5e-10}
+
+
+def test_hung_process_is_killed(process):
+    """If ngspice stops responding, it is killed after the timeout and replaced for the next deck."""
+    process.timeout = 0.5
+    process._start()
+    hung = process.process
+    with pytest.raises(NgSpicePipeError, match='did not respond'):
+        process.run(f'{DECK}HANG\n')
+    assert hung.poll() is not None
+    assert process.run(DECK).measurements == {'c2q': 1.5e-10}
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PySpice.Spice.NgSpice.Shared import ffi
+
+from charlib.characterizer.ngspice_shared import NgSpiceSharedError, SharedSimulator, vector_view
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+class FakeNgSpice:
+    """Stand-in for PySpice's NgSpiceShared, holding vectors in cffi buffers like ngspice does"""
+
+    def __init__(self, plot, vectors, output=()):
+        self.last_plot = plot
+        self.output = list(output)
+        self.commands = []
+        self._data = {f'{plot}.{name}': ffi.new('double[]', list(values)) for name, values in vectors.items()}
+        self._lengths = {f'{plot}.{name}': len(values) for name, values in vectors.items()}
+        self._ngspice_shared = SimpleNamespace(ngGet_Vec_Info=self._vec_info,
+                                               ngSpice_AllVecs=lambda plot: list(vectors))
+
+    def _vec_info(self, name):
+        name = name.decode('utf8')
+        if name not in self._data:
+            return ffi.NULL
+        return SimpleNamespace(v_realdata=self._data[name], v_compdata=ffi.NULL,
+                               v_length=self._lengths[name])
+
+    @staticmethod
+    def _convert_string_array(array):
+        return array
+
+    def destroy(self):
+        self.commands.append('destroy all')
+
+    def load_circuit(self, deck):
+        self.commands.append('load')
+
+    def exec_command(self, command, join_lines=True):
+        self.commands.append(command)
+        return self.output
+
+
+def _make_simulator(ngspice):
+    simulator = SharedSimulator.__new__(SharedSimulator)
+    simulator._simulator = SimpleNamespace(ngspice=ngspice)
+    return simulator
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_vector_view_shares_ngspice_memory():
+    """Vectors are read-only views of ngspice's memory, so changes there show through."""
+    ngspice = FakeNgSpice('tran1', {'vout': [1.8, 0.9, 0.0]})
+    view = vector_view(ngspice, 'tran1.vout')
+    assert np.array_equal(view, [1.8, 0.9, 0.0])
+    assert not view.flags.writeable
+    ngspice._data['tran1.vout'][1] = 0.5
+    assert view[1] == 0.5
+    with pytest.raises(KeyError):
+        vector_view(ngspice, 'tran1.missing')
+
+
+def test_run_returns_views_and_measurements():
+    """Each run frees the previous results, and returns its own as an analysis."""
+    ngspice = FakeNgSpice('tran1', {'time': [0.0, 1e-9], 'V(vout)': [1.8, 0.0], 'vdd#branch': [0.0, -1e-6]},
+                          output=['c2q                 =  1.5e-10 targ=  2.5e-10 trig=  1e-10'])
+    analysis = _make_simulator(ngspice).run('title\n.meas tran c2q trig v(vclk) val=0.9 rise=1\n.end\n')
+    assert ngspice.commands == ['destroy all', 'load', 'run']
+    assert np.array_equal(analysis.time, [0.0, 1e-9])
+    assert np.array_equal(analysis['vout'], [1.8, 0.0])
+    assert np.array_equal(analysis.branches['vdd'], [0.0, -1e-6])
+    assert analysis.measurements == {'c2q': 1.5e-10}
+
+
+def test_failed_run():
+    """If ngspice produces no plot, the run fails."""
+    with pytest.raises(NgSpiceSharedError):
+        _make_simulator(FakeNgSpice('const', {})).run('title\n.end\n')
@@ -0,0 +1,111 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+from charlib.characterizer import characterizer
+from charlib.characterizer.outliers import nonmonotonic_entries, outlier_entries
+from charlib.liberty import liberty
+from charlib.liberty.library import LookupTable
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+LOADS = [0.01, 0.02, 0.04, 0.08]
+SLEWS = [0.1, 0.2, 0.4, 0.8]
+
+
+def _make_table(values):
+    table = LookupTable('cell_rise', f'delay_template_{len(LOADS)}x{len(SLEWS)}',
+                        total_output_net_capacitance=LOADS, input_net_transition=SLEWS)
+    table.values = np.array(values, dtype=float)
+    return table
+
+
+def _smooth_values():
+    """Delays which grow smoothly with load and slew"""
+    (loads, slews) = np.meshgrid(LOADS, SLEWS, indexing='ij')
+    return 0.05 + 2.0*loads + 0.3*slews + 1.5*loads*slews
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_nonmonotonic_entries():
+    """Entries which are local extrema along either table variable are flagged."""
+    table = LookupTable('cell_rise', 'delay_template_3x3',
+                        total_output_net_capacitance=[0.01, 0.02, 0.04],
+                        input_net_transition=[0.1, 0.2, 0.4])
+    table.values = np.array([[1.0, 1.1, 1.3],
+                             [1.2, 1.0, 1.5],
+                             [1.4, 1.6, 1.9]])
+    assert nonmonotonic_entries(table) == [(0.02, 0.2)]
+    table.values[1, 1] = 1.3
+    assert nonmonotonic_entries(table) == []
+
+
+def test_smooth_table_has_no_outliers():
+    """A well-behaved table is left alone."""
+    assert outlier_entries(_make_table(_smooth_values())) == []
+
+
+def test_invalid_entries_are_outliers():
+    """NaN and negative entries are flagged."""
+    values = _smooth_values()
+    values[0, 0] = np.nan
+    values[3, 3] = -0.1
+    # Neighbours of the invalid entries may also be flagged as local extrema
+    assert {(0.01, 0.1), (0.08, 0.8)} <= set(outlier_entries(_make_table(values)))
+
+
+def test_glitch_on_table_edge_is_outlier():
+    """Entries which break from the trend are flagged even where monotonicity can't show it."""
+    values = _smooth_values()
+    values[3, 3] *= 1.5
+    assert nonmonotonic_entries(_make_table(values)) == []
+    assert outlier_entries(_make_table(values)) == [(0.08, 0.8)]
+
+
+def test_resimulated_tasks_use_new_settings(monkeypatch):
+    """Repeated tasks get the settings passed to resimulate_delay_entries, not their originals."""
+    received = []
+
+    def fake_delay(cell, config, settings, variation, path):
+        received.append(settings)
+        table = _make_table(_smooth_values())
+        timing_group = liberty.Group('timing')
+        timing_group.add_attribute('related_pin', 'A')
+        timing_group.add_attribute('timing_type', 'combinational_rise')
+        timing_group.add_group(table)
+        cell_group = liberty.Group('cell', 'INV')
+        cell_group.add_group('pin', 'Y')
+        cell_group.group('pin', 'Y').add_group(timing_group)
+        return cell_group
+
+    @contextmanager
+    def serial_executor(*args):
+        def submit(task, *task_args):
+            future = Future()
+            future.set_result(task(*task_args))
+            return future
+        yield SimpleNamespace(submit=submit)
+
+    monkeypatch.setattr(characterizer.charlib.characterizer.procedures.combinational.delay,
+                        'measure_delays_for_path_with_criterion', fake_delay)
+    char = characterizer.Characterizer(lib_name='test')
+    monkeypatch.setattr(char, 'executor', serial_executor)
+    cell = SimpleNamespace(name='INV')
+    config = SimpleNamespace(timestep=None)
+    original_settings = char.settings
+    char.library.add_group(fake_delay(cell, config, original_settings, None, None))
+    received.clear()
+
+    new_settings = SimpleNamespace(name='new')
+    tasks = [(fake_delay, cell, config, original_settings, {'loads': LOADS[1], 'data_slews': SLEWS[2]},
+              ['A', '10', 'Y', '01'])]
+    char.resimulate_delay_entries(tasks, lambda table: [(LOADS[1], SLEWS[2])], new_settings)
+    assert received == [new_settings]
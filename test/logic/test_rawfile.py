@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from charlib.characterizer.rawfile import RawFile, vector_name
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _raw_plot(plotname, variables, values, flags='real'):
+    """Return the bytes of one binary raw file plot. values has shape (points, variables)."""
+    header = [f'Title: test', 'Date: Mon Jan  1 00:00:00  2024', f'Plotname: {plotname}',
+              f'Flags: {flags}', f'No. Variables: {len(variables)}', f'No. Points: {len(values)}',
+              'Variables:']
+    header += [f'\t{i}\t{name}\t{kind}' for i, (name, kind) in enumerate(variables)]
+    header += ['Binary:']
+    dtype = '<c16' if flags == 'complex' else '<f8'
+    return ('\n'.join(header) + '\n').encode() + np.asarray(values, dtype=dtype).tobytes()
+
+
+TRAN_VARIABLES = [('time', 'time'), ('v(vout)', 'voltage'), ('i(vdd)', 'current')]
+TRAN_VALUES = [[0.0, 1.8, -1e-6], [1e-9, 0.9, -2e-6], [2e-9, 0.0, -1e-6]]
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_vector_names():
+    """Raw file variable names are normalized to ngspice vector names."""
+    assert vector_name('V(VOUT)') == 'vout'
+    assert vector_name('i(vdd)') == 'vdd#branch'
+    assert vector_name('xdut.net1') == 'xdut.net1'
+
+
+def test_read_real_plot(tmp_path):
+    """Each vector is returned as a view with the values for that variable."""
+    path = tmp_path / 'result.raw'
+    path.write_bytes(_raw_plot('Transient Analysis', TRAN_VARIABLES, TRAN_VALUES))
+    [plot] = RawFile(path).plots
+    assert plot.name == 'Transient Analysis'
+    assert list(plot) == ['time', 'vout', 'vdd#branch']
+    assert np.array_equal(plot['time'], [0.0, 1e-9, 2e-9])
+    assert np.array_equal(plot['v(vout)'], [1.8, 0.9, 0.0])
+    assert np.array_equal(plot['vdd#branch'], [-1e-6, -2e-6, -1e-6])
+
+
+def test_vectors_are_read_only(tmp_path):
+    """Vectors are views onto the read-only file mapping."""
+    path = tmp_path / 'result.raw'
+    path.write_bytes(_raw_plot('Transient Analysis', TRAN_VARIABLES, TRAN_VALUES))
+    vout = RawFile(path).plots[0]['vout']
+    with pytest.raises(ValueError):
+        vout[0] = 0.0
+
+
+def test_views_survive_file_removal(tmp_path):
+    """Views remain valid after the file is deleted, e.g. before the next simulation run."""
+    path = tmp_path / 'result.raw'
+    path.write_bytes(_raw_plot('Transient Analysis', TRAN_VARIABLES, TRAN_VALUES))
+    vout = RawFile(path).plots[0]['vout']
+    path.unlink()
+    assert np.array_equal(vout, [1.8, 0.9, 0.0])
+
+
+def test_read_multiple_plots(tmp_path):
+    """Files containing several plots are split at each header, including complex plots."""
+    path = tmp_path / 'result.raw'
+    path.write_bytes(_raw_plot('Operating Point', [('v(vout)', 'voltage')], [[1.8]])
+                     + _raw_plot('AC Analysis', [('frequency', 'frequency'), ('vin', 'voltage')],
+                                 [[10, 1-2j], [100, 0.5-1j]], flags='complex'))
+    [op, ac] = RawFile(path).plots
+    assert np.array_equal(op['vout'], [1.8])
+    assert np.array_equal(ac['frequency'].real, [10, 100])
+    assert np.array_equal(ac['vin'], [1-2j, 0.5-1j])
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+from charlib.characterizer.cache import ResultCache, operating_point_key, settling_time_key
+
+
+# ---------------------------------------------------------------------------
+# ResultCache
+# ---------------------------------------------------------------------------
+
+def test_missing_entry_returns_default(tmp_path):
+    """Looking up a key that was never stored returns the default."""
+    cache = ResultCache(tmp_path, 'test')
+    assert cache.get('missing') is None
+    assert cache.get('missing', default=42) == 42
+
+
+def test_put_then_get(tmp_path):
+    """Stored values are returned unchanged."""
+    cache = ResultCache(tmp_path, 'test')
+    value = {'nodes': {'xdut.n1': 1.2}, 'branches': {'vdd': -1e-12}}
+    cache.put({'cell': 'INV', 'inputs': [('A', '0')]}, value)
+    assert cache.get({'cell': 'INV', 'inputs': [('A', '0')]}) == value
+
+
+def test_put_replaces_existing_entry(tmp_path):
+    """Storing a key twice keeps the most recent value."""
+    cache = ResultCache(tmp_path, 'test')
+    cache.put('key', 1)
+    cache.put('key', 2)
+    assert cache.get('key') == 2
+
+
+def test_namespaces_are_separate(tmp_path):
+    """The same key in different namespaces refers to different entries."""
+    ResultCache(tmp_path, 'a').put('key', 'a')
+    assert ResultCache(tmp_path, 'b').get('key') is None
+
+
+def test_values_lists_every_entry(tmp_path):
+    """values() returns every value in the namespace, and nothing from other namespaces."""
+    cache = ResultCache(tmp_path, 'test')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    ResultCache(tmp_path, 'other').put('c', 3)
+    assert sorted(cache.values()) == [1, 2]
+
+
+def test_disabled_cache_stores_nothing():
+    """Without a cache directory, nothing is stored and every lookup misses."""
+    cache = ResultCache(None, 'test')
+    cache.put('key', 1)
+    assert cache.get('key', default=0) == 0
+
+
+def test_no_temporary_files_left_behind(tmp_path):
+    """Atomic writes clean up after themselves."""
+    cache = ResultCache(tmp_path, 'test')
+    cache.put('key', 'value')
+    assert [p.suffix for p in cache.path.iterdir()] == ['.json']
+
+
+# ---------------------------------------------------------------------------
+# Operating point keys
+# ---------------------------------------------------------------------------
+
+def _make_key(tmp_path, temperature=25, inputs=None):
+    netlist = tmp_path / 'INV.sp'
+    if not netlist.exists():
+        netlist.write_text('.subckt INV A Y VDD VSS\n.ends\n')
+    cell = SimpleNamespace(name='INV', netlist=netlist)
+    config = SimpleNamespace(models=[(str(tmp_path / 'models.lib'), 'tt')])
+    settings = SimpleNamespace(temperature=temperature,
+                               named_nodes=(SimpleNamespace(name='VDD', voltage=1.8),
+                                            SimpleNamespace(name='VSS', voltage=0)))
+    return operating_point_key(cell, config, settings, inputs or {'A': '0'})
+
+
+def test_operating_point_key_ignores_input_order(tmp_path):
+    """Input states are keyed independently of dict ordering."""
+    key_ab = _make_key(tmp_path, inputs={'A': '0', 'B': '1'})
+    key_ba = _make_key(tmp_path, inputs={'B': '1', 'A': '0'})
+    assert ResultCache.digest(key_ab) == ResultCache.digest(key_ba)
+
+
+def test_operating_point_key_depends_on_conditions(tmp_path):
+    """Different temperatures or input states produce different keys."""
+    base = ResultCache.digest(_make_key(tmp_path))
+    assert ResultCache.digest(_make_key(tmp_path, temperature=125)) != base
+    assert ResultCache.digest(_make_key(tmp_path, inputs={'A': '1'})) != base
+
+
+def test_settling_time_key_depends_on_path(tmp_path):
+    """Settling times are cached separately for each path through a cell."""
+    netlist = tmp_path / 'INV.sp'
+    netlist.write_text('.subckt INV A Y VDD VSS\n.ends\n')
+    cell = SimpleNamespace(name='INV', netlist=netlist)
+    config = SimpleNamespace(models=[])
+    settings = SimpleNamespace(temperature=25, named_nodes=(SimpleNamespace(name='VDD', voltage=1.8),))
+    rise = settling_time_key(cell, config, settings, ['A', '01', 'Y', '10'])
+    fall = settling_time_key(cell, config, settings, ['A', '10', 'Y', '01'])
+    assert ResultCache.digest(rise) != ResultCache.digest(fall)
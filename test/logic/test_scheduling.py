@@ -0,0 +1,102 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from charlib.characterizer import characterizer
+from charlib.liberty import liberty
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def serial_executor(*args):
+    """Run each task as soon as it is submitted"""
+    def submit(task, *task_args):
+        future = Future()
+        future.set_result(task(*task_args))
+        return future
+    yield SimpleNamespace(submit=submit)
+
+
+def _make_characterizer(monkeypatch, cells, tasks_for_cell):
+    """Build a Characterizer for cells, whose analyse_cell returns tasks_for_cell(cell)"""
+    char = characterizer.Characterizer(lib_name='test')
+    monkeypatch.setattr(char, 'executor', serial_executor)
+    monkeypatch.setattr(char, 'analyse_cell', lambda cell, config: tasks_for_cell(cell))
+    char.cells = [(SimpleNamespace(name=name, functions={}), SimpleNamespace(timestep=None, plots=[], family=None))
+                  for name in cells]
+    return char
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_preparation_tasks_run_first(monkeypatch):
+    """Preparation tasks finish before any other task starts, however they are scheduled."""
+    ran = []
+
+    def prepare(name):
+        ran.append(('prepare', name))
+
+    def measure(name):
+        ran.append(('measure', name))
+        return liberty.Group('cell', name)
+
+    monkeypatch.setattr(characterizer, 'preparation_tasks', {prepare})
+    char = _make_characterizer(monkeypatch, ['INV', 'BUF'],
+                               lambda cell: [(measure, cell.name), (prepare, cell.name)])
+    char._characterize()
+    assert ran == [('prepare', 'INV'), ('prepare', 'BUF'), ('measure', 'INV'), ('measure', 'BUF')]
+    # Preparation tasks which return nothing are not merged
+    assert sorted(group.identifier for group in char.library.subgroups_with_name('cell')) == ['BUF', 'INV']
+
+
+def test_shared_preparation_tasks_run_once(monkeypatch):
+    """Procedures which yield the same preparation task only run it once."""
+    ran = []
+
+    def prepare(name, path, state_maps):
+        ran.append((name, path))
+
+    monkeypatch.setattr(characterizer, 'preparation_tasks', {prepare})
+    char = _make_characterizer(monkeypatch, ['DFF'], lambda cell: [
+        (liberty.Group, 'cell', cell.name),
+        (prepare, cell.name, ['D', '01', 'Q', '01'], [{'D': '0'}]),
+        (prepare, cell.name, ['D', '01', 'Q', '01'], [{'D': '0'}]),
+        (prepare, cell.name, ['D', '01', 'Q', '01'], [{'D': '1'}]),
+        (prepare, cell.name, ['D', '10', 'Q', '10'], [{'D': '0'}]),
+    ])
+    char._characterize()
+    assert ran == [('DFF', ['D', '01', 'Q', '01']), ('DFF', ['D', '01', 'Q', '01']),
+                   ('DFF', ['D', '10', 'Q', '10'])]
+
+
+def test_unique_tasks_compare_objects_by_identity():
+    """Tasks for different objects are never merged, even if the objects compare equal."""
+    (cell_a, cell_b) = (SimpleNamespace(name='INV'), SimpleNamespace(name='INV'))
+    tasks = [(len, cell_a, 1), (len, cell_b, 1), (len, cell_a, 1), (abs, cell_a, 1)]
+    assert characterizer.unique_tasks(tasks) == [tasks[0], tasks[1], tasks[3]]
+
+
+def test_leaders_finish_before_siblings_start(monkeypatch):
+    """Every task of each family leader finishes before the siblings' preparation tasks start."""
+    ran = []
+
+    def prepare(name):
+        ran.append(('prepare', name))
+
+    def measure(name):
+        ran.append(('measure', name))
+        return liberty.Group('cell', name)
+
+    monkeypatch.setattr(characterizer, 'preparation_tasks', {prepare})
+    char = _make_characterizer(monkeypatch, ['INV_X1', 'INV_X2', 'BUF_X1'],
+                               lambda cell: [(measure, cell.name), (prepare, cell.name)])
+    char._characterize()
+    assert ran == [('prepare', 'INV_X1'), ('prepare', 'BUF_X1'), ('measure', 'INV_X1'),
+                   ('measure', 'BUF_X1'), ('prepare', 'INV_X2'), ('measure', 'INV_X2')]
+    assert {cell.name: config.family_leader for (cell, config) in char.cells} == \
+           {'INV_X1': True, 'INV_X2': False, 'BUF_X1': True}
@@ -0,0 +1,119 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+import PySpice
+import pytest
+
+from charlib.characterizer.procedures.sequential import delay
+from charlib.characterizer.units import UnitsSettings
+from charlib.liberty import liberty
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+T_CLK = 1e-9
+
+
+def _ramp(time, t_start, t_ramp, v0, v1):
+    """Return a linear ramp from v0 to v1 starting at t_start"""
+    return v0 + (v1 - v0) * np.clip((time - t_start) / t_ramp, 0, 1)
+
+
+def _fake_sim_latch(cell, config, settings, path, state_map, capacitive_load, clock_slew_rate,
+                    hold_skew, **kwargs):
+    """Model a flop whose Q rises after the clock edge, slower with slew, load and state S"""
+    t_c2q = 50e-12 + 0.5*float(clock_slew_rate) + 1e3*float(capacitive_load) \
+            + (10e-12 if state_map['S'] == '1' else 0)
+    t_transition = 20e-12 + 2e3*float(capacitive_load)
+    t_end = T_CLK + float(hold_skew)
+    time = np.linspace(0, t_end, 20001)
+    v_clk = _ramp(time, T_CLK - float(clock_slew_rate)/2, float(clock_slew_rate), 0, 1)
+    v_out = _ramp(time, T_CLK + t_c2q - t_transition/2, t_transition, 0, 1)
+    analysis = SimpleNamespace(time=time, nodes={'vclk': v_clk, 'vout': v_out})
+    return (SimpleNamespace(run=lambda simulation: analysis), None)
+
+
+def _make_settings():
+    thresholds = SimpleNamespace(low=0.2, high=0.8, rising=0.5, falling=0.5)
+    return SimpleNamespace(units=UnitsSettings(), dry_run=False, logic_thresholds=thresholds,
+                           primary_power=SimpleNamespace(voltage=1.0))
+
+
+def _make_cell():
+    cell = SimpleNamespace(name='DFF', liberty=liberty.Group('cell', 'DFF'),
+                           clock=SimpleNamespace(name='CLK', is_inverted=lambda: False))
+    cell.liberty.add_group('pin', 'Q')
+    return cell
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_measure_clock_to_q():
+    """Delay is measured from the clock edge to the output crossing its threshold."""
+    time = np.linspace(0, 2e-9, 2001)
+    v_clk = _ramp(time, 0.9e-9, 0.2e-9, 1, 0)
+    v_out = _ramp(time, 1.1e-9, 0.1e-9, 1, 0)
+    (c2q, transition) = delay.measure_clock_to_q(time, v_clk, v_out, 0.5, 'fall', 0.5,
+                                                  (0.8, 0.2), 'fall')
+    assert c2q == pytest.approx(0.15e-9)
+    assert transition == pytest.approx(0.06e-9)
+
+
+def test_measure_clock_to_q_without_output_switching():
+    """If the output never switches, NaN is returned rather than a bogus delay."""
+    time = np.linspace(0, 2e-9, 2001)
+    v_clk = _ramp(time, 0.9e-9, 0.2e-9, 0, 1)
+    (c2q, transition) = delay.measure_clock_to_q(time, v_clk, np.zeros(time.shape), 0.5, 'rise',
+                                                  0.5, (0.2, 0.8), 'rise')
+    assert np.isnan(c2q) and np.isnan(transition)
+
+
+def test_clock_to_q_tables(monkeypatch):
+    """Each grid point holds the worst case over all states, and short transients are extended."""
+    monkeypatch.setattr(delay, 'stabilizing_time', lambda *args: 0.1e-9 @ PySpice.Unit.u_s)
+    monkeypatch.setattr(delay, 'get_latch_state', lambda *args, **kwargs: {})
+    monkeypatch.setattr(delay, 'sim_latch', _fake_sim_latch)
+    config = SimpleNamespace(parameters={'clock_slews': [0.1, 0.02], 'loads': [0.1, 0.01],
+                                         'data_slews': [0.05]})
+    paths = [(['D', '01', 'Q', '01'], [{'CLK': '1', 'S': '0'}, {'CLK': '1', 'S': '1'}])]
+
+    # Each point is measured separately, and the single-entry tables merge into the full grid
+    tables = {}
+    for (load, slew) in itertools.product(config.parameters['loads'], config.parameters['clock_slews']):
+        result = delay.measure_delays_for_path(_make_cell(), config, _make_settings(),
+                                               {'clock_slews': slew, 'loads': load}, paths)
+        [timing] = result.group('pin', 'Q').subgroups_with_name('timing')
+        assert timing.attributes['related_pin'].value == 'CLK'
+        assert timing.attributes['timing_type'].value == 'rising_edge'
+        for lut in timing.groups.values():
+            assert lut.values.shape == (1, 1)
+            if lut.name in tables:
+                tables[lut.name].merge(lut)
+            else:
+                tables[lut.name] = lut
+    (cell_rise, rise_transition) = (tables['cell_rise'], tables['rise_transition'])
+    assert cell_rise.values.shape == (2, 2)
+    # Values are in ns; pF loads become 1e3*1e-12*load ns of delay
+    for load in [0.01, 0.1]:
+        for slew in [0.02, 0.1]:
+            assert cell_rise[load, slew] == pytest.approx(0.05 + 0.5*slew + load + 0.01, abs=1e-3)
+            # The 0.1 pF load needs a longer transient than the stabilizing time to finish slewing
+            assert rise_transition[load, slew] == pytest.approx(0.6*(0.02 + 2*load), abs=1e-3)
+
+
+def test_tasks_per_grid_point():
+    """Each clock slew and load of each output transition is measured in a separate task."""
+    cell = SimpleNamespace(paths=lambda: [['D', '01', 'Q', '01'], ['D', '10', 'Q', '10']],
+                           nonmasking_conditions_for_path=lambda *path: [{'CLK': '1', 'D': path[1][0]}])
+    config = SimpleNamespace(variations=lambda *params: [
+        {'clock_slews': slew, 'loads': load} for slew in [0.02, 0.1] for load in [0.01, 0.1]])
+    tasks = [task for task in delay.sequential_worst_case(cell, config, None)
+             if task[0] is delay.measure_delays_for_path]
+    assert [(task[4]['clock_slews'], task[4]['loads'], task[5][0][0][3]) for task in tasks] == \
+           [(slew, load, transition) for transition in ['01', '10'] for slew in [0.02, 0.1]
+            for load in [0.01, 0.1]]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import yaml
+
+from charlib.cli.tune import max_relative_error, set_yaml_block, write_options
+
+
+def test_max_relative_error():
+    """The error is the worst relative deviation across all tables."""
+    reference = {'a': np.array([1.0, 2.0]), 'b': np.array([4.0])}
+    values = {'a': np.array([1.01, 2.0]), 'b': np.array([3.9])}
+    assert np.isclose(max_relative_error(values, reference), 0.025)
+
+
+def test_missing_results_are_infinitely_wrong():
+    """A candidate which fails to produce a table can never be selected."""
+    assert max_relative_error({}, {'a': np.array([1.0])}) == np.inf
+
+
+def test_write_options_inline_settings(tmp_path):
+    """Options are added under settings.simulation, keeping the other settings."""
+    config_file = tmp_path / 'lib.yml'
+    config_file.write_text('settings:\n  simulation:\n    backend: ngspice-pipe\ncells: {}\n')
+    write_options(config_file, {'method': 'gear', 'reltol': 0.001})
+    settings = yaml.safe_load(config_file.read_text())['settings']
+    assert settings['simulation'] == {'backend': 'ngspice-pipe',
+                                      'options': {'method': 'gear', 'reltol': 0.001}}
+
+
+def test_write_options_separate_settings_file(tmp_path):
+    """If settings are stored in another YAML file, that file is updated."""
+    (tmp_path / 'settings.yml').write_text('lib_name: test\n')
+    config_file = tmp_path / 'lib.yml'
+    config_file.write_text('settings: settings.yml\ncells: {}\n')
+    write_options(config_file, {'klu': True})
+    assert yaml.safe_load(config_file.read_text())['settings'] == 'settings.yml'
+    settings = yaml.safe_load((tmp_path / 'settings.yml').read_text())
+    assert settings == {'lib_name': 'test', 'simulation': {'options': {'klu': True}}}
+
+
+def test_write_options_keeps_comments_and_formatting(tmp_path):
+    """Only the options block changes; comments and the other keys are left as written."""
+    config_file = tmp_path / 'lib.yml'
+    text = ('# Library settings\n'
+            'settings:\n'
+            '    simulation:\n'
+            '        backend: ngspice-pipe  # persistent processes\n'
+            '        options:\n'
+            '            method: trap\n'
+            '\n'
+            '        # Delay procedure\n'
+            '        combinational_delay: combinational_worst_case\n'
+            'cells: {}\n')
+    config_file.write_text(text)
+    write_options(config_file, {'method': 'gear', 'klu': True})
+    assert config_file.read_text() == text.replace('            method: trap\n',
+                                                   '            method: gear\n'
+                                                   '            klu: true\n')
+
+
+def test_set_yaml_block_rejects_flow_mappings():
+    """Inline mappings can't be patched without rewriting them, so they are refused."""
+    with pytest.raises(ValueError):
+        set_yaml_block('settings:\n  simulation: {backend: ngspice-pipe}\n',
+                       ['settings', 'simulation', 'options'], {'klu': True})
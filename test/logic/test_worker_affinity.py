@@ -0,0 +1,99 @@
+import fcntl
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from charlib.characterizer import characterizer, utils
+
+
+@pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'), reason='CPU affinity is not supported')
+def test_pin_worker_claims_free_cpu_set(tmp_path, monkeypatch):
+    """Workers should skip CPU sets already claimed by other workers"""
+    cpus = sorted(os.sched_getaffinity(0))
+    pinned = []
+    monkeypatch.setattr(os, 'sched_setaffinity', lambda pid, cpus: pinned.append(cpus))
+    monkeypatch.setattr(characterizer, '_cpu_slot', None)
+
+    # Simulate another worker holding the first slot
+    other = open(tmp_path / '0.lock', 'w')
+    fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    # flock locks are per open file, so a second open in this process behaves like another worker
+    characterizer.pin_worker(tmp_path, [cpus, cpus])
+    assert pinned == [cpus]
+    assert characterizer._cpu_slot.name == str(tmp_path / '1.lock')
+    characterizer._cpu_slot.close()
+    other.close()
+
+
+def test_pin_worker_without_free_sets(tmp_path, monkeypatch):
+    """Workers should be left unpinned if no CPU sets are given"""
+    monkeypatch.setattr(characterizer, '_cpu_slot', None)
+    characterizer.pin_worker(tmp_path, [])
+    assert characterizer._cpu_slot is None
+
+
+def test_job_layout():
+    """Jobs fill the available CPUs unless set, and each is pinned to its own CPU set if asked"""
+    cpus = list(range(8))
+    assert characterizer.job_layout(cpus, 1) == (8, [])
+    assert characterizer.job_layout(cpus, 3) == (2, [])
+    assert characterizer.job_layout(cpus, 3, pin=True) == (2, [[0, 1, 2], [3, 4, 5]])
+    assert characterizer.job_layout(cpus, 2, jobs=3, pin=True) == (3, [[0, 1], [2, 3], [4, 5]])
+    assert characterizer.job_layout(cpus, 16) == (1, [])
+
+
+def test_pin_worker_limits_library_threads(tmp_path, monkeypatch):
+    """Workers limit the thread pools of already loaded libraries if threadpoolctl is available"""
+    limited = []
+    monkeypatch.setitem(sys.modules, 'threadpoolctl',
+                        SimpleNamespace(threadpool_limits=lambda limits=None: limited.append(limits)))
+    characterizer.pin_worker(tmp_path, [], threads=4)
+    assert limited == [4]
+
+
+@pytest.mark.parametrize('backend, expected', [('ngspice-shared', 1),
+                                               ('ngspice-pipe', characterizer.PIPE_TASKS_PER_WORKER)])
+def test_workers_are_replaced(backend, expected):
+    """Workers are replaced after every task, or after a bounded number with the pipe backend"""
+    self = SimpleNamespace(settings=SimpleNamespace(simulation=SimpleNamespace(backend=backend)))
+    assert characterizer.Characterizer.tasks_per_worker(self) == expected
+
+
+def test_worker_starts_and_finalizes_its_probe_pool(tmp_path, monkeypatch):
+    """Workers start their probe pool once as they start, and shut it down when they exit"""
+    pools = []
+    finalizers = []
+
+    class FakePool:
+        def __init__(self, max_workers, mp_context):
+            self.max_workers = max_workers
+            pools.append(self)
+
+        def map(self, fn, candidates):
+            return map(fn, candidates)
+
+        def shutdown(self):
+            pass
+
+    monkeypatch.setattr(utils, 'ProcessPoolExecutor', FakePool)
+    monkeypatch.setattr(utils, '_probe_pool', None)
+    monkeypatch.setattr(utils.multiprocessing.util, 'Finalize',
+                        lambda obj, callback, exitpriority=None: finalizers.append(callback))
+    characterizer.init_worker(tmp_path, [], None, 3)
+    [pool] = pools
+    assert pool.max_workers == 3
+    assert finalizers == [pool.shutdown]
+    settings = SimpleNamespace(simulation=SimpleNamespace(constraint_search_parallelism=3))
+    assert utils.probe_map(settings) == pool.map
+    assert utils.probe_map(settings) == pool.map
+    assert len(pools) == 1
+
+
+def test_probes_run_one_at_a_time_without_a_pool(monkeypatch):
+    """Processes without a probe pool fall back on the builtin map"""
+    monkeypatch.setattr(utils, '_probe_pool', None)
+    settings = SimpleNamespace(simulation=SimpleNamespace(constraint_search_parallelism=4))
+    assert utils.probe_map(settings) is map
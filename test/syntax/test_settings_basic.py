@@ -41,6 +41,12 @@ def test_settings_basic():
     assert nodes["nwell"]["voltage"] == 1.8
 
     assert settings["simulation"]["backend"] == "ngspice-subprocess"
+    options = settings["simulation"]["options"]
+    assert options["method"] == "gear"
+    assert options["reltol"] == 0.0001
+    assert options["timestep_divisor"] == 4
+    assert options["klu"] == False
+    assert "trtol" not in options
 
     lt = settings["logic_thresholds"]
     assert lt["low"] == 0.3
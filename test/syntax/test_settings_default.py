@@ -45,8 +45,12 @@ def test_settings_default():
     assert settings["logic_thresholds"]["falling"] == 0.5
 
     assert settings["multithreaded"] == True
+    assert settings["solver_threads"] == 1
+    assert settings["cpu_affinity"] == False
     assert settings["results_dir"] == "results"
     assert settings["debug"] == False
     assert settings["debug_dir"] == "debug"
+    assert settings["cache"] == True
+    assert "cache_dir" not in settings
     assert settings["omit_on_failure"] == False
 